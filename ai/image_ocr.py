@@ -0,0 +1,379 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# OCR direto de imagens (JPEG, PNG e TIFF de várias páginas)
+#
+# Cada quadro da imagem é lido sozinho por um processo do OCR, reconhecido e
+# gravado como uma página PDF; as páginas são reunidas em ordem, em lotes
+# (ai.ocr_windows.MontagemPDF), no PDF pesquisável final. No máximo JANELA_POR_PROCESSO
+# quadros por processo ficam em andamento ou aguardando a junção, então a
+# memória não cresce com o número de páginas do TIFF.
+
+import os
+import time
+import shutil
+import logging
+import tempfile
+from concurrent.futures import wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from config import Config
+from ai.ocr_cache import ocr_cache
+from ai.page_cache import ler_pasta_hocr, confianca_hocr
+from ai.tesseract_pool import tesseract_pool
+from ai.ocr_budget import PrazoOCR, OCRTimeoutError, PoolOCR, encerrar_processos
+from ai.ocr_windows import MontagemPDF
+from ai.jobs import JobCancelledError
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Assinatura (primeiros bytes) de cada formato aceito
+_ASSINATURAS = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+)
+
+# Quadros em andamento ou aguardando a junção, por processo do OCR
+JANELA_POR_PROCESSO = 2
+
+def formato_imagem(caminho):
+    """Formato da imagem pelo conteúdo do arquivo ('jpeg', 'png', 'tiff'), ou None se não for imagem aceita"""
+    try:
+        with open(caminho, 'rb') as f:
+            inicio = f.read(8)
+    except (OSError, TypeError):
+        # Streams em memória (PDF limpo) e caminhos inválidos não são imagens
+        return None
+    for assinatura, formato in _ASSINATURAS:
+        if inicio.startswith(assinatura):
+            return formato
+    return None
+
+def nome_saida_pdf(nome_arquivo):
+    """Nome do PDF pesquisável gerado a partir de um arquivo (imagens recebem a extensão .pdf)"""
+    base, extensao = os.path.splitext(nome_arquivo)
+    if extensao.lower().lstrip('.') in Config.IMAGE_EXTENSIONS:
+        return base + '.pdf'
+    return nome_arquivo
+
+def contar_quadros(caminho):
+    """Número de quadros (páginas) da imagem; só os cabeçalhos são lidos"""
+    with Image.open(caminho) as imagem:
+        return getattr(imagem, 'n_frames', 1)
+
+def _resolucao(imagem):
+    """Resolução do quadro (Config.OCR_IMAGE_DPI se a imagem não informar uma válida)"""
+    dpi = imagem.info.get('dpi')
+    if dpi and dpi[0] and float(dpi[0]) >= 72:
+        return float(dpi[0])
+    return float(Config.OCR_IMAGE_DPI)
+
+def abrir_quadro(caminho, quadro):
+    """Lê só o quadro pedido, com info['dpi'] definido (ver _resolucao)"""
+    with Image.open(caminho) as imagem:
+        imagem.seek(quadro)
+        dpi = _resolucao(imagem)
+        copia = imagem.copy()
+    copia.info['dpi'] = (dpi, dpi)
+    return copia
+
+def _modo_compativel(imagem):
+    # Modos que o img2pdf grava sem conversão
+    if imagem.format == 'JPEG':
+        return imagem.mode in ('L', 'RGB', 'CMYK')
+    return imagem.mode in ('1', 'L', 'RGB')
+
+def preparar_quadro(caminho, quadro, total_quadros, destino):
+    """
+    Arquivo de imagem de um quadro, aceito pelo img2pdf (e pelo ocrmypdf), e a sua resolução
+
+    Imagens de um quadro em modo compatível seguem sem recompressão (o JPEG
+    original vai para o PDF como está); os quadros de um TIFF são gravados
+    sozinhos em `destino` (sem extensão): preto e branco em TIFF CCITT G4, os
+    demais em PNG.
+
+    Returns:
+        tuple: (caminho do arquivo, DPI)
+    """
+    with Image.open(caminho) as imagem:
+        imagem.seek(quadro)
+        dpi = _resolucao(imagem)
+        if total_quadros == 1 and _modo_compativel(imagem):
+            return caminho, dpi
+
+    imagem = abrir_quadro(caminho, quadro)
+    if imagem.mode == '1':
+        arquivo = destino + '.tif'
+        imagem.save(arquivo, compression='group4', dpi=(dpi, dpi))
+        return arquivo, dpi
+    if imagem.mode.startswith('I'):
+        # 16 bits por canal: reduzir para 8 bits mantendo a escala
+        imagem = imagem.convert('I').point(lambda valor: valor / 256).convert('L')
+    elif imagem.mode in ('LA', 'L'):
+        imagem = imagem.convert('L')
+    elif imagem.mode != 'RGB':
+        imagem = imagem.convert('RGB')
+    arquivo = destino + '.png'
+    imagem.save(arquivo, dpi=(dpi, dpi))
+    return arquivo, dpi
+
+def pdf_da_imagem(arquivo_imagem, dpi, destino):
+    """Grava uma página PDF com a imagem (img2pdf, sem recompressão quando possível)"""
+    import img2pdf
+
+    with open(destino, 'wb') as f:
+        img2pdf.convert(arquivo_imagem, outputstream=f, layout_fun=img2pdf.get_fixed_dpi_layout_fun((dpi, dpi)))
+
+def _ocrmypdf_quadro(arquivo, dpi, destino, opcoes):
+    """Uma passada do ocrmypdf no quadro: (texto, confiança média)"""
+    from ai.ocr_service import _executar_ocrmypdf, _ler_sidecar
+
+    sidecar = destino + '_sidecar.txt'
+    pasta_hocr = destino + '_hocr'
+    os.makedirs(pasta_hocr)
+    try:
+        _executar_ocrmypdf(arquivo, destino + '.pdf', 1, None, dict(opcoes or {}, image_dpi=round(dpi)), sidecar,
+                           pasta_hocr)
+        textos = _ler_sidecar(sidecar, 1)
+        hocr = ler_pasta_hocr(pasta_hocr).get(0)
+    finally:
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+        shutil.rmtree(pasta_hocr, ignore_errors=True)
+    return (textos[0] or '') if textos else '', confianca_hocr(hocr)
+
+def _ocr_quadro(caminho, quadro, total_quadros, pasta_temp, confianca_minima=None, perfil_reforco=None):
+    """
+    OCR de um quadro com o ocrmypdf (executado em um processo do pool)
+
+    Se a confiança média ficar abaixo de `confianca_minima`, o quadro passa de
+    novo pelo ocrmypdf com `perfil_reforco` e fica o resultado de maior confiança.
+
+    Returns:
+        dict: Quadro, PDF da página, texto, confiança, se passou pelo OCR reforçado e tempo gasto
+    """
+    inicio = time.time()
+    base = os.path.join(pasta_temp, f"quadro_{quadro:06d}")
+    arquivo, dpi = preparar_quadro(caminho, quadro, total_quadros, base)
+    reforcado = False
+    try:
+        texto, confianca = _ocrmypdf_quadro(arquivo, dpi, base, None)
+        if confianca_minima and confianca is not None and confianca < confianca_minima:
+            reforcado = True
+            texto_reforco, confianca_reforco = _ocrmypdf_quadro(arquivo, dpi, base + '_reforco', perfil_reforco)
+            if confianca_reforco is not None and confianca_reforco > confianca:
+                os.replace(base + '_reforco.pdf', base + '.pdf')
+                texto, confianca = texto_reforco, confianca_reforco
+            else:
+                os.remove(base + '_reforco.pdf')
+    finally:
+        if arquivo != caminho and os.path.exists(arquivo):
+            os.remove(arquivo)
+    return {
+        'page': quadro,
+        'pdf': base + '.pdf',
+        'text': texto,
+        'confidence': confianca,
+        'retried': reforcado,
+        'seconds': time.time() - inicio
+    }
+
+def process_image_with_ocr(input_file_path, output_file_path, options=None):
+    """
+    Gera o PDF pesquisável e o texto de uma imagem (JPEG, PNG ou TIFF de várias páginas)
+
+    Chamado por process_pdf_with_ocr quando a entrada é uma imagem; aceita as
+    mesmas opções (a pré-análise e o cache por página não se aplicam: todo
+    quadro passa pelo OCR) e retorna o mesmo resultado. Imagens sem resolução
+    usam Config.OCR_IMAGE_DPI.
+    """
+    from ai.ocr_service import _motor_ocr, _notificar_progresso, _configuracao_ocr, _opcoes_reforco, \
+        _resultado_do_cache
+    from ai import ocr_capabilities
+
+    if not PIL_AVAILABLE:
+        return {'success': False, 'error': 'Pillow não está disponível para ler imagens'}
+
+    options = options or {}
+    motor = _motor_ocr(options.get('engine'))
+    if motor != 'tesserocr' and not ocr_capabilities.tesseract_available():
+        return {
+            'success': False,
+            'error': 'Tesseract não está disponível. Instale tesseract-ocr'
+        }
+
+    start_time = time.time()
+    formato = formato_imagem(input_file_path)
+    pasta_temp = tempfile.mkdtemp(prefix='ocr_imagem_', dir=Config.TEMP_DIRECTORY)
+    executor = None
+    montagem = None
+    pendentes = {}
+    textos = {}
+    total_quadros = 0
+    try:
+        cache_key = None
+        if options.get('use_cache', Config.OCR_CACHE_ENABLED):
+            cache_key = ocr_cache.make_key(input_file_path, _configuracao_ocr(True, motor))
+            cached = ocr_cache.get(cache_key, output_file_path)
+            if cached:
+                return _resultado_do_cache(cached, output_file_path, options, start_time, 'Imagem recuperada')
+
+        _notificar_progresso(options, 'preflight')
+        total_quadros = contar_quadros(input_file_path)
+        plano = {
+            'strategy': 'ocr',
+            'total_pages': total_quadros,
+            'pages': None,
+            'format': formato,
+            'reasons': [f'Imagem {formato.upper()} com {total_quadros} quadro(s): OCR em todas as páginas']
+        }
+        logging.info(f"OCR de imagem {input_file_path}: {total_quadros} quadro(s) {formato}")
+        _notificar_progresso(options, 'ocr', 0, total_quadros)
+        prazo = PrazoOCR(total_quadros, options.get('timeout'))
+
+        # Quadros com confiança baixa são refeitos com o perfil reforçado no próprio processo
+        reforco = (options.get('min_confidence', Config.OCR_RETRY_MIN_CONFIDENCE), _opcoes_reforco())
+        if motor == 'tesserocr':
+            processos = tesseract_pool.max_workers
+            enviar = lambda quadro: tesseract_pool.submeter_quadro(input_file_path, quadro, total_quadros, pasta_temp,
+                                                                   *reforco, prazo.limite())
+        else:
+            processos = options.get('jobs') or options.get('max_workers') or Config.OCR_MAX_WORKERS or os.cpu_count()
+            processos = max(1, min(processos or 1, total_quadros))
+            executor = PoolOCR(max_workers=processos)
+            enviar = lambda quadro: executor.submit(_ocr_quadro, input_file_path, quadro, total_quadros, pasta_temp,
+                                                    *reforco)
+        janela = processos * JANELA_POR_PROCESSO
+
+        montagem = MontagemPDF(pasta_temp)
+        page_timings = []
+        confiancas = {}
+        refeitos = []
+        concluidos = {}
+        proximo_envio = 0
+        proximo_juntar = 0
+        while proximo_juntar < total_quadros:
+            # Novos quadros só entram quando a janela tem espaço (quadros concluídos fora de ordem contam)
+            while proximo_envio < total_quadros and len(pendentes) + len(concluidos) < janela:
+                pendentes[enviar(proximo_envio)] = proximo_envio
+                proximo_envio += 1
+
+            prontos, _ = wait(pendentes, timeout=prazo.restante(), return_when=FIRST_COMPLETED)
+            if not prontos:
+                # Prazo esgotado: encerrar os quadros em andamento (e o Tesseract deles)
+                if executor is not None:
+                    encerrar_processos(executor)
+                else:
+                    # Pool compartilhado: só os quadros desta imagem saem da fila; os em
+                    # andamento param sozinhos no prazo e os de outros documentos continuam
+                    for futuro in pendentes:
+                        futuro.cancel()
+                raise prazo.erro(textos)
+            for futuro in prontos:
+                pendentes.pop(futuro)
+                resultado = futuro.result()
+                concluidos[resultado['page']] = resultado
+                textos[resultado['page']] = resultado['text']
+
+            while proximo_juntar in concluidos:
+                resultado = concluidos.pop(proximo_juntar)
+                montagem.adicionar(resultado['pdf'])
+                page_timings.append({'page': proximo_juntar + 1, 'seconds': round(resultado['seconds'], 3)})
+                confiancas[proximo_juntar] = resultado['confidence']
+                if resultado['retried']:
+                    refeitos.append(proximo_juntar + 1)
+                proximo_juntar += 1
+            _notificar_progresso(options, 'ocr', len(textos), total_quadros)
+
+        montagem.finalizar(output_file_path)
+        pages_text = [(textos[quadro] or '').strip() for quadro in range(total_quadros)]
+        page_confidence = [confiancas[quadro] for quadro in range(total_quadros)]
+        text = '\n'.join(pages_text).strip()
+        processing_time = time.time() - start_time
+
+        if cache_key and pages_text:
+            ocr_cache.put(cache_key, output_file_path, pages_text, {
+                'pages_processed': total_quadros,
+                'page_confidence': page_confidence
+            })
+
+        return {
+            'success': True,
+            'processing_time': processing_time,
+            'pages_processed': total_quadros,
+            'pages_ocr': total_quadros,
+            'pages_skipped': 0,
+            'pages_cached': 0,
+            'page_timings': page_timings,
+            'output_file': output_file_path,
+            'text': text,
+            'pages_text': pages_text,
+            'page_confidence': page_confidence,
+            'pages_retried': refeitos,
+            'cached': False,
+            'ocr_plan': plano,
+            'message': f'Imagem processada com sucesso em {processing_time:.2f} segundos ({total_quadros} páginas)'
+        }
+
+    except JobCancelledError:
+        raise
+    except OCRTimeoutError as e:
+        logging.error(f"OCR interrompido por tempo limite em {input_file_path}: {e}")
+        pages_text = [(e.page_texts.get(quadro) or '').strip() for quadro in range(total_quadros)]
+        paginas_pendentes = [quadro + 1 for quadro in range(total_quadros) if quadro not in e.page_texts]
+        ultima_pagina = paginas_pendentes[0] - 1 if paginas_pendentes else total_quadros
+        return {
+            'success': False,
+            'timed_out': True,
+            'error': f'Tempo limite do OCR excedido após a página {ultima_pagina} de {total_quadros} '
+                     f'({e.seconds:.0f}s)',
+            'timed_out_after_page': ultima_pagina,
+            'pages_pending': paginas_pendentes,
+            'pages_processed': total_quadros - len(paginas_pendentes),
+            'pages_text': pages_text,
+            'text': '\n'.join(pages_text).strip(),
+            'processing_time': time.time() - start_time
+        }
+    except BrokenProcessPool as e:
+        if executor is None:
+            # Um processo do motor residente morreu: recriar o pool no próximo uso
+            tesseract_pool.shutdown()
+        logging.error(f"Processo do OCR encerrado inesperadamente em {input_file_path}: {e}")
+        return {
+            'success': False,
+            'error': f'Erro no processamento OCR: {str(e)}',
+            'processing_time': time.time() - start_time
+        }
+    except Exception as e:
+        import traceback
+        logging.error(traceback.format_exc())
+        return {
+            'success': False,
+            'error': f'Erro no processamento OCR: {str(e)}',
+            'processing_time': time.time() - start_time
+        }
+    finally:
+        # Erro ou cancelamento: não iniciar os quadros que ainda estão na fila
+        for futuro in pendentes:
+            futuro.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if montagem is not None:
+            montagem.fechar()
+        shutil.rmtree(pasta_temp, ignore_errors=True)
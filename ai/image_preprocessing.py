@@ -0,0 +1,281 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+import re
+import math
+import logging
+from config import Config
+
+try:
+    import numpy as np
+    from PIL import Image
+    PREPROCESSING_AVAILABLE = True
+except ImportError:
+    PREPROCESSING_AVAILABLE = False
+    logging.warning("NumPy não está disponível. O pré-processamento das imagens do OCR não será usado.")
+
+# Janela da binarização adaptativa (pixels a 300 DPI, cerca de 2,5 mm) e quanto
+# um pixel precisa ser mais escuro que a média da janela para ser considerado tinta
+JANELA_LIMIAR = 31
+DESLOCAMENTO_LIMIAR = 10
+
+# Largura da amostra usada na estimativa da inclinação
+LARGURA_AMOSTRA_INCLINACAO = 1000
+
+# Resolução da amostra e número de faixas verticais usados na medição da altura das linhas
+DPI_AMOSTRA_LINHAS = 100
+FAIXAS_ALTURA_LINHAS = 8
+
+# Dimensões da página, título dos elementos, caixas e linhas de base no hOCR do Tesseract
+_HOCR_PAGINA = re.compile(r"class=['\"]ocr_page['\"][^>]*?bbox (\d+) (\d+) (\d+) (\d+)")
+_HOCR_TITULO = re.compile(r"title=(['\"])(.*?)\1", re.S)
+_HOCR_BBOX = re.compile(r'bbox (-?\d+) (-?\d+) (-?\d+) (-?\d+)')
+_HOCR_BASELINE = re.compile(r'baseline (-?[\d.]+) (-?\d+)')
+
+def _media_movel(valores, raio, eixo):
+    """Média em uma janela de 2*raio+1 pixels ao longo de um eixo (somas acumuladas)"""
+    n = valores.shape[eixo]
+    acumulado = np.cumsum(valores, axis=eixo, dtype=np.float32)
+    forma_zero = list(valores.shape)
+    forma_zero[eixo] = 1
+    acumulado = np.concatenate([np.zeros(forma_zero, dtype=np.float32), acumulado], axis=eixo)
+
+    posicoes = np.arange(n)
+    fim = np.minimum(posicoes + raio + 1, n)
+    inicio = np.maximum(posicoes - raio, 0)
+    forma = [1, 1]
+    forma[eixo] = n
+    soma = np.take(acumulado, fim, axis=eixo) - np.take(acumulado, inicio, axis=eixo)
+    return soma / (fim - inicio).astype(np.float32).reshape(forma)
+
+def limiar_adaptativo(cinza, janela=JANELA_LIMIAR, deslocamento=DESLOCAMENTO_LIMIAR):
+    """
+    Binarização pela média local: é tinta o pixel mais escuro que a média da
+    janela ao redor menos o deslocamento
+
+    Diferente de um limiar global, acompanha papel amarelado, manchas e
+    variações de iluminação da digitalização.
+
+    Args:
+        cinza: Imagem em tons de cinza (array uint8)
+
+    Returns:
+        np.ndarray: Máscara booleana, True onde há tinta
+    """
+    raio = janela // 2
+    media = _media_movel(_media_movel(cinza, raio, 0), raio, 1)
+    return cinza < media - deslocamento
+
+def estimar_inclinacao(tinta, angulo_maximo=None, passo=0.1):
+    """
+    Estima a inclinação do texto pelo perfil de projeção horizontal
+
+    Para cada ângulo candidato, os pixels de tinta são projetados nas linhas;
+    com o ângulo certo as linhas de texto se alinham e o perfil fica com picos
+    mais marcados (maior soma das diferenças ao quadrado entre linhas vizinhas).
+
+    Args:
+        tinta: Máscara booleana da página (ver limiar_adaptativo)
+        angulo_maximo: Maior inclinação considerada, em graus (padrão: Config.OCR_PREPROCESS_MAX_ANGLE)
+
+    Returns:
+        float: Ângulo em graus (positivo = texto descendo para a direita)
+    """
+    angulo_maximo = Config.OCR_PREPROCESS_MAX_ANGLE if angulo_maximo is None else angulo_maximo
+    fator = max(1, tinta.shape[1] // LARGURA_AMOSTRA_INCLINACAO)
+    amostra = tinta[::fator, ::fator]
+    linhas, colunas = np.nonzero(amostra)
+    if len(linhas) < 100:
+        # Página em branco ou quase: nada a endireitar
+        return 0.0
+
+    colunas = colunas - amostra.shape[1] / 2
+    melhor_angulo, melhor_pontuacao = 0.0, -1.0
+    for angulo in np.arange(-angulo_maximo, angulo_maximo + passo / 2, passo):
+        projecao = np.round(linhas - colunas * np.tan(np.radians(angulo))).astype(np.int64)
+        perfil = np.bincount(projecao - projecao.min()).astype(np.float64)
+        pontuacao = np.sum(np.diff(perfil) ** 2)
+        if pontuacao > melhor_pontuacao:
+            melhor_angulo, melhor_pontuacao = float(angulo), pontuacao
+    return round(melhor_angulo, 2)
+
+def remover_ruido(tinta, minimo_vizinhos=2):
+    """
+    Remove pontos isolados (poeira, granulado do papel)
+
+    Pixels de tinta com menos de minimo_vizinhos vizinhos de tinta (vizinhança
+    3x3) são apagados; traços de 1 pixel de espessura têm 2 vizinhos e ficam.
+    """
+    borda = np.pad(tinta, 1).astype(np.uint8)
+    altura, largura = tinta.shape
+    vizinhos = np.zeros(tinta.shape, dtype=np.uint8)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy != 1 or dx != 1:
+                vizinhos += borda[dy:dy + altura, dx:dx + largura]
+    return tinta & (vizinhos >= minimo_vizinhos)
+
+def estimar_altura_linhas(cinza, dpi):
+    """
+    Mede a altura típica das linhas de texto da página, em pixels
+
+    A página é reduzida para cerca de DPI_AMOSTRA_LINHAS e dividida em faixas
+    verticais estreitas (uma inclinação leve não junta linhas vizinhas); em
+    cada faixa, as sequências de linhas de pixels com tinta são as linhas de
+    texto. Retorna a mediana das alturas, na resolução original, ou None se a
+    página não tiver texto suficiente.
+    """
+    fator = max(1, int(dpi // DPI_AMOSTRA_LINHAS))
+    amostra = cinza[::fator, ::fator]
+    tinta = limiar_adaptativo(amostra, janela=15)
+
+    alturas = []
+    for faixa in np.array_split(tinta, FAIXAS_ALTURA_LINHAS, axis=1):
+        perfil = faixa.sum(axis=1) > max(1, faixa.shape[1] // 50)
+        bordas = np.diff(np.concatenate([[0], perfil.astype(np.int8), [0]]))
+        altura = np.nonzero(bordas == -1)[0] - np.nonzero(bordas == 1)[0]
+        alturas.extend(altura[altura >= 2])
+    if len(alturas) < 5:
+        return None
+    return float(np.median(alturas)) * fator
+
+def resolucao_alvo(dpi, altura_linhas=None, dpi_alvo=None):
+    """
+    Resolução para o OCR de uma página digitalizada a `dpi`
+
+    Reduz para `dpi_alvo` (padrão: Config.OCR_TARGET_DPI), mas não a ponto de
+    as linhas de texto ficarem menores que Config.OCR_MIN_LINE_HEIGHT pixels
+    (letras miúdas de carimbos e rodapés); nunca aumenta a resolução.
+    """
+    alvo = dpi_alvo or Config.OCR_TARGET_DPI
+    if altura_linhas:
+        alvo = max(alvo, dpi * Config.OCR_MIN_LINE_HEIGHT / altura_linhas)
+    return min(dpi, alvo)
+
+def ajustar_resolucao(imagem, dpi_alvo=None):
+    """
+    Converte para tons de cinza (Config.OCR_GRAYSCALE) e reduz a resolução da
+    página para o OCR (ver resolucao_alvo; `dpi_alvo` substitui Config.OCR_TARGET_DPI)
+
+    Digitalizações de 400 a 600 DPI coloridas têm muito mais pixels do que o
+    Tesseract precisa para texto legível. A proporção da imagem é mantida e
+    info['dpi'] é atualizado, para a camada de texto continuar alinhada.
+    """
+    if Config.OCR_GRAYSCALE and imagem.mode not in ('L', '1'):
+        imagem = imagem.convert('L')
+
+    dpi_x, dpi_y = imagem.info.get('dpi', (0, 0))
+    if not dpi_x or dpi_x <= (dpi_alvo or Config.OCR_TARGET_DPI):
+        return imagem
+
+    altura_linhas = estimar_altura_linhas(np.asarray(imagem.convert('L')), dpi_x)
+    escala = resolucao_alvo(dpi_x, altura_linhas, dpi_alvo) / dpi_x
+    if escala > 0.95:
+        return imagem
+
+    tamanho = (max(1, round(imagem.width * escala)), max(1, round(imagem.height * escala)))
+    logging.debug(f"Página reduzida de {dpi_x:.0f} para {dpi_x * escala:.0f} DPI para o OCR "
+                  f"(linhas de {altura_linhas or 0:.0f} pixels)")
+    # Imagens em preto e branco (modo '1') só são reduzidas por vizinho mais próximo
+    origem = imagem.convert('L') if imagem.mode == '1' else imagem
+    reduzida = origem.resize(tamanho, Image.LANCZOS, reducing_gap=3.0)
+    reduzida.info['dpi'] = (dpi_x * tamanho[0] / imagem.width, dpi_y * tamanho[1] / imagem.height)
+    return reduzida
+
+def preprocessar_pagina(imagem, deskew=None):
+    """
+    Prepara a imagem de uma página para o Tesseract: endireita, binariza e remove ruído
+
+    A imagem mantém as dimensões (a inclinação é corrigida girando em torno do
+    centro, sem expandir a página) e a resolução (info['dpi']). Só a imagem do
+    OCR é endireitada: a página visível do PDF continua como foi digitalizada,
+    e o ângulo fica em info['inclinacao'] para as coordenadas do hOCR voltarem
+    para ela (ver desfazer_inclinacao_hocr).
+
+    Args:
+        imagem: Página renderizada (PIL.Image)
+        deskew: Corrigir a inclinação (padrão: Config.OCR_PREPROCESS_DESKEW)
+
+    Returns:
+        PIL.Image: Página em preto e branco (modo 'L')
+    """
+    deskew = Config.OCR_PREPROCESS_DESKEW if deskew is None else deskew
+    cinza = imagem.convert('L')
+    tinta = limiar_adaptativo(np.asarray(cinza))
+
+    angulo = 0.0
+    if deskew:
+        angulo = estimar_inclinacao(tinta)
+        if angulo:
+            logging.debug(f"Inclinação corrigida: {angulo} graus")
+            cinza = cinza.rotate(angulo, resample=Image.BILINEAR, fillcolor=255)
+            tinta = limiar_adaptativo(np.asarray(cinza))
+
+    tinta = remover_ruido(tinta)
+    saida = Image.fromarray(np.where(tinta, 0, 255).astype(np.uint8), mode='L')
+    if 'dpi' in imagem.info:
+        saida.info['dpi'] = imagem.info['dpi']
+    saida.info['inclinacao'] = angulo
+    return saida
+
+def desfazer_inclinacao_hocr(hocr, angulo):
+    """
+    Leva as coordenadas do hOCR de uma imagem endireitada por preprocessar_pagina
+    (girada `angulo` graus em torno do centro) de volta para a página original,
+    que é a que aparece no PDF
+
+    Cada caixa passa a ser o menor retângulo que contém a caixa girada de volta,
+    e a linha de base ganha a inclinação do texto na página: é como o Tesseract
+    descreve as linhas de uma página inclinada, e a camada de texto gerada a
+    partir do hOCR (e guardada no cache por página) fica alinhada à página visível.
+    """
+    pagina = _HOCR_PAGINA.search(hocr or '')
+    if not angulo or not pagina:
+        return hocr
+    largura, altura = int(pagina.group(3)), int(pagina.group(4))
+    centro_x, centro_y = largura / 2, altura / 2
+    cosseno, seno = math.cos(math.radians(angulo)), math.sin(math.radians(angulo))
+
+    def voltar(x, y):
+        # Inverso de Image.rotate(angulo): giro no sentido horário (eixo y para baixo)
+        dx, dy = x - centro_x, y - centro_y
+        return centro_x + dx * cosseno - dy * seno, centro_y + dx * seno + dy * cosseno
+
+    def ajustar(titulo):
+        caixa = _HOCR_BBOX.search(titulo)
+        if not caixa:
+            return titulo
+        x0, y0, x1, y1 = map(int, caixa.groups())
+        if (x0, y0, x1, y1) == (0, 0, largura, altura):
+            # A própria página
+            return titulo
+        cantos = [voltar(x, y) for x in (x0, x1) for y in (y0, y1)]
+        novo_x0 = max(0, math.floor(min(x for x, _ in cantos)))
+        novo_y0 = max(0, math.floor(min(y for _, y in cantos)))
+        novo_x1 = min(largura, math.ceil(max(x for x, _ in cantos)))
+        novo_y1 = min(altura, math.ceil(max(y for _, y in cantos)))
+
+        linha_base = _HOCR_BASELINE.search(titulo)
+        if linha_base and x1 > x0:
+            # Dois pontos da linha de base (relativa ao canto inferior esquerdo da caixa)
+            inclinacao, deslocamento = float(linha_base.group(1)), int(linha_base.group(2))
+            inicio_x, inicio_y = voltar(x0, y1 + deslocamento)
+            fim_x, fim_y = voltar(x1, y1 + deslocamento + inclinacao * (x1 - x0))
+            nova_inclinacao = (fim_y - inicio_y) / (fim_x - inicio_x)
+            novo_deslocamento = round(inicio_y + nova_inclinacao * (novo_x0 - inicio_x) - novo_y1)
+            titulo = (titulo[:linha_base.start()] + f"baseline {nova_inclinacao:.3f} {novo_deslocamento}"
+                      + titulo[linha_base.end():])
+        return _HOCR_BBOX.sub(f"bbox {novo_x0} {novo_y0} {novo_x1} {novo_y1}", titulo, count=1)
+
+    return _HOCR_TITULO.sub(lambda m: f"title={m.group(1)}{ajustar(m.group(2))}{m.group(1)}", hocr)
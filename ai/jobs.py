@@ -0,0 +1,335 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from security import secure_manager
+
+# Estados de um job
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+
+STATUS_ATIVOS = (STATUS_QUEUED, STATUS_RUNNING)
+
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+class JobQueueFullError(Exception):
+    """A fila de jobs atingiu Config.JOB_MAX_PENDING"""
+
+class JobCancelledError(Exception):
+    """Levantada pelo callback de progresso quando o cliente cancela o job"""
+
+class JobManager:
+    """
+    Executa jobs de OCR/IA fora da thread da requisição
+
+    Os jobs rodam em um pool limitado de threads (o OCR em si já usa processos
+    próprios do ocrmypdf/Tesseract). O estado, o progresso e o resultado de cada
+    job são gravados em Config.JOB_DIRECTORY (criptografados, se
+    Config.ENCRYPT_TEMP_FILES) e mantidos até Config.MAX_FILE_AGE, para que o
+    resultado possa ser consultado depois, inclusive por outro processo do servidor.
+
+    A função de um job recebe como primeiro argumento um callback
+    progress(stage, current=None, total=None, message=None) e retorna
+    (payload, status HTTP), o mesmo que a rota síncrona responderia.
+
+    Depois de cancel(), a próxima chamada de progress() levanta
+    JobCancelledError, que a função deve deixar propagar. O trabalho que não
+    chama progress() por um tempo (o ocrmypdf, as faixas do OCR paralelo) é
+    registrado em interromper_ao_cancelar e interrompido na hora.
+    """
+
+    def __init__(self, directory=None, max_workers=None, max_pending=None):
+        self.directory = directory or Config.JOB_DIRECTORY
+        self.max_workers = max_workers or Config.JOB_MAX_WORKERS
+        self.max_pending = max_pending or Config.JOB_MAX_PENDING
+        self.lock = threading.Lock()
+        # Notificada a cada atualização de estado (usada pelo stream de eventos)
+        self.updated = threading.Condition(self.lock)
+        self.jobs = {}
+        self.cancelled = set()
+        # Funções que interrompem o trabalho em andamento de cada job (ver interromper_ao_cancelar)
+        self.interrupcoes = {}
+        # Job executado pela thread atual
+        self.local = threading.local()
+        self.executor = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _get_executor(self):
+        # Criado no primeiro uso: importar o módulo não inicia threads
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+            return self.executor
+
+    def submit(self, kind, func, *args, **kwargs):
+        """
+        Enfileira um job
+
+        Args:
+            kind: Tipo do job (ex.: 'ocr', 'certidao-data')
+            func: Função executada no pool, chamada como func(progress, *args, **kwargs)
+
+        Returns:
+            str: Identificador do job
+
+        Raises:
+            JobQueueFullError: Se já houver Config.JOB_MAX_PENDING jobs pendentes
+        """
+        self.cleanup_expired()
+
+        with self.lock:
+            pendentes = sum(1 for job in self.jobs.values() if job['status'] in STATUS_ATIVOS)
+            if pendentes >= self.max_pending:
+                raise JobQueueFullError(f'{pendentes} jobs pendentes; tente novamente em instantes')
+
+            agora = time.time()
+            job = {
+                'job_id': uuid.uuid4().hex,
+                'kind': kind,
+                'status': STATUS_QUEUED,
+                'progress': {'stage': STATUS_QUEUED, 'current': None, 'total': None, 'message': None},
+                'created_at': agora,
+                'updated_at': agora,
+                'started_at': None,
+                'finished_at': None,
+                'http_status': None,
+                'result': None,
+                'error': None
+            }
+            self.jobs[job['job_id']] = job
+
+        self._salvar(job)
+        self._get_executor().submit(self._executar, job['job_id'], func, args, kwargs)
+        logging.info(f"Job {job['job_id']} ({kind}) enfileirado")
+        return job['job_id']
+
+    def _executar(self, job_id, func, args, kwargs):
+        def progress(stage, current=None, total=None, message=None):
+            if job_id in self.cancelled:
+                raise JobCancelledError(job_id)
+            self._atualizar(job_id, progress={
+                'stage': stage, 'current': current, 'total': total, 'message': message
+            })
+
+        self.local.job_id = job_id
+        try:
+            if job_id in self.cancelled:
+                # Cancelado ainda na fila
+                raise JobCancelledError(job_id)
+            self._atualizar(job_id, status=STATUS_RUNNING, started_at=time.time())
+            payload, http_status = func(progress, *args, **kwargs)
+            status = STATUS_COMPLETED if http_status < 400 else STATUS_FAILED
+            error = payload.get('error') if isinstance(payload, dict) else None
+        except JobCancelledError:
+            payload, http_status = {'error': 'Processamento cancelado pelo usuário'}, 409
+            status, error = STATUS_CANCELLED, payload['error']
+        except Exception as e:
+            logging.exception(f"Erro no job {job_id}")
+            payload, http_status = {'error': f'Erro interno: {str(e)}'}, 500
+            status, error = STATUS_FAILED, payload['error']
+        finally:
+            self.local.job_id = None
+
+        self._atualizar(job_id, status=status, http_status=http_status, result=payload,
+                        error=error, finished_at=time.time())
+        # Jobs finalizados ficam apenas em disco
+        with self.lock:
+            self.jobs.pop(job_id, None)
+            self.cancelled.discard(job_id)
+            self.updated.notify_all()
+        logging.info(f"Job {job_id} finalizado: {status}")
+
+    def _atualizar(self, job_id, **campos):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            job.update(campos)
+            job['updated_at'] = time.time()
+            copia = dict(job)
+        self._salvar(copia)
+        with self.lock:
+            self.updated.notify_all()
+
+    def get(self, job_id):
+        """
+        Retorna o job completo (inclusive o resultado), ou None se não existir ou já expirou
+        """
+        if not _JOB_ID.match(job_id or ''):
+            return None
+
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+
+        job = self._carregar(job_id)
+        if job is None:
+            return None
+        if time.time() - job['created_at'] > Config.MAX_FILE_AGE.total_seconds():
+            self._remover(job_id)
+            return None
+        if job['status'] in STATUS_ATIVOS:
+            # Pendente em disco, mas sem execução neste processo: o servidor foi reiniciado
+            job.update(status=STATUS_FAILED, http_status=500,
+                       error='Processamento interrompido (servidor reiniciado)',
+                       result={'error': 'Processamento interrompido (servidor reiniciado)'})
+        return job
+
+    def cancel(self, job_id):
+        """
+        Pede o cancelamento de um job na fila ou em execução
+
+        Returns:
+            bool: True se o job estava ativo neste processo
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job['status'] not in STATUS_ATIVOS:
+                return False
+            self.cancelled.add(job_id)
+            interrupcoes = list(self.interrupcoes.get(job_id, ()))
+        logging.info(f"Cancelamento do job {job_id} solicitado")
+        for interromper in interrupcoes:
+            try:
+                interromper()
+            except Exception as e:
+                logging.warning(f"Erro ao interromper o job {job_id}: {e}")
+        return True
+
+    @contextmanager
+    def interromper_ao_cancelar(self, interromper):
+        """
+        Enquanto o bloco executa, cancel() do job da thread atual chama
+        interromper() (ex.: encerrar os processos do OCR); fora de um job não faz nada
+
+        Se o job já foi cancelado, interromper() é chamada ao entrar no bloco.
+        O erro que a interrupção provocar no bloco deve ser trocado por
+        JobCancelledError com verificar_cancelamento().
+        """
+        job_id = getattr(self.local, 'job_id', None)
+        if job_id is None:
+            yield
+            return
+        with self.lock:
+            self.interrupcoes.setdefault(job_id, []).append(interromper)
+            cancelado = job_id in self.cancelled
+        try:
+            if cancelado:
+                interromper()
+            yield
+        finally:
+            with self.lock:
+                interrupcoes = self.interrupcoes.get(job_id, [])
+                interrupcoes.remove(interromper)
+                if not interrupcoes:
+                    self.interrupcoes.pop(job_id, None)
+
+    def em_job(self):
+        """True se a thread atual executa um job (o trabalho dela pode ser cancelado)"""
+        return getattr(self.local, 'job_id', None) is not None
+
+    def verificar_cancelamento(self):
+        """Levanta JobCancelledError se o job da thread atual foi cancelado"""
+        job_id = getattr(self.local, 'job_id', None)
+        if job_id is not None and job_id in self.cancelled:
+            raise JobCancelledError(job_id)
+
+    def wait_for_update(self, job_id, since, timeout):
+        """
+        Aguarda até o job ser atualizado depois de `since` (updated_at) ou o tempo acabar
+
+        Jobs de outro processo do servidor não notificam este processo; nesse
+        caso a espera é de no máximo 1 segundo e o estado é relido do disco.
+        """
+        with self.lock:
+            if job_id in self.jobs:
+                self.updated.wait_for(
+                    lambda: job_id not in self.jobs or self.jobs[job_id]['updated_at'] > since,
+                    timeout=timeout
+                )
+                return
+        time.sleep(min(timeout, 1))
+
+    def status(self, job_id):
+        """Retorna o estado e o progresso do job, sem o resultado"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.pop('result', None)
+        return job
+
+    def cleanup_expired(self):
+        """Remove os jobs finalizados mais antigos que Config.MAX_FILE_AGE"""
+        limite = time.time() - Config.MAX_FILE_AGE.total_seconds()
+        try:
+            for filename in os.listdir(self.directory):
+                path = os.path.join(self.directory, filename)
+                if filename.endswith('.job') and os.path.getmtime(path) < limite:
+                    with self.lock:
+                        if filename[:-len('.job')] in self.jobs:
+                            continue
+                    secure_manager.secure_delete(path)
+        except Exception as e:
+            logging.error(f"Erro na limpeza de jobs expirados: {e}")
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, f'{job_id}.job')
+
+    def _salvar(self, job):
+        dados = json.dumps(job, ensure_ascii=False, default=str).encode('utf-8')
+        if Config.ENCRYPT_TEMP_FILES:
+            dados = secure_manager.fernet.encrypt(dados)
+        path = self._path(job['job_id'])
+        try:
+            # Gravar em arquivo temporário e renomear para não expor estados incompletos
+            with open(path + '.tmp', 'wb') as f:
+                f.write(dados)
+            os.replace(path + '.tmp', path)
+        except Exception as e:
+            logging.error(f"Erro ao gravar o job {job['job_id']}: {e}")
+
+    def _carregar(self, job_id):
+        path = self._path(job_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                dados = f.read()
+            if Config.ENCRYPT_TEMP_FILES:
+                dados = secure_manager.fernet.decrypt(dados)
+            return json.loads(dados.decode('utf-8'))
+        except Exception as e:
+            logging.warning(f"Job {job_id} inválido: {e}")
+            return None
+
+    def _remover(self, job_id):
+        path = self._path(job_id)
+        if os.path.exists(path):
+            secure_manager.secure_delete(path)
+
+# Instância global do gerenciador de jobs
+job_manager = JobManager()
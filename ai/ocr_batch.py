@@ -0,0 +1,262 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from config import Config
+
+# Situação de cada arquivo no manifesto
+STATUS_DONE = 'done'          # OCR aplicado
+STATUS_SKIPPED = 'skipped'    # Todas as páginas já tinham texto: PDF copiado sem OCR
+STATUS_FAILED = 'failed'
+
+def hash_arquivo(caminho):
+    """SHA-256 do conteúdo do arquivo (identifica o PDF no manifesto, mesmo se renomeado)"""
+    digest = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+def carregar_manifesto(caminho_manifesto):
+    """Lê o manifesto de um lote anterior ({hash: situação do arquivo})"""
+    if not os.path.exists(caminho_manifesto):
+        return {}
+    try:
+        with open(caminho_manifesto, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.warning(f"Manifesto de OCR em lote inválido, começando do zero: {e}")
+        return {}
+
+def salvar_manifesto(caminho_manifesto, manifesto):
+    """Grava o manifesto de forma atômica (um lote interrompido não corrompe o arquivo)"""
+    with open(caminho_manifesto + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(caminho_manifesto + '.tmp', caminho_manifesto)
+
+def _iniciar_processo_lote():
+    """Inicializador dos processos do lote: o Tesseract residente também usa um único processo"""
+    from ai.tesseract_pool import tesseract_pool
+    tesseract_pool.max_workers = 1
+
+def _processar_arquivo(caminho_pdf, caminho_saida):
+    """
+    Aplica OCR em um arquivo do lote (executado nos processos do pool)
+
+    Erros são capturados e devolvidos no resultado: um PDF com problema
+    não interrompe o lote.
+    """
+    from ai.ocr_service import process_pdf_with_ocr
+
+    inicio = time.time()
+    try:
+        # O paralelismo do lote é por arquivo: um Tesseract por arquivo em andamento (com os
+        # núcleos da máquina em cada um seriam núcleos² processos). O cache de OCR não é usado
+        # para não descartar os resultados das requisições da aplicação
+        resultado = process_pdf_with_ocr(caminho_pdf, caminho_saida,
+                                         {'parallel': False, 'use_cache': False, 'jobs': 1})
+    except Exception as e:
+        resultado = {'success': False, 'error': str(e)}
+
+    if not resultado.get('success'):
+        return {
+            'status': STATUS_FAILED,
+            'error': resultado.get('error', 'Erro desconhecido'),
+            'seconds': round(time.time() - inicio, 3)
+        }
+
+    plano = resultado.get('ocr_plan') or {}
+    return {
+        'status': STATUS_SKIPPED if plano.get('strategy') == 'skip' else STATUS_DONE,
+        'pages': resultado.get('pages_processed', 0),
+        'pages_ocr': resultado.get('pages_ocr', 0),
+        'seconds': round(time.time() - inicio, 3),
+        'error': None
+    }
+
+def processar_lote(diretorio_pdf, diretorio_saida, max_workers=None, caminho_manifesto=None,
+                   caminho_relatorio=None, reprocessar_falhas=False):
+    """
+    Aplica OCR em todos os PDFs e imagens (JPEG, PNG, TIFF) de um diretório, em paralelo e de forma retomável
+
+    Cada arquivo é identificado pelo SHA-256 do conteúdo no manifesto
+    (Config.OCR_BATCH_MANIFEST, no diretório de saída), atualizado a cada
+    arquivo concluído. Ao rodar de novo, os arquivos já processados são
+    pulados; os que falharam só são refeitos com reprocessar_falhas=True.
+
+    Args:
+        diretorio_pdf: Diretório com os PDFs e imagens
+        diretorio_saida: Diretório dos PDFs pesquisáveis (ocr_<nome>.pdf; imagens com a extensão trocada por .pdf)
+        max_workers: Processos do pool (padrão: Config.OCR_BATCH_MAX_WORKERS ou núcleos da máquina)
+        caminho_manifesto: Caminho do manifesto (padrão: <saida>/Config.OCR_BATCH_MANIFEST)
+        caminho_relatorio: Caminho do relatório JSON (padrão: <saida>/ocr_lote_<data>.json)
+        reprocessar_falhas: Refazer os arquivos que falharam em lotes anteriores
+
+    Returns:
+        dict: Resumo do lote (contagens, tempos e situação de cada arquivo)
+    """
+    from ai.image_ocr import nome_saida_pdf
+
+    os.makedirs(diretorio_saida, exist_ok=True)
+    caminho_manifesto = caminho_manifesto or os.path.join(diretorio_saida, Config.OCR_BATCH_MANIFEST)
+    caminho_relatorio = caminho_relatorio or os.path.join(
+        diretorio_saida, f"ocr_lote_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    max_workers = max_workers or Config.OCR_BATCH_MAX_WORKERS or os.cpu_count() or 1
+    manifesto = carregar_manifesto(caminho_manifesto)
+
+    inicio = time.time()
+    iniciado_em = datetime.now().isoformat()
+    arquivos = []
+    pendentes = {}      # hash -> arquivo a processar neste lote
+    duplicados = []     # arquivos com o mesmo conteúdo de um arquivo pendente
+
+    for nome_arquivo in sorted(os.listdir(diretorio_pdf)):
+        if nome_arquivo.rsplit('.', 1)[-1].lower() not in Config.ALLOWED_EXTENSIONS:
+            continue
+        caminho_pdf = os.path.join(diretorio_pdf, nome_arquivo)
+        arquivo = {
+            'file': nome_arquivo,
+            'input': caminho_pdf,
+            'output': os.path.join(diretorio_saida, f"ocr_{nome_saida_pdf(nome_arquivo)}")
+        }
+        arquivos.append(arquivo)
+        try:
+            arquivo['hash'] = hash_arquivo(caminho_pdf)
+        except OSError as e:
+            arquivo.update(hash=None, status=STATUS_FAILED, error=f'Erro ao ler o arquivo: {e}', seconds=0)
+            continue
+
+        anterior = manifesto.get(arquivo['hash'])
+        if anterior and anterior['status'] in (STATUS_DONE, STATUS_SKIPPED) and os.path.exists(anterior['output']):
+            # Já processado em um lote anterior (talvez com outro nome)
+            if os.path.abspath(anterior['output']) != os.path.abspath(arquivo['output']):
+                shutil.copyfile(anterior['output'], arquivo['output'])
+            arquivo.update(status='already_done', seconds=0)
+        elif anterior and anterior['status'] == STATUS_FAILED and not reprocessar_falhas:
+            arquivo.update(status='previously_failed', error=anterior.get('error'), seconds=0)
+        elif arquivo['hash'] in pendentes:
+            duplicados.append(arquivo)
+        else:
+            pendentes[arquivo['hash']] = arquivo
+
+    print(f"🚀 OCR em lote: {len(arquivos)} PDFs, {len(pendentes)} a processar com {max_workers} processos")
+    interrompido = False
+    if pendentes:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(pendentes)),
+                                 initializer=_iniciar_processo_lote) as executor:
+            future_to_arquivo = {
+                executor.submit(_processar_arquivo, arquivo['input'], arquivo['output']): arquivo
+                for arquivo in pendentes.values()
+            }
+            for future in as_completed(future_to_arquivo):
+                arquivo = future_to_arquivo[future]
+                try:
+                    arquivo.update(future.result())
+                except BrokenProcessPool as e:
+                    # Um processo morreu (ex.: falta de memória): os arquivos restantes
+                    # ficam fora do manifesto e serão processados no próximo lote
+                    logging.error(f"Pool do OCR em lote interrompido em {arquivo['file']}: {e}")
+                    arquivo.update(status='interrupted', error=str(e), seconds=0)
+                    interrompido = True
+                    continue
+
+                manifesto[arquivo['hash']] = {
+                    'status': arquivo['status'],
+                    'file': arquivo['file'],
+                    'output': arquivo['output'],
+                    'pages': arquivo.get('pages', 0),
+                    'seconds': arquivo['seconds'],
+                    'error': arquivo.get('error'),
+                    'updated_at': datetime.now().isoformat()
+                }
+                salvar_manifesto(caminho_manifesto, manifesto)
+                icone = '❌' if arquivo['status'] == STATUS_FAILED else '✅'
+                print(f"{icone} {arquivo['file']}: {arquivo['status']} em {arquivo['seconds']:.2f}s"
+                      + (f" - {arquivo['error']}" if arquivo.get('error') else ''))
+
+    # Arquivos repetidos no mesmo lote reaproveitam a saída do primeiro
+    for arquivo in duplicados:
+        original = pendentes[arquivo['hash']]
+        if original.get('status') in (STATUS_DONE, STATUS_SKIPPED):
+            shutil.copyfile(original['output'], arquivo['output'])
+            arquivo.update(status='duplicate', duplicate_of=original['file'], seconds=0)
+        else:
+            arquivo.update(status=original.get('status', 'interrupted'), duplicate_of=original['file'],
+                           error=original.get('error'), seconds=0)
+
+    contagem = {}
+    for arquivo in arquivos:
+        contagem[arquivo['status']] = contagem.get(arquivo['status'], 0) + 1
+    tempos = [a['seconds'] for a in arquivos if a['status'] in (STATUS_DONE, STATUS_SKIPPED, STATUS_FAILED)
+              and a['seconds']]
+
+    resumo = {
+        'input_directory': diretorio_pdf,
+        'output_directory': diretorio_saida,
+        'manifest': caminho_manifesto,
+        'started_at': iniciado_em,
+        'finished_at': datetime.now().isoformat(),
+        'elapsed_seconds': round(time.time() - inicio, 3),
+        'workers': max_workers,
+        'interrupted': interrompido,
+        'total_files': len(arquivos),
+        'counts': contagem,
+        'pages': sum(a.get('pages', 0) for a in arquivos if a['status'] in (STATUS_DONE, STATUS_SKIPPED)),
+        'seconds_per_file_avg': round(sum(tempos) / len(tempos), 3) if tempos else 0,
+        'seconds_per_file_max': max(tempos) if tempos else 0,
+        'files': [
+            {chave: valor for chave, valor in arquivo.items() if chave != 'input'}
+            for arquivo in arquivos
+        ]
+    }
+
+    with open(caminho_relatorio, 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+    resumo['report'] = caminho_relatorio
+
+    print(f"📊 Lote concluído em {resumo['elapsed_seconds']:.2f}s: {contagem}")
+    print(f"📁 Relatório salvo em: {caminho_relatorio}")
+    return resumo
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica OCR em todos os PDFs e imagens de um diretório (em paralelo e retomável).")
+    parser.add_argument('entrada', help='Diretório com os PDFs e imagens (JPEG, PNG, TIFF)')
+    parser.add_argument('saida', help='Diretório dos PDFs pesquisáveis')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Número de processos (padrão: núcleos da máquina)')
+    parser.add_argument('-m', '--manifest', default=None, help='Caminho do manifesto (padrão: no diretório de saída)')
+    parser.add_argument('-r', '--report', default=None, help='Caminho do relatório JSON')
+    parser.add_argument('--retry-failed', action='store_true', help='Reprocessar os arquivos que falharam em lotes anteriores')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.entrada):
+        print(f"Diretório não encontrado: {args.entrada}")
+        sys.exit(1)
+
+    resumo = processar_lote(args.entrada, args.saida, args.workers, args.manifest, args.report, args.retry_failed)
+    if resumo['counts'].get(STATUS_FAILED) or resumo['interrupted']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
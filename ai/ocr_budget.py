@@ -0,0 +1,188 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# Tempo máximo do OCR de um documento
+#
+# O OCR roda em processos (pool do OCR paralelo, Tesseract residente ou um
+# processo próprio para o ocrmypdf com prazo): quando o prazo acaba, esses
+# processos e os que eles criaram (Tesseract, Ghostscript) são encerrados à
+# força e OCRTimeoutError leva o texto das páginas já reconhecidas. O
+# cancelamento de um job (ai.jobs) encerra os mesmos processos na hora.
+
+import os
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+from queue import Empty
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from config import Config
+from ai.jobs import job_manager
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+    # Erros de um processo que já terminou
+    PROCESSO_ENCERRADO = (ProcessLookupError, psutil.NoSuchProcess)
+except ImportError:
+    # Sem psutil só os processos do pool são encerrados; o Tesseract
+    # iniciado por eles termina sozinho em Config.OCR_PAGE_TIMEOUT
+    PSUTIL_AVAILABLE = False
+    PROCESSO_ENCERRADO = (ProcessLookupError,)
+
+class OCRTimeoutError(Exception):
+    """O OCR do documento excedeu o prazo (ver PrazoOCR)"""
+
+    def __init__(self, segundos, textos=None):
+        self.seconds = segundos
+        # Texto das páginas reconhecidas antes do fim do prazo ({índice (base 0): texto})
+        self.page_texts = dict(textos or {})
+        super().__init__(f"Tempo limite do OCR excedido ({segundos:.0f}s)")
+
+class PrazoOCR:
+    """
+    Prazo do OCR de um documento
+
+    Sem `segundos`, o limite é o menor entre Config.OCR_DOCUMENT_TIMEOUT e
+    Config.OCR_PAGE_TIMEOUT vezes o número de páginas com OCR; None (ou 0)
+    nas duas configurações, ou segundos=0, desliga o prazo.
+    """
+
+    def __init__(self, paginas=None, segundos=None):
+        if segundos is None:
+            limites = [Config.OCR_DOCUMENT_TIMEOUT]
+            if Config.OCR_PAGE_TIMEOUT and paginas:
+                limites.append(Config.OCR_PAGE_TIMEOUT * paginas)
+            limites = [limite for limite in limites if limite]
+            segundos = min(limites) if limites else None
+        self.segundos = segundos or None
+        self.inicio = time.monotonic()
+
+    def restante(self):
+        """Segundos até o fim do prazo (None = sem prazo)"""
+        if self.segundos is None:
+            return None
+        return max(0.0, self.segundos - (time.monotonic() - self.inicio))
+
+    def limite(self):
+        """Fim do prazo em time.time() (None = sem prazo), para os processos do OCR pararem sozinhos"""
+        restante = self.restante()
+        return None if restante is None else time.time() + restante
+
+    def erro(self, textos=None):
+        return OCRTimeoutError(self.segundos, textos)
+
+def _informar_pid(fila):
+    """Inicialização dos processos do PoolOCR: informa o PID ao processo principal"""
+    fila.put(os.getpid())
+
+class PoolOCR(ProcessPoolExecutor):
+    """
+    ProcessPoolExecutor cujos processos informam o próprio PID ao iniciar,
+    para encerrar_processos saber quem encerrar
+    """
+
+    def __init__(self, max_workers=None):
+        contexto = multiprocessing.get_context()
+        self.fila_pids = contexto.Queue()
+        self.pids = set()
+        self.lock_pids = threading.Lock()
+        super().__init__(max_workers=max_workers, mp_context=contexto,
+                         initializer=_informar_pid, initargs=(self.fila_pids,))
+
+    def processos(self, espera=0):
+        """
+        PIDs dos processos iniciados até agora
+
+        Args:
+            espera: Segundos a esperar pelo primeiro PID, se nenhum processo
+                tiver informado ainda (tarefa enviada há pouco)
+        """
+        with self.lock_pids:
+            try:
+                if not self.pids and espera:
+                    self.pids.add(self.fila_pids.get(timeout=espera))
+                while True:
+                    self.pids.add(self.fila_pids.get_nowait())
+            except Empty:
+                pass
+            return set(self.pids)
+
+def encerrar_processos(executor, motivo='tempo limite'):
+    """
+    Encerra à força os processos de um PoolOCR e os processos criados por
+    eles; o executor não aceita mais tarefas
+
+    Um processo que ainda não informou o PID é encerrado pelo próprio
+    executor: com um processo do pool morto, ele encerra os demais.
+    """
+    pids = executor.processos(espera=1)
+    filhos = []
+    if PSUTIL_AVAILABLE:
+        # Filhos de todos os processos antes de encerrar qualquer um: com um processo do pool
+        # morto, o executor encerra os demais e os filhos deles não são mais encontrados
+        for pid in pids:
+            try:
+                filhos.extend(psutil.Process(pid).children(recursive=True))
+            except PROCESSO_ENCERRADO:
+                pass
+    for processo in filhos:
+        try:
+            processo.kill()
+        except PROCESSO_ENCERRADO:
+            pass
+    for pid in pids:
+        try:
+            os.kill(pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        except PROCESSO_ENCERRADO:
+            pass
+        except Exception as e:
+            logging.warning(f"Não foi possível encerrar o processo {pid} do OCR: {e}")
+    executor.shutdown(wait=False, cancel_futures=True)
+    if pids:
+        logging.warning(f"{len(pids)} processos do OCR encerrados por {motivo}")
+
+def executar_com_prazo(prazo, funcao, *args, **kwargs):
+    """
+    Executa funcao(*args, **kwargs) em um processo próprio, encerrado se o
+    prazo acabar ou se o job da thread atual for cancelado
+
+    Sem prazo (PrazoOCR sem limite ou None), a função roda no processo atual,
+    sem o custo de iniciar um processo a cada chamada; o cancelamento do job
+    fica a cargo da própria função (no ocrmypdf, a cada página concluída; ver
+    ai.ocrmypdf_plugin).
+
+    Raises:
+        OCRTimeoutError: O prazo acabou antes do fim da função
+        JobCancelledError: O job foi cancelado
+    """
+    restante = prazo.restante() if prazo else None
+    if restante is None:
+        return funcao(*args, **kwargs)
+    if restante <= 0:
+        raise prazo.erro()
+
+    executor = PoolOCR(max_workers=1)
+    try:
+        with job_manager.interromper_ao_cancelar(lambda: encerrar_processos(executor, 'cancelamento do job')):
+            return executor.submit(funcao, *args, **kwargs).result(timeout=restante)
+    except FuturesTimeoutError:
+        encerrar_processos(executor)
+        raise prazo.erro()
+    except Exception:
+        job_manager.verificar_cancelamento()
+        raise
+    finally:
+        executor.shutdown(wait=False)
@@ -0,0 +1,201 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+import time
+from config import Config
+from security import secure_manager
+
+# Separador de páginas no arquivo de texto das entradas
+PAGE_SEPARATOR = '\f'
+
+class OCRCache:
+    """
+    Cache de resultados de OCR endereçado pelo conteúdo do arquivo
+
+    Cada entrada é identificada pelo SHA-256 dos bytes enviados mais as
+    configurações do OCR, e guarda o PDF pesquisável e o texto extraído
+    (páginas separadas por form feed, como no sidecar do ocrmypdf).
+    O tamanho total é limitado e as entradas menos usadas são removidas
+    primeiro (LRU). Entradas mais antigas que Config.MAX_FILE_AGE também
+    são removidas, respeitando a política de retenção de arquivos. Com
+    Config.ENCRYPT_TEMP_FILES, os arquivos das entradas são cifrados com a
+    chave do servidor, como os demais arquivos temporários.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or Config.OCR_CACHE_DIRECTORY
+        self.max_bytes = max_bytes if max_bytes is not None else Config.OCR_CACHE_MAX_BYTES
+        self.lock = threading.Lock()
+        # Última remoção de entradas expiradas (0 = ainda não feita; ver _preparar)
+        self.ultima_limpeza = 0
+
+    def make_key(self, file_path, settings=None):
+        """Gera a chave do cache a partir do conteúdo do arquivo e das configurações do OCR"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(bloco)
+        digest.update(json.dumps(settings or {}, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return {
+            'pdf': base + '.pdf',
+            'text': base + '.txt',
+            'meta': base + '.json'
+        }
+
+    def get(self, key, destino):
+        """
+        Busca uma entrada no cache e copia o PDF pesquisável para `destino`
+
+        A cópia é feita com o lock do cache: um put() ou uma remoção (LRU,
+        expiração) em andamento não apaga o PDF antes de ele ser copiado. Se o
+        PDF já tiver sido removido (por exemplo, por outro processo do
+        servidor), a busca conta como ausência no cache.
+
+        Returns:
+            dict: Caminho do PDF copiado, texto completo, texto por página e
+                metadados, ou None se não estiver em cache
+        """
+        paths = self._paths(key)
+        with self.lock:
+            self._preparar()
+            if not all(os.path.exists(p) for p in paths.values()):
+                return None
+            try:
+                meta = json.loads(self._ler(paths['meta']).decode('utf-8'))
+                if self._expirado(meta):
+                    self._remover(key)
+                    return None
+                pages_text = self._ler(paths['text']).decode('utf-8').split(PAGE_SEPARATOR)
+                pdf = self._ler(paths['pdf'])
+            except FileNotFoundError:
+                logging.info(f"Entrada de cache OCR removida durante a leitura: {key[:12]}")
+                return None
+            except Exception as e:
+                logging.warning(f"Entrada de cache OCR inválida {key}: {e}")
+                self._remover(key)
+                return None
+            with open(destino, 'wb') as f:
+                f.write(pdf)
+            # Marcar a entrada como usada recentemente (LRU)
+            os.utime(paths['meta'], None)
+
+        logging.info(f"Resultado de OCR encontrado em cache: {key[:12]}")
+        return {
+            'pdf_path': destino,
+            'text': '\n'.join(pages_text).strip(),
+            'pages_text': pages_text,
+            'meta': meta
+        }
+
+    def put(self, key, pdf_path, pages_text, meta=None):
+        """Armazena o PDF pesquisável e o texto extraído de cada página no cache"""
+        if self.max_bytes <= 0:
+            return False
+
+        paths = self._paths(key)
+        meta = dict(meta or {})
+        meta['created_at'] = time.time()
+
+        try:
+            with open(pdf_path, 'rb') as f:
+                pdf = f.read()
+            with self.lock:
+                self._preparar()
+                # Gravar em arquivos temporários e renomear para não expor entradas incompletas
+                self._gravar(paths['pdf'] + '.tmp', pdf)
+                self._gravar(paths['text'] + '.tmp', PAGE_SEPARATOR.join(pages_text).encode('utf-8'))
+                self._gravar(paths['meta'] + '.tmp', json.dumps(meta).encode('utf-8'))
+                for p in ('pdf', 'text', 'meta'):
+                    os.replace(paths[p] + '.tmp', paths[p])
+
+                self._evict()
+            return True
+        except Exception as e:
+            logging.error(f"Erro ao gravar resultado de OCR no cache: {e}")
+            return False
+
+    def _ler(self, path):
+        with open(path, 'rb') as f:
+            dados = f.read()
+        if Config.ENCRYPT_TEMP_FILES:
+            dados = secure_manager.fernet.decrypt(dados)
+        return dados
+
+    def _gravar(self, path, dados):
+        if Config.ENCRYPT_TEMP_FILES:
+            dados = secure_manager.fernet.encrypt(dados)
+        with open(path, 'wb') as f:
+            f.write(dados)
+
+    def _preparar(self):
+        """
+        Cria a pasta do cache no primeiro uso e remove as entradas expiradas
+        ou excedentes na primeira busca e a cada Config.CLEANUP_INTERVAL, mesmo
+        sem novos put() (chamado com o lock)
+        """
+        agora = time.time()
+        if agora - self.ultima_limpeza < Config.CLEANUP_INTERVAL.total_seconds():
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._evict()
+        self.ultima_limpeza = agora
+
+    def _expirado(self, meta):
+        return time.time() - meta.get('created_at', 0) > Config.MAX_FILE_AGE.total_seconds()
+
+    def _remover(self, key):
+        for path in self._paths(key).values():
+            if os.path.exists(path):
+                secure_manager.secure_delete(path)
+
+    def _evict(self):
+        """Remove entradas expiradas e, se necessário, as menos usadas até caber no limite"""
+        entradas = []
+        total_bytes = 0
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            key = filename[:-len('.json')]
+            paths = self._paths(key)
+            try:
+                meta = json.loads(self._ler(paths['meta']).decode('utf-8'))
+                if self._expirado(meta):
+                    self._remover(key)
+                    continue
+                tamanho = sum(os.path.getsize(p) for p in paths.values() if os.path.exists(p))
+                entradas.append((os.path.getmtime(paths['meta']), key, tamanho))
+                total_bytes += tamanho
+            except Exception:
+                self._remover(key)
+
+        # Menos usadas primeiro
+        entradas.sort()
+        for _, key, tamanho in entradas:
+            if total_bytes <= self.max_bytes:
+                break
+            self._remover(key)
+            total_bytes -= tamanho
+            logging.info(f"Entrada removida do cache OCR (LRU): {key[:12]}")
+
+# Instância global do cache de OCR
+ocr_cache = OCRCache()
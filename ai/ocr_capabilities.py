@@ -0,0 +1,99 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# Detecção das dependências do OCR
+#
+# Cada verificação roda na primeira vez em que é usada e o resultado fica em
+# cache no processo: importar os módulos do OCR não executa o Tesseract nem
+# carrega o ocrmypdf, e um Tesseract ausente não atrasa a inicialização do app.
+
+import logging
+import subprocess
+from functools import lru_cache
+from config import Config
+
+@lru_cache(maxsize=None)
+def ocrmypdf_version():
+    """Versão do ocrmypdf, ou None se não estiver disponível"""
+    try:
+        import ocrmypdf
+        logging.info(f"ocrmypdf disponível - versão: {ocrmypdf.__version__}")
+        return ocrmypdf.__version__
+    except Exception as e:
+        logging.warning(f"ocrmypdf não está disponível. OCR não funcionará. Erro: {e}")
+        return None
+
+@lru_cache(maxsize=None)
+def tesseract_version():
+    """Versão do executável do Tesseract, ou None se não for encontrado"""
+    try:
+        result = subprocess.run(['tesseract', '--version'], capture_output=True, text=True,
+                                timeout=Config.OCR_PROBE_TIMEOUT)
+        if result.returncode == 0:
+            versao = result.stdout.split()[1] if result.stdout else 'versão desconhecida'
+            logging.info(f"Tesseract disponível: {versao}")
+            return versao
+        logging.warning(f"Tesseract não está funcionando: {result.stderr}")
+    except Exception as e:
+        logging.warning(f"Tesseract não encontrado: {e}")
+    return None
+
+@lru_cache(maxsize=None)
+def tesserocr_version():
+    """Versão do tesserocr (motor residente do Tesseract), ou None se não estiver instalado"""
+    try:
+        import tesserocr
+        return tesserocr.tesseract_version().split()[1]
+    except Exception:
+        logging.info("tesserocr não está disponível. O motor residente do Tesseract não será usado.")
+        return None
+
+@lru_cache(maxsize=None)
+def module_available(nome):
+    """Verifica se um módulo opcional pode ser importado (ex.: 'pypdfium2', 'numpy')"""
+    try:
+        __import__(nome)
+        return True
+    except Exception:
+        return False
+
+def ocr_available():
+    return ocrmypdf_version() is not None
+
+def tesseract_available():
+    return tesseract_version() is not None
+
+def tesserocr_available():
+    return tesserocr_version() is not None
+
+def hocr_available():
+    """Geração da camada de texto a partir do hOCR (ocrmypdf.hocrtransform e pikepdf)"""
+    return module_available('ocrmypdf.hocrtransform') and module_available('pikepdf')
+
+def capabilities():
+    """Estado das dependências do OCR (usado em /api/health)"""
+    return {
+        'ocrmypdf': {'available': ocr_available(), 'version': ocrmypdf_version()},
+        'tesseract': {'available': tesseract_available(), 'version': tesseract_version()},
+        'tesserocr': {'available': tesserocr_available(), 'version': tesserocr_version()},
+        'pikepdf': module_available('pikepdf'),
+        'pypdfium2': module_available('pypdfium2'),
+        'numpy': module_available('numpy'),
+        'engine': Config.OCR_ENGINE
+    }
+
+def clear_cache():
+    """Descarta os resultados em cache (ex.: depois de instalar o Tesseract sem reiniciar)"""
+    for verificacao in (ocrmypdf_version, tesseract_version, tesserocr_version, module_available):
+        verificacao.cache_clear()
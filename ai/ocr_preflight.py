@@ -0,0 +1,127 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+import logging
+from config import Config
+from ai.pdf_inspection import inspect_pdf
+
+# Pontuação aceita em texto legível ao avaliar a camada de texto das páginas
+PONTUACAO_VALIDA = set('.,;:!?()[]{}"\'-–—/\\ºª°§%$&@#*+=<>_|')
+
+def texto_utilizavel(texto):
+    """Verifica se o texto extraído de uma página é aproveitável (sem precisar de OCR)"""
+    caracteres = ''.join((texto or '').split())
+    if len(caracteres) < Config.OCR_MIN_TEXT_CHARS:
+        return False
+    # Fontes sem mapeamento Unicode geram lixo como "(cid:12)" ou símbolos soltos
+    if '(cid:' in caracteres or '\ufffd' in caracteres:
+        return False
+    validos = sum(1 for c in caracteres if c.isalnum() or c in PONTUACAO_VALIDA)
+    return validos / len(caracteres) >= Config.OCR_MIN_TEXT_QUALITY
+
+def _pdf_criptografado(pdf_path):
+    """Verifica a criptografia com o pikepdf (o PyPDF2 não abre PDFs AES sem o PyCryptodome)"""
+    try:
+        import pikepdf
+        with pikepdf.open(pdf_path) as pdf:
+            return pdf.is_encrypted
+    except Exception:
+        return False
+
+def planejar_ocr(pdf_path, force_ocr=None):
+    """
+    Analisa o PDF antes do OCR e escolhe uma única estratégia de processamento
+
+    Lê o catálogo e o formulário (/SigFlags), a criptografia e os recursos de
+    cada página (imagens, fontes, DPI) de uma vez, em vez de tentar o OCR e
+    reagir às mensagens de erro.
+
+    Args:
+        pdf_path: Caminho do PDF
+        force_ocr: OCR em todas as páginas (padrão: Config.OCR_FORCE_OCR)
+
+    Returns:
+        dict: Plano com a estratégia ('skip' ou 'ocr'), as páginas a processar
+            (índices base 0, None = documento inteiro), se é preciso descriptografar
+            antes, as opções extras do ocrmypdf e os motivos das decisões
+    """
+    if force_ocr is None:
+        force_ocr = Config.OCR_FORCE_OCR
+
+    plano = {
+        'strategy': 'ocr',
+        'pages': None,
+        'total_pages': 0,
+        'decrypt': False,
+        'signed': False,
+        'ocr_options': {},
+        'reasons': []
+    }
+
+    try:
+        inspection = inspect_pdf(pdf_path)
+    except Exception as e:
+        # PDF que o PyPDF2 não consegue ler: criptografia AES ou estrutura danificada
+        if _pdf_criptografado(pdf_path):
+            plano['decrypt'] = True
+            plano['reasons'].append('PDF criptografado: descriptografar antes de analisar as páginas')
+        else:
+            plano['reasons'].append(f'Não foi possível analisar o PDF ({e}): OCR no documento inteiro')
+            # Sem análise, não há como saber se existe assinatura: permitir invalidá-la
+            plano['ocr_options']['invalidate_digital_signatures'] = True
+        logging.warning(f"Pré-análise incompleta de {pdf_path}: {e}")
+        return plano
+
+    plano['total_pages'] = inspection.page_count
+
+    if inspection.encrypted:
+        plano['decrypt'] = True
+        plano['reasons'].append('PDF criptografado: descriptografar antes do OCR')
+
+    if inspection.has_signature:
+        # A assinatura deixa de ser válida de qualquer forma ao gerar o PDF pesquisável
+        plano['signed'] = True
+        plano['ocr_options']['invalidate_digital_signatures'] = True
+        plano['reasons'].append('PDF assinado digitalmente: assinatura será invalidada no OCR')
+
+    if force_ocr:
+        paginas = list(range(inspection.page_count))
+        plano['reasons'].append('OCR forçado em todas as páginas')
+    else:
+        paginas = [
+            indice for indice, texto in enumerate(inspection.page_texts)
+            if not texto_utilizavel(texto)
+        ]
+        if len(paginas) < inspection.page_count:
+            plano['reasons'].append(
+                f'{inspection.page_count - len(paginas)} página(s) com texto utilizável mantidas sem OCR'
+            )
+
+    if not paginas:
+        plano['strategy'] = 'skip'
+        plano['pages'] = []
+        plano['reasons'].append('Todas as páginas já possuem texto: OCR dispensado')
+        return plano
+
+    plano['pages'] = paginas
+
+    # Digitalizações em baixa resolução: reamostrar para o Tesseract reconhecer melhor
+    dpis = [inspection.page_dpi[i] for i in paginas if inspection.page_dpi[i]]
+    if dpis and min(dpis) < Config.OCR_MIN_IMAGE_DPI:
+        plano['ocr_options']['oversample'] = Config.OCR_OVERSAMPLE_DPI
+        plano['reasons'].append(
+            f'Imagens com {min(dpis)} DPI: reamostragem para {Config.OCR_OVERSAMPLE_DPI} DPI'
+        )
+
+    return plano
@@ -12,58 +12,38 @@ Os custos gerados são responsabilidade do usuário da chave.
 Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
 """
 
+import io
 import os
-import subprocess
+import re
+import shutil
 import tempfile
 import time
 import logging
+from concurrent.futures import as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime
 from config import Config
 from security import secure_manager
+from ai.ocr_cache import ocr_cache
+from ai.pdf_inspection import inspect_pdf
+from ai.pdf_text import extrair_texto
+from ai.ocr_preflight import planejar_ocr
+from ai.tesseract_pool import tesseract_pool
+from ai.page_cache import page_cache, ler_pasta_hocr, aplicar_camadas_hocr, texto_hocr, confianca_hocr
+from ai.ocr_budget import PrazoOCR, OCRTimeoutError, PoolOCR, encerrar_processos, executar_com_prazo
+from ai.image_preprocessing import PREPROCESSING_AVAILABLE
+from ai.jobs import JobCancelledError, job_manager
+from ai import ocr_capabilities
 
 os.environ['TESSDATA_PREFIX'] = r'C:\Program Files\Tesseract-OCR\tessdata'
-# Caminho do qpdf - ajuste conforme necessário
-import platform
-if platform.system() == "Windows":
-    QPDF_PATH = r"C:\Users\gabri\OneDrive\Documentos\qpdf-12.2.0-mingw64\bin\qpdf.exe"
-else:
-    # No Linux/Docker, usar qpdf do sistema
-    QPDF_PATH = "qpdf"
-
-# Verificação mais robusta do ocrmypdf
-OCR_AVAILABLE = False
-try:
-    import ocrmypdf
-    # Teste adicional para verificar se o ocrmypdf está funcionando
-    try:
-        # Teste básico para verificar se o ocrmypdf pode ser usado
-        ocrmypdf.__version__
-        OCR_AVAILABLE = True
-        logging.info(f"ocrmypdf disponível - versão: {ocrmypdf.__version__}")
-    except Exception as e:
-        OCR_AVAILABLE = False
-        logging.warning(f"ocrmypdf importado mas não funcional: {e}")
-except ImportError as e:
-    OCR_AVAILABLE = False
-    logging.warning(f"ocrmypdf não está disponível. OCR não funcionará. Erro: {e}")
-
-# Verificação do Tesseract
-TESSERACT_AVAILABLE = False
-try:
-    result = subprocess.run(['tesseract', '--version'], 
-                          capture_output=True, text=True, timeout=10)
-    if result.returncode == 0:
-        TESSERACT_AVAILABLE = True
-        logging.info(f"Tesseract disponível: {result.stdout.split()[1] if result.stdout else 'versão desconhecida'}")
-    else:
-        logging.warning(f"Tesseract não está funcionando: {result.stderr}")
-except Exception as e:
-    logging.warning(f"Tesseract não encontrado: {e}")
 
-if not OCR_AVAILABLE:
-    logging.warning("ocrmypdf não está disponível. OCR não funcionará.")
-if not TESSERACT_AVAILABLE:
-    logging.warning("Tesseract não está disponível. OCR não funcionará.")
+# As dependências do OCR (ocrmypdf, Tesseract) são verificadas no primeiro uso (ver ai.ocr_capabilities)
+def __getattr__(name):
+    # Compatibilidade: OCR_AVAILABLE e TESSERACT_AVAILABLE eram calculados na importação do módulo
+    if name == 'OCR_AVAILABLE':
+        return ocr_capabilities.ocr_available()
+    if name == 'TESSERACT_AVAILABLE':
+        return ocr_capabilities.tesseract_available()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 try:
     from PyPDF2 import PdfReader, PdfWriter
@@ -72,200 +52,847 @@ except ImportError:
     PDF_AVAILABLE = False
     logging.warning("PyPDF2 não está disponível. Algumas funcionalidades podem não funcionar.")
 
+try:
+    import pikepdf
+    PIKEPDF_AVAILABLE = True
+except ImportError:
+    PIKEPDF_AVAILABLE = False
+    logging.warning("pikepdf não está disponível. PDFs assinados ou criptografados não poderão ser limpos antes do OCR.")
+
 def is_pdf_signed(filepath):
     """Verifica se o PDF possui assinatura digital"""
     if not PDF_AVAILABLE:
         return False
     
     try:
-        reader = PdfReader(filepath)
-        for page in reader.pages:
-            if '/Annots' in page:
-                try:
-                    # Verificar se há anotações de assinatura
-                    # Como PyPDF2 pode ter diferentes estruturas, vamos ser conservadores
-                    annots = page['/Annots']
-                    # Se chegamos até aqui, há anotações - assumir que pode ter assinatura
-                    # Em um sistema real, você pode implementar verificação mais detalhada
-                    return True
-                except (TypeError, AttributeError, KeyError):
-                    # Se não conseguir acessar anotações, continuar
-                    continue
-        return False
+        inspection = inspect_pdf(filepath)
+        # Conservador: qualquer anotação pode ser um widget de assinatura
+        return inspection.has_signature or inspection.has_annotations
     except Exception as e:
         logging.error(f"Erro ao verificar assinatura em {filepath}: {e}")
         return False
 
-def remove_signature_qpdf(input_path, temp_qpdf_path):
-    """Remove assinatura digital usando qpdf"""
-    try:
-        subprocess.run([
-            QPDF_PATH,
-            '--decrypt',
-            input_path,
-            '--linearize',
-            '--object-streams=generate',
-            temp_qpdf_path
-        ], check=True)
-        logging.info(f"Assinatura removida com qpdf: {input_path}")
+def _anotacao_de_assinatura(annot):
+    """Verifica se a anotação é o widget de um campo de assinatura (/FT /Sig, próprio ou do campo pai)"""
+    if annot.get('/FT') == '/Sig':
         return True
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Erro ao rodar qpdf: {e}")
-        return False
-    except FileNotFoundError:
-        logging.error(f"qpdf não encontrado em: {QPDF_PATH}")
-        return False
+    parent = annot.get('/Parent')
+    return parent is not None and parent.get('/FT') == '/Sig'
 
-def reescrever_pdf_sem_assinatura(input_path, output_path):
-    """Reescreve PDF para limpar metadados e assinaturas"""
-    if not PDF_AVAILABLE:
-        return False
-    
-    try:
-        reader = PdfReader(input_path)
-        writer = PdfWriter()
-        for page in reader.pages:
-            writer.add_page(page)
-        with open(output_path, "wb") as f:
-            writer.write(f)
-        logging.info(f"PDF regravado para limpar metadados: {output_path}")
-        return True
-    except Exception as e:
-        logging.error(f"Erro ao regravar PDF: {e}")
-        return False
+def limpar_pdf_em_memoria(input_path):
+    """
+    Remove criptografia, assinaturas digitais e metadados do PDF em memória
 
-def aplicar_ocr(pdf_entrada, pdf_saida):
-    """Aplica OCR no PDF usando ocrmypdf"""
-    if not OCR_AVAILABLE:
+    Uma única passada com o pikepdf: descriptografa (senha de usuário vazia),
+    remove o formulário (/AcroForm), as permissões assinadas (/Perms), os
+    widgets de assinatura e os metadados (/Info e XMP). O resultado vai direto
+    para o OCR, sem processo externo nem arquivo temporário.
+
+    Args:
+        input_path: Caminho do PDF
+
+    Returns:
+        io.BytesIO: PDF limpo, posicionado no início
+    """
+    if not PIKEPDF_AVAILABLE:
+        raise Exception("pikepdf não está disponível. Instale pikepdf: pip install pikepdf")
+
+    with pikepdf.open(input_path) as pdf:
+        root = pdf.Root
+        for chave in ('/AcroForm', '/Perms', '/Metadata'):
+            if chave in root:
+                del root[chave]
+        if '/Info' in pdf.trailer:
+            del pdf.trailer['/Info']
+
+        for page in pdf.pages:
+            annots = page.obj.get('/Annots')
+            if annots is None:
+                continue
+            mantidas = [annot for annot in annots if not _anotacao_de_assinatura(annot)]
+            if len(mantidas) != len(annots):
+                page.obj.Annots = pdf.make_indirect(pikepdf.Array(mantidas))
+
+        pdf_limpo = io.BytesIO()
+        # Sem o argumento encryption, o pikepdf grava o PDF sem criptografia
+        pdf.save(pdf_limpo)
+
+    pdf_limpo.seek(0)
+    logging.info(f"Assinatura, criptografia e metadados removidos em memória: {input_path}")
+    return pdf_limpo
+
+def _gravar_pdf(origem, destino):
+    """Copia o PDF de entrada (caminho ou stream em memória) para o arquivo de destino"""
+    if hasattr(origem, 'getbuffer'):
+        with open(destino, 'wb') as f:
+            f.write(origem.getbuffer())
+    else:
+        shutil.copyfile(origem, destino)
+
+def _motor_ocr(motor=None):
+    """
+    Motor de OCR a usar: 'tesserocr' (Tesseract residente, ver ai.tesseract_pool)
+    ou 'ocrmypdf'; sem tesserocr instalado, volta para o ocrmypdf
+    """
+    motor = motor or Config.OCR_ENGINE
+    if motor == 'tesserocr' and not tesseract_pool.available:
+        logging.warning("Motor 'tesserocr' configurado mas indisponível; usando o ocrmypdf")
+        return 'ocrmypdf'
+    return motor
+
+def aplicar_ocr(pdf_entrada, pdf_saida, jobs=None, paginas=None, opcoes=None, sidecar=None, motor=None,
+                progresso=None, pasta_hocr=None, prazo=None):
+    """
+    Aplica OCR no PDF usando ocrmypdf (uma única passada) ou o Tesseract residente
+
+    Args:
+        pdf_entrada: Caminho do PDF ou stream em memória (io.BytesIO)
+        paginas: Índices (base 0) das páginas a processar; as demais são mantidas como estão
+        opcoes: Opções extras do ocrmypdf definidas pela pré-análise (ver planejar_ocr)
+        sidecar: Caminho do arquivo de texto em que o ocrmypdf grava o texto reconhecido
+            (uma página por bloco, separadas por form feed); ver _ler_sidecar
+        motor: 'ocrmypdf' ou 'tesserocr' (padrão: Config.OCR_ENGINE)
+        progresso: Função chamada com (páginas concluídas, total); só no motor residente
+        pasta_hocr: Pasta em que o hOCR de cada página é gravado (NNNNNN_ocr_hocr.hocr,
+            numeração base 1); ver ai.page_cache.ler_pasta_hocr
+        prazo: Prazo do documento (ai.ocr_budget.PrazoOCR); com prazo, o ocrmypdf roda em um
+            processo próprio, encerrado junto com o Tesseract se o prazo acabar ou o job for
+            cancelado. Sem prazo, roda no processo atual e o cancelamento do job interrompe o
+            OCR quando a próxima página terminar (páginas na fila não são iniciadas)
+
+    Raises:
+        OCRTimeoutError: O prazo acabou; o hOCR das páginas concluídas fica em pasta_hocr
+    """
+    if _motor_ocr(motor) == 'tesserocr':
+        # Páginas enviadas aos processos com o Tesseract já carregado
+        tesseract_pool.aplicar_ocr(pdf_entrada, pdf_saida, paginas=paginas,
+                                   dpi=(opcoes or {}).get('oversample'), sidecar=sidecar, progresso=progresso,
+                                   pasta_hocr=pasta_hocr, prazo=prazo, perfil=opcoes)
+        return
+
+    if not ocr_capabilities.ocr_available():
         raise Exception("OCR não está disponível. Instale ocrmypdf: pip install ocrmypdf")
     
-    if not TESSERACT_AVAILABLE:
+    if not ocr_capabilities.tesseract_available():
         raise Exception("Tesseract não está disponível. Instale tesseract-ocr")
     
+    # O ocrmypdf numera as páginas a partir de 1
+    pages = ','.join(str(indice + 1) for indice in paginas) if paginas else None
+    if hasattr(pdf_entrada, 'seek'):
+        # PDF limpo em memória (ver limpar_pdf_em_memoria)
+        pdf_entrada.seek(0)
+    
+    executar_com_prazo(prazo, _executar_ocrmypdf, pdf_entrada, pdf_saida, jobs, pages, opcoes, sidecar, pasta_hocr)
+
+def _executar_ocrmypdf(pdf_entrada, pdf_saida, jobs, pages, opcoes, sidecar, pasta_hocr):
+    """Chamada do ocrmypdf (no processo atual ou no processo do prazo, ver aplicar_ocr)"""
+    import ocrmypdf
+    
+    if Config.OCR_PAGE_TIMEOUT:
+        # Página em que o Tesseract passa do limite fica sem OCR, sem interromper o documento
+        opcoes = dict({'tesseract_timeout': Config.OCR_PAGE_TIMEOUT}, **(opcoes or {}))
+    
     try:
-        # Primeira tentativa: OCR normal
         ocrmypdf.ocr(
             pdf_entrada,
             pdf_saida,
-            deskew=True,
+            deskew=Config.OCR_DESKEW,
             force_ocr=True,
             language='por',
-            output_type='pdf'
+            output_type='pdf',
+            jobs=jobs,
+            pages=pages,
+            sidecar=sidecar,
+            # Pré-processamento da imagem e cópia do hOCR de cada página (ver ai.ocrmypdf_plugin)
+            plugins=['ai.ocrmypdf_plugin'],
+            axion_hocr_dir=pasta_hocr,
+            **(opcoes or {})
         )
         logging.info(f"OCR aplicado com sucesso: {pdf_saida}")
     except Exception as e:
-        error_msg = str(e)
-        if "digital signature" in error_msg.lower() or "signature" in error_msg.lower():
-            logging.warning(f"PDF com assinatura digital detectado, tentando processar mesmo assim: {pdf_entrada}")
+        logging.error(f"Erro no OCR de {pdf_entrada}: {e}")
+        raise
+
+# Marcador gravado pelo ocrmypdf no sidecar para páginas (ou faixas de páginas) sem OCR
+_SIDECAR_PAGINAS_IGNORADAS = re.compile(r'^\[OCR skipped on page\(s\) (\d+)(?:-(\d+))?\]$')
+
+def _ler_sidecar(caminho_sidecar, total_paginas):
+    """
+    Lê o texto reconhecido pelo Tesseract a partir do sidecar do ocrmypdf
+
+    O sidecar separa as páginas com form feed (\\f); páginas consecutivas que
+    não passaram pelo OCR aparecem em um único marcador "[OCR skipped on page(s) a-b]".
+
+    Args:
+        caminho_sidecar: Caminho do sidecar gravado pelo ocrmypdf
+        total_paginas: Número de páginas esperado (None = não conferir)
+
+    Returns:
+        list: Texto de cada página (None nas páginas sem OCR), ou None se o
+            sidecar não corresponder ao número de páginas do documento
+    """
+    try:
+        with open(caminho_sidecar, 'r', encoding='utf-8') as f:
+            blocos = f.read().split('\f')
+    except OSError as e:
+        logging.warning(f"Sidecar do OCR não encontrado: {e}")
+        return None
+
+    textos = []
+    for bloco in blocos:
+        ignoradas = _SIDECAR_PAGINAS_IGNORADAS.match(bloco.strip())
+        if ignoradas:
+            inicio = int(ignoradas.group(1))
+            fim = int(ignoradas.group(2) or inicio)
+            textos.extend([None] * (fim - inicio + 1))
+        else:
+            textos.append(bloco.strip())
+
+    if total_paginas is not None and len(textos) != total_paginas:
+        logging.warning(f"Sidecar do OCR com {len(textos)} páginas, esperado {total_paginas}")
+        return None
+    return textos
+
+def _dividir_em_faixas(paginas, paginas_por_faixa):
+    """Divide a lista de páginas (índices base 0) em faixas de tamanho fixo, mantendo a ordem"""
+    paginas_por_faixa = max(1, int(paginas_por_faixa))
+    return [
+        paginas[inicio:inicio + paginas_por_faixa]
+        for inicio in range(0, len(paginas), paginas_por_faixa)
+    ]
+
+def _gravar_faixa(reader, paginas, pasta_temp):
+    """Grava as páginas de uma faixa em um PDF próprio, entrada de um processo do pool"""
+    entrada_faixa = os.path.join(pasta_temp, f"faixa_{paginas[0]:05d}_entrada.pdf")
+    writer = PdfWriter()
+    for indice in paginas:
+        writer.add_page(reader.pages[indice])
+    with open(entrada_faixa, 'wb') as f:
+        writer.write(f)
+    return entrada_faixa
+
+def _pasta_hocr_faixa(pasta_temp, paginas):
+    return os.path.join(pasta_temp, f"faixa_{paginas[0]:05d}_hocr")
+
+def _ocr_faixa(entrada_faixa, paginas, pasta_temp, opcoes=None):
+    """
+    Executa OCR em uma faixa de páginas (usado pelos processos do pool)
+
+    Returns:
+        dict: Páginas processadas, caminho do PDF gerado, texto reconhecido
+            em cada página e tempo gasto
+    """
+    inicio_tempo = time.time()
+    saida_faixa = os.path.join(pasta_temp, f"faixa_{paginas[0]:05d}_ocr.pdf")
+    sidecar_faixa = os.path.join(pasta_temp, f"faixa_{paginas[0]:05d}_ocr.txt")
+    pasta_hocr = _pasta_hocr_faixa(pasta_temp, paginas)
+    os.makedirs(pasta_hocr, exist_ok=True)
+
+    # Um único job por processo: o paralelismo vem do pool
+    aplicar_ocr(entrada_faixa, saida_faixa, jobs=1, opcoes=opcoes, sidecar=sidecar_faixa, pasta_hocr=pasta_hocr)
+
+    return {
+        'pages': paginas,
+        'output': saida_faixa,
+        'texts': _ler_sidecar(sidecar_faixa, len(paginas)),
+        # Numeração da faixa convertida para as páginas do documento
+        'hocr': {paginas[indice]: hocr for indice, hocr in ler_pasta_hocr(pasta_hocr).items()},
+        'seconds': time.time() - inicio_tempo
+    }
+
+def _textos_parciais(faixas, resultados, pasta_temp):
+    """
+    Texto das páginas já reconhecidas quando o prazo acaba ({índice: texto}): faixas
+    concluídas pelo sidecar, faixas interrompidas pelo hOCR das páginas terminadas
+    """
+    textos = {}
+    for resultado in resultados:
+        if resultado['texts'] is not None:
+            textos.update(zip(resultado['pages'], resultado['texts']))
+    for faixa in faixas:
+        for indice, hocr in ler_pasta_hocr(_pasta_hocr_faixa(pasta_temp, faixa)).items():
+            textos.setdefault(faixa[indice], texto_hocr(hocr))
+    return textos
+
+def aplicar_ocr_paralelo(pdf_entrada, pdf_saida, paginas=None, max_workers=None, paginas_por_faixa=None,
+                         opcoes=None, progresso=None, prazo=None):
+    """
+    Aplica OCR dividindo o PDF em faixas de páginas processadas em paralelo
+
+    Cada faixa é processada por um processo do pool e os resultados são
+    reunidos em um único PDF pesquisável, na ordem original das páginas.
+    Páginas fora de `paginas` são copiadas do original sem OCR.
+
+    Args:
+        pdf_entrada: Caminho do PDF original ou stream em memória (io.BytesIO)
+        pdf_saida: Caminho do PDF pesquisável a ser gerado
+        paginas: Índices (base 0) das páginas a processar (padrão: todas)
+        max_workers: Número de processos (padrão: Config.OCR_MAX_WORKERS ou núcleos da máquina)
+        paginas_por_faixa: Páginas por faixa (padrão: Config.OCR_PAGES_PER_CHUNK)
+        opcoes: Opções extras do ocrmypdf definidas pela pré-análise
+        progresso: Função chamada com (páginas concluídas, total) ao fim de cada faixa
+        prazo: Prazo do documento (ai.ocr_budget.PrazoOCR)
+
+    Returns:
+        dict: Número de páginas, processos usados, tempos por página, o texto
+            reconhecido em cada página processada ({índice: texto}, vazio se o
+            sidecar de alguma faixa não pôde ser lido) e o hOCR de cada página
+
+    Raises:
+        OCRTimeoutError: O prazo acabou; os processos do pool são encerrados
+    """
+    if not PDF_AVAILABLE:
+        raise Exception("PyPDF2 não está disponível para dividir o PDF")
+
+    reader_original = PdfReader(pdf_entrada)
+    total_paginas = len(reader_original.pages)
+    if paginas is None:
+        paginas = list(range(total_paginas))
+    max_workers = max_workers or Config.OCR_MAX_WORKERS or os.cpu_count() or 1
+    paginas_por_faixa = paginas_por_faixa or Config.OCR_PAGES_PER_CHUNK
+    faixas = _dividir_em_faixas(paginas, paginas_por_faixa)
+    max_workers = max(1, min(max_workers, len(faixas)))
+
+    pasta_temp = tempfile.mkdtemp(prefix='ocr_paralelo_', dir=Config.TEMP_DIRECTORY)
+    try:
+        resultados = []
+        with PoolOCR(max_workers=max_workers) as executor:
+            # As faixas são gravadas aqui: os processos não precisam reabrir o PDF inteiro
+            futuros = [
+                executor.submit(_ocr_faixa, _gravar_faixa(reader_original, faixa, pasta_temp), faixa, pasta_temp, opcoes)
+                for faixa in faixas
+            ]
             try:
-                # Segunda tentativa: OCR com skip_text para PDFs assinados
-                ocrmypdf.ocr(
-                    pdf_entrada,
-                    pdf_saida,
-                    deskew=True,
-                    skip_text=True,  # Pula texto existente para evitar conflitos
-                    language='por',
-                    output_type='pdf'
-                )
-                logging.info(f"OCR aplicado com sucesso (modo assinatura): {pdf_saida}")
-            except Exception as e2:
-                logging.error(f"Erro no OCR de {pdf_entrada} (modo assinatura): {e2}")
-                # Terceira tentativa: OCR mais básico
-                try:
-                    logging.warning(f"Tentando OCR básico para PDF assinado: {pdf_entrada}")
-                    ocrmypdf.ocr(
-                        pdf_entrada,
-                        pdf_saida,
-                        deskew=False,
-                        language='por',
-                        output_type='pdf'
-                    )
-                    logging.info(f"OCR aplicado com sucesso (modo básico): {pdf_saida}")
-                except Exception as e3:
-                    logging.error(f"Erro no OCR básico de {pdf_entrada}: {e3}")
-                    raise e3
+                with job_manager.interromper_ao_cancelar(lambda: encerrar_processos(executor, 'cancelamento do job')):
+                    for futuro in as_completed(futuros, timeout=prazo.restante() if prazo else None):
+                        resultados.append(futuro.result())
+                        if progresso:
+                            progresso(sum(len(r['pages']) for r in resultados), len(paginas))
+            except FuturesTimeoutError:
+                # Prazo esgotado: encerrar as faixas em andamento (e o Tesseract delas)
+                encerrar_processos(executor)
+                raise prazo.erro(_textos_parciais(faixas, resultados, pasta_temp))
+            except BaseException:
+                # Erro ou cancelamento: não iniciar as faixas que ainda estão na fila
+                for futuro in futuros:
+                    futuro.cancel()
+                job_manager.verificar_cancelamento()
+                raise
+
+        # Reunir as páginas na ordem original, trocando as que passaram pelo OCR
+        paginas_ocr = {}
+        for resultado in resultados:
+            for indice, page in zip(resultado['pages'], PdfReader(resultado['output']).pages):
+                paginas_ocr[indice] = page
+        writer = PdfWriter()
+        for indice, page in enumerate(reader_original.pages):
+            writer.add_page(paginas_ocr.get(indice, page))
+        with open(pdf_saida, 'wb') as f:
+            writer.write(f)
+
+        page_texts = {}
+        if all(resultado['texts'] is not None for resultado in resultados):
+            for resultado in resultados:
+                page_texts.update(zip(resultado['pages'], resultado['texts']))
+        page_hocr = {}
+        for resultado in resultados:
+            page_hocr.update(resultado['hocr'])
+
+        # O ocrmypdf não informa o tempo de cada página: distribuir o tempo da faixa
+        page_timings = []
+        for resultado in sorted(resultados, key=lambda r: r['pages'][0]):
+            for indice in resultado['pages']:
+                page_timings.append({
+                    'page': indice + 1,
+                    'seconds': round(resultado['seconds'] / len(resultado['pages']), 3)
+                })
+
+        logging.info(f"OCR paralelo aplicado com sucesso: {pdf_saida} "
+                     f"({len(paginas)}/{total_paginas} páginas, {len(faixas)} faixas, {max_workers} processos)")
+        return {
+            'pages': total_paginas,
+            'workers': max_workers,
+            'chunks': len(faixas),
+            'page_timings': page_timings,
+            'page_texts': page_texts,
+            'page_hocr': page_hocr
+        }
+    finally:
+        shutil.rmtree(pasta_temp, ignore_errors=True)
+
+def _configuracao_ocr(force_ocr, motor):
+    """Configurações que alteram o resultado do OCR (fazem parte da chave do cache)"""
+    return {
+        'language': 'por',
+        'engine': motor,
+        'preprocess': Config.OCR_PREPROCESS and PREPROCESSING_AVAILABLE,
+        'deskew': Config.OCR_DESKEW,
+        'preprocess_deskew': Config.OCR_PREPROCESS_DESKEW,
+        'target_dpi': Config.OCR_TARGET_DPI,
+        'min_line_height': Config.OCR_MIN_LINE_HEIGHT,
+        'grayscale': Config.OCR_GRAYSCALE,
+        'force_ocr': force_ocr,
+        'min_text_chars': Config.OCR_MIN_TEXT_CHARS,
+        'min_text_quality': Config.OCR_MIN_TEXT_QUALITY,
+        'retry': _opcoes_reforco() if Config.OCR_RETRY_MIN_CONFIDENCE else None,
+        'retry_min_confidence': Config.OCR_RETRY_MIN_CONFIDENCE
+    }
+
+def _configuracao_pagina(motor):
+    """Configurações que alteram o OCR de uma página (fazem parte da chave do cache por página)"""
+    return {
+        'language': 'por',
+        'engine': motor,
+        'preprocess': Config.OCR_PREPROCESS and PREPROCESSING_AVAILABLE,
+        'deskew': Config.OCR_DESKEW,
+        'preprocess_deskew': Config.OCR_PREPROCESS_DESKEW,
+        'target_dpi': Config.OCR_TARGET_DPI,
+        'min_line_height': Config.OCR_MIN_LINE_HEIGHT,
+        'grayscale': Config.OCR_GRAYSCALE,
+        'retry': _opcoes_reforco() if Config.OCR_RETRY_MIN_CONFIDENCE else None,
+        'retry_min_confidence': Config.OCR_RETRY_MIN_CONFIDENCE
+    }
+
+def _opcoes_reforco():
+    """
+    Opções do novo OCR das páginas com confiança baixa (no formato do ocrmypdf;
+    o motor residente usa as mesmas): renderização e resolução enviada ao
+    Tesseract em Config.OCR_RETRY_DPI, pré-processamento sempre ligado e o
+    modo de segmentação Config.OCR_RETRY_PSM
+    """
+    return {
+        'oversample': Config.OCR_RETRY_DPI,
+        'axion_target_dpi': Config.OCR_RETRY_DPI,
+        'axion_preprocess': True,
+        'tesseract_pagesegmode': Config.OCR_RETRY_PSM
+    }
+
+def _substituir_paginas(pdf_saida, pdf_reforco, paginas):
+    """Troca as páginas (índices base 0) do PDF gerado pelas do PDF do novo OCR"""
+    with pikepdf.open(pdf_saida, allow_overwriting_input=True) as pdf, pikepdf.open(pdf_reforco) as reforco:
+        for indice in paginas:
+            pdf.pages[indice] = reforco.pages[indice]
+        pdf.save(pdf_saida)
+
+def _reforcar_paginas_fracas(pdf_entrada, pdf_saida, confiancas, plano, motor, options, pasta_temp, prazo):
+    """
+    Refaz o OCR, com o perfil reforçado (_opcoes_reforco), só das páginas com
+    confiança abaixo do mínimo; a página do novo OCR substitui a do primeiro
+    apenas se a confiança aumentou
+
+    Páginas sem nenhuma palavra reconhecida (em geral, em branco) não são
+    refeitas. Se o prazo do documento acabar no novo OCR, fica o primeiro resultado.
+
+    Args:
+        confiancas: Confiança de cada página do primeiro OCR ({índice: confiança})
+
+    Returns:
+        tuple: (páginas refeitas, {índice: {'text', 'hocr', 'confidence'}} das que melhoraram)
+    """
+    minimo = options.get('min_confidence', Config.OCR_RETRY_MIN_CONFIDENCE)
+    fracas = sorted(
+        indice for indice, confianca in confiancas.items()
+        if minimo and confianca is not None and confianca < minimo
+    )
+    if not fracas:
+        return [], {}
+
+    logging.info(f"Novo OCR de {len(fracas)} páginas com confiança abaixo de {minimo}: "
+                 f"{', '.join(str(indice + 1) for indice in fracas)}")
+    _notificar_progresso(options, 'reocr', 0, len(fracas))
+    opcoes = dict(plano['ocr_options'], **_opcoes_reforco())
+    pdf_reforco = os.path.join(pasta_temp, 'reforco.pdf')
+    pasta_hocr = tempfile.mkdtemp(prefix='reforco_', dir=pasta_temp)
+    try:
+        if _usar_ocr_paralelo(fracas, options):
+            resultado = aplicar_ocr_paralelo(pdf_entrada, pdf_reforco, paginas=fracas,
+                                             max_workers=options.get('max_workers'),
+                                             paginas_por_faixa=options.get('pages_per_chunk'),
+                                             opcoes=opcoes, prazo=prazo)
+            textos, hocrs = resultado['page_texts'], resultado['page_hocr']
+        else:
+            sidecar = os.path.join(pasta_temp, 'reforco_sidecar.txt')
+            aplicar_ocr(pdf_entrada, pdf_reforco, jobs=options.get('jobs'), paginas=fracas, opcoes=opcoes,
+                        sidecar=sidecar, motor=motor, pasta_hocr=pasta_hocr, prazo=prazo)
+            textos_sidecar = _ler_sidecar(sidecar, plano['total_pages'] or None) or []
+            textos = {indice: texto for indice, texto in enumerate(textos_sidecar) if texto is not None}
+            hocrs = ler_pasta_hocr(pasta_hocr)
+    except OCRTimeoutError:
+        logging.warning("Prazo do OCR esgotado no novo OCR das páginas com confiança baixa; mantido o primeiro resultado")
+        return fracas, {}
+
+    melhores = {}
+    for indice in fracas:
+        if indice not in textos or indice not in hocrs:
+            continue
+        confianca = confianca_hocr(hocrs[indice])
+        if confianca is not None and confianca > confiancas[indice]:
+            melhores[indice] = {'text': textos[indice], 'hocr': hocrs[indice], 'confidence': confianca}
+    if melhores:
+        _substituir_paginas(pdf_saida, pdf_reforco, melhores)
+    logging.info(f"Novo OCR melhorou {len(melhores)} de {len(fracas)} páginas")
+    _notificar_progresso(options, 'reocr', len(fracas), len(fracas))
+    return fracas, melhores
+
+def _usar_cache_paginas(options):
+    """Decide se o cache de OCR por página deve ser consultado"""
+    if not options.get('use_cache', Config.OCR_CACHE_ENABLED) or not Config.OCR_PAGE_CACHE_ENABLED:
+        return False
+    return page_cache.available
+
+def _resultado_do_cache(cached, output_file_path, options, start_time, descricao='PDF recuperado'):
+    """Resultado do OCR a partir de uma entrada do cache por documento (ocr_cache.get já copiou o PDF)"""
+    paginas_cache = cached['meta'].get('pages_processed', 0)
+    _notificar_progresso(options, 'ocr', paginas_cache, paginas_cache)
+    processing_time = time.time() - start_time
+    return {
+        'success': True,
+        'processing_time': processing_time,
+        'pages_processed': paginas_cache,
+        'pages_ocr': 0,
+        'pages_skipped': paginas_cache,
+        'page_timings': [],
+        'output_file': output_file_path,
+        'text': cached['text'],
+        'pages_text': cached['pages_text'],
+        'page_confidence': cached['meta'].get('page_confidence'),
+        'cached': True,
+        'message': f'{descricao} do cache de OCR em {processing_time:.2f} segundos'
+    }
+
+def _notificar_progresso(options, etapa, atual=None, total=None):
+    """Informa o andamento ao callback de progresso (options['progress_callback']), se houver"""
+    callback = options.get('progress_callback')
+    if not callback:
+        return
+    try:
+        callback(etapa, atual, total)
+    except JobCancelledError:
+        # Cancelamento pedido pelo cliente: interromper o processamento
+        raise
+    except Exception as e:
+        logging.warning(f"Erro no callback de progresso do OCR: {e}")
+
+def _usar_ocr_paralelo(paginas, options):
+    """Decide se as páginas devem ser processadas pelo OCR paralelo"""
+    if not options.get('parallel', Config.OCR_PARALLEL) or not PDF_AVAILABLE:
+        return False
+    if _motor_ocr(options.get('engine')) == 'tesserocr':
+        # O motor residente já distribui as páginas entre os seus processos
+        return False
+    return len(paginas) >= Config.OCR_PARALLEL_MIN_PAGES
+
+def _montar_texto_paginas(pdf_entrada, pdf_saida, plano, textos_ocr):
+    """
+    Monta o texto de cada página sem reler o PDF gerado
+
+    As páginas que passaram pelo OCR usam o texto do sidecar; as demais usam a
+    camada de texto lida na pré-análise (a inspeção do PDF de entrada fica em
+    cache). Se o sidecar não cobrir todas as páginas processadas, o texto é
+    extraído do PDF gerado, como antes.
+    """
+    paginas_ocr = plano['pages']
+    if paginas_ocr is None:
+        # OCR no documento inteiro sem pré-análise: o sidecar traz todas as páginas
+        if textos_ocr:
+            return [textos_ocr[indice] for indice in sorted(textos_ocr)]
+    elif all(indice in textos_ocr for indice in paginas_ocr):
+        try:
+            textos_entrada = inspect_pdf(pdf_entrada).page_texts
+            return [
+                textos_ocr[indice] if indice in textos_ocr else (texto or '').strip()
+                for indice, texto in enumerate(textos_entrada)
+            ]
+        except Exception as e:
+            logging.warning(f"Não foi possível reaproveitar o texto da pré-análise de {pdf_entrada}: {e}")
+
+    logging.info(f"Texto do OCR indisponível no sidecar, extraindo do PDF gerado: {pdf_saida}")
+    try:
+        return [texto.strip() for texto in inspect_pdf(pdf_saida).page_texts]
+    except Exception as e:
+        logging.error(f"Erro ao extrair texto de {pdf_saida}: {e}")
+        return []
+
+def _resultado_prazo_esgotado(erro, plano, pdf_analisado, paginas_cache, pasta_temp, start_time):
+    """
+    Resultado do OCR interrompido pelo prazo, com o texto recuperado até então
+
+    As páginas sem OCR usam a camada de texto da pré-análise; as com OCR usam o
+    texto das páginas concluídas (do motor, do hOCR gravado pelo ocrmypdf ou do
+    cache por página). 'timed_out_after_page' é o número de páginas, a partir
+    do início do documento, com o texto completo.
+    """
+    textos = dict(erro.page_texts)
+    for indice, hocr in ler_pasta_hocr(pasta_temp).items():
+        textos.setdefault(indice, texto_hocr(hocr))
+    textos.update({indice: entrada['text'] for indice, entrada in paginas_cache.items()})
+
+    total_paginas = plano['total_pages']
+    paginas_ocr = set(plano['pages']) if plano['pages'] is not None else set(range(total_paginas))
+    try:
+        textos_entrada = inspect_pdf(pdf_analisado).page_texts
+    except Exception:
+        textos_entrada = [''] * total_paginas
+
+    pages_text = []
+    pendentes = []
+    for indice in range(total_paginas):
+        if indice not in paginas_ocr:
+            pages_text.append((textos_entrada[indice] or '').strip())
+        elif indice in textos:
+            pages_text.append((textos[indice] or '').strip())
         else:
-            logging.error(f"Erro no OCR de {pdf_entrada}: {e}")
-            raise
+            pages_text.append('')
+            pendentes.append(indice + 1)
+
+    ultima_pagina = pendentes[0] - 1 if pendentes else total_paginas
+    return {
+        'success': False,
+        'timed_out': True,
+        'error': f'Tempo limite do OCR excedido após a página {ultima_pagina} de {total_paginas} '
+                 f'({erro.seconds:.0f}s)',
+        'timed_out_after_page': ultima_pagina,
+        'pages_pending': pendentes,
+        'pages_processed': total_paginas - len(pendentes),
+        'pages_text': pages_text,
+        'text': '\n'.join(pages_text).strip(),
+        'processing_time': time.time() - start_time
+    }
 
 def process_pdf_with_ocr(input_file_path, output_file_path, options=None):
     """
     Processa PDF com OCR, removendo assinaturas digitais se necessário
+
+    PDFs assinados ou criptografados são limpos em memória (limpar_pdf_em_memoria)
+    antes do OCR; PDFs grandes são processados em janelas de páginas
+    (ai.ocr_windows.processar_em_janelas), limpas uma a uma. Imagens (JPEG, PNG, TIFF de várias páginas) seguem por
+    ai.image_ocr.process_image_with_ocr, com as mesmas opções e resultado.
+
+    Options:
+        parallel: Usar OCR paralelo por páginas (padrão: Config.OCR_PARALLEL)
+        max_workers: Número de processos do OCR paralelo
+        pages_per_chunk: Páginas por faixa no OCR paralelo
+        jobs: Processos do Tesseract no OCR sem paralelismo por faixas (padrão: núcleos da
+            máquina; o OCR em lote usa 1, já que cada arquivo roda em um processo do lote)
+        force_ocr: OCR em todas as páginas; se False (modo híbrido) só as páginas
+            sem texto utilizável passam pelo Tesseract (padrão: Config.OCR_FORCE_OCR)
+        use_cache: Reaproveitar resultados do cache de OCR, por documento e por página
+            (padrão: Config.OCR_CACHE_ENABLED)
+        engine: Motor do OCR, 'ocrmypdf' ou 'tesserocr' (padrão: Config.OCR_ENGINE)
+        timeout: Tempo máximo do OCR do documento, em segundos (padrão: o menor entre
+            Config.OCR_DOCUMENT_TIMEOUT e Config.OCR_PAGE_TIMEOUT por página; 0 = sem limite)
+        min_confidence: Páginas com confiança média abaixo disso passam por um novo OCR
+            com o perfil reforçado (padrão: Config.OCR_RETRY_MIN_CONFIDENCE; 0 = nunca)
+        window_pages: Páginas por janela nos PDFs grandes (padrão: Config.OCR_WINDOW_PAGES;
+            0 = documento inteiro de uma vez; ver ai.ocr_windows)
+        document_cache: Consultar e gravar o cache por documento (padrão: True; as janelas
+            de um PDF grande usam só o cache por página)
+        progress_callback: Função chamada com (etapa, atual, total) durante o processamento;
+            etapas: 'preflight', 'decrypt', 'ocr' (páginas concluídas / páginas com OCR)
+            e 'reocr' (novo OCR das páginas com confiança baixa)
+
+    O texto reconhecido vem do sidecar do ocrmypdf: 'pages_text' traz o texto de
+    cada página e 'text' o documento completo, sem reler o PDF gerado.
+    'page_confidence' traz a confiança média das palavras de cada página (None
+    nas páginas sem OCR) e 'pages_retried' as páginas (base 1) refeitas com o
+    perfil reforçado (ver _reforcar_paginas_fracas).
+
+    Se o prazo acabar, o OCR é interrompido e o resultado traz 'timed_out',
+    'timed_out_after_page' e o texto das páginas concluídas (ver _resultado_prazo_esgotado).
     """
-    if not OCR_AVAILABLE:
+    if not ocr_capabilities.ocr_available():
         return {
             'success': False,
             'error': 'OCR não está disponível. Instale ocrmypdf: pip install ocrmypdf'
         }
     
-    if not TESSERACT_AVAILABLE:
+    from ai.image_ocr import formato_imagem, process_image_with_ocr
+    if formato_imagem(input_file_path):
+        # JPEG, PNG e TIFF: quadro a quadro, sem montar um PDF intermediário
+        return process_image_with_ocr(input_file_path, output_file_path, options)
+    
+    options = options or {}
+    motor = _motor_ocr(options.get('engine'))
+    if motor != 'tesserocr' and not ocr_capabilities.tesseract_available():
         return {
             'success': False,
             'error': 'Tesseract não está disponível. Instale tesseract-ocr'
         }
     
+    from ai.ocr_windows import usar_janelas, processar_em_janelas
+    total_paginas = usar_janelas(input_file_path, options)
+    if total_paginas:
+        # PDFs grandes: uma janela de páginas por vez, com memória limitada
+        return processar_em_janelas(input_file_path, output_file_path, total_paginas, options)
+    
+    force_ocr = options.get('force_ocr', Config.OCR_FORCE_OCR)
     start_time = time.time()
     temp_files = []
+    temp_dirs = []
+    page_timings = []
     
     try:
-        # Tentar OCR diretamente primeiro
-        try:
-            aplicar_ocr(input_file_path, output_file_path)
-        except Exception as e:
-            error_msg = str(e)
-            if "digital signature" in error_msg.lower() or "signature" in error_msg.lower():
-                logging.info(f"PDF com assinatura digital detectado, tentando limpar: {input_file_path}")
-                
-                # Verificar se o PDF tem assinatura digital
-                if is_pdf_signed(input_file_path):
-                    # Criar arquivo temporário para qpdf
-                    temp_qpdf_path = input_file_path + '_qpdf_temp.pdf'
-                    temp_files.append(temp_qpdf_path)
-                    
-                    # Remover assinatura com qpdf
-                    if remove_signature_qpdf(input_file_path, temp_qpdf_path):
-                        # Reescrever PDF para limpar metadados
-                        temp_clean_path = input_file_path + '_clean_temp.pdf'
-                        temp_files.append(temp_clean_path)
-                        
-                        if reescrever_pdf_sem_assinatura(temp_qpdf_path, temp_clean_path):
-                            # Aplicar OCR no PDF limpo
-                            aplicar_ocr(temp_clean_path, output_file_path)
-                        else:
-                            # Fallback: aplicar OCR diretamente no arquivo qpdf
-                            aplicar_ocr(temp_qpdf_path, output_file_path)
-                    else:
-                        # Fallback: tentar OCR com opções especiais para PDFs assinados
-                        logging.warning("qpdf não disponível, tentando OCR com opções especiais")
-                        aplicar_ocr(input_file_path, output_file_path)
-                else:
-                    # Se não detectou assinatura mas deu erro, tentar OCR com opções especiais
-                    logging.warning("Erro no OCR, tentando com opções especiais")
-                    aplicar_ocr(input_file_path, output_file_path)
+        # Reaproveitar o resultado se o mesmo arquivo já passou pelo OCR com as mesmas configurações
+        cache_key = None
+        if options.get('use_cache', Config.OCR_CACHE_ENABLED) and options.get('document_cache', True):
+            cache_key = ocr_cache.make_key(input_file_path, _configuracao_ocr(force_ocr, motor))
+            cached = ocr_cache.get(cache_key, output_file_path)
+            if cached:
+                return _resultado_do_cache(cached, output_file_path, options, start_time)
+        
+        # Pré-análise: escolher a estratégia antes de rodar o OCR
+        _notificar_progresso(options, 'preflight')
+        plano = planejar_ocr(input_file_path, force_ocr)
+        entrada_ocr = input_file_path
+        pdf_analisado = input_file_path
+        if plano['decrypt'] or (plano['signed'] and plano['strategy'] == 'ocr'):
+            # Limpeza em memória com o pikepdf; o stream vai direto para o OCR
+            _notificar_progresso(options, 'decrypt')
+            entrada_ocr = limpar_pdf_em_memoria(input_file_path)
+            if plano['decrypt']:
+                # Refazer a análise no PDF descriptografado (páginas com texto)
+                plano = planejar_ocr(entrada_ocr, force_ocr)
+                pdf_analisado = entrada_ocr
             else:
-                # Re-raise o erro original se não for relacionado a assinatura
-                raise
+                # As páginas não mudam; sem assinatura não é preciso invalidá-la no OCR
+                plano['ocr_options'].pop('invalidate_digital_signatures', None)
+                plano['reasons'].append('Assinatura e metadados removidos em memória antes do OCR')
+        logging.info(f"Plano de OCR para {input_file_path}: {plano['strategy']} - {'; '.join(plano['reasons'])}")
+        
+        paginas_ocr = plano['pages']
+        total_ocr = len(paginas_ocr) if paginas_ocr is not None else plano['total_pages']
+        _notificar_progresso(options, 'ocr', 0, total_ocr)
+        
+        # Páginas já reconhecidas em outros documentos não passam pelo Tesseract
+        chaves_paginas = {}
+        paginas_cache = {}
+        paginas_pendentes = paginas_ocr
+        if paginas_ocr and _usar_cache_paginas(options):
+            try:
+                chaves_paginas = page_cache.make_keys(entrada_ocr, paginas_ocr, _configuracao_pagina(motor))
+                paginas_cache = page_cache.get_many(chaves_paginas)
+            except Exception as e:
+                logging.warning(f"Cache de OCR por página indisponível para {input_file_path}: {e}")
+                chaves_paginas = {}
+            paginas_pendentes = [indice for indice in paginas_ocr if indice not in paginas_cache]
+            if paginas_cache:
+                _notificar_progresso(options, 'ocr', len(paginas_cache), total_ocr)
+        
+        # Páginas a enviar ao ocrmypdf (None = documento inteiro)
+        paginas_parciais = (
+            paginas_pendentes if paginas_pendentes and len(paginas_pendentes) < plano['total_pages'] else None
+        )
+        progresso_ocr = lambda atual, total: _notificar_progresso(options, 'ocr', len(paginas_cache) + atual, total_ocr)
+        prazo = PrazoOCR(len(paginas_pendentes) if paginas_pendentes is not None else plano['total_pages'],
+                         options.get('timeout'))
+        
+        # Texto e hOCR reconhecidos pelo Tesseract em cada página ({índice: texto})
+        textos_ocr = {}
+        hocr_ocr = {}
+        pasta_temp = tempfile.mkdtemp(prefix='ocr_paginas_', dir=Config.TEMP_DIRECTORY)
+        temp_dirs.append(pasta_temp)
+        if plano['strategy'] == 'skip' or (paginas_ocr and not paginas_pendentes):
+            # Documento nato-digital (todas as páginas já têm texto utilizável)
+            # ou todas as páginas sem texto encontradas no cache de OCR por página
+            _gravar_pdf(entrada_ocr, output_file_path)
+            logging.info(f"OCR dispensado, todas as páginas já possuem texto: {input_file_path}")
+        elif paginas_pendentes and _usar_ocr_paralelo(paginas_pendentes, options):
+            parallel_result = aplicar_ocr_paralelo(
+                entrada_ocr,
+                output_file_path,
+                paginas=paginas_pendentes,
+                max_workers=options.get('max_workers'),
+                paginas_por_faixa=options.get('pages_per_chunk'),
+                opcoes=plano['ocr_options'],
+                progresso=progresso_ocr,
+                prazo=prazo
+            )
+            page_timings = parallel_result['page_timings']
+            textos_ocr = parallel_result['page_texts']
+            hocr_ocr = parallel_result['page_hocr']
+        else:
+            sidecar_path = output_file_path + '_sidecar.txt'
+            temp_files.append(sidecar_path)
+            aplicar_ocr(entrada_ocr, output_file_path, jobs=options.get('jobs'), paginas=paginas_parciais,
+                        opcoes=plano['ocr_options'], sidecar=sidecar_path, motor=motor, progresso=progresso_ocr,
+                        pasta_hocr=pasta_temp, prazo=prazo)
+            textos_sidecar = _ler_sidecar(sidecar_path, plano['total_pages'] or None)
+            if textos_sidecar:
+                textos_ocr = {
+                    indice: texto for indice, texto in enumerate(textos_sidecar) if texto is not None
+                }
+            hocr_ocr = ler_pasta_hocr(pasta_temp)
+        
+        # Confiança de cada página reconhecida agora; páginas fracas passam por um novo OCR reforçado
+        confiancas = {indice: confianca_hocr(hocr_ocr[indice]) for indice in hocr_ocr}
+        paginas_refeitas, melhores = _reforcar_paginas_fracas(entrada_ocr, output_file_path, confiancas, plano,
+                                                              motor, options, pasta_temp, prazo)
+        for indice, entrada in melhores.items():
+            textos_ocr[indice] = entrada['text']
+            hocr_ocr[indice] = entrada['hocr']
+            confiancas[indice] = entrada['confidence']
+        
+        if paginas_cache:
+            # Camada de texto das páginas do cache, gerada a partir do hOCR guardado
+            aplicar_camadas_hocr(output_file_path, {
+                indice: entrada['hocr'] for indice, entrada in paginas_cache.items()
+            }, pasta_temp)
+            textos_ocr.update({indice: entrada['text'] for indice, entrada in paginas_cache.items()})
+            confiancas.update({
+                indice: entrada.get('confidence', confianca_hocr(entrada['hocr']))
+                for indice, entrada in paginas_cache.items()
+            })
+        if chaves_paginas:
+            # Só páginas com hOCR: sem ele a página do cache ficaria sem camada de texto no PDF
+            page_cache.put_many({
+                chaves_paginas[indice]: {
+                    'text': textos_ocr[indice],
+                    'hocr': hocr_ocr[indice],
+                    'confidence': confiancas.get(indice)
+                }
+                for indice in paginas_pendentes
+                if indice in textos_ocr and indice in hocr_ocr
+            })
+        
+        _notificar_progresso(options, 'ocr', total_ocr, total_ocr)
+        pages_text = _montar_texto_paginas(pdf_analisado, output_file_path, plano, textos_ocr)
+        pages_processed = len(pages_text)
+        text = '\n'.join(pages_text).strip()
         
         # Calcular tempo de processamento
         processing_time = time.time() - start_time
         
-        # Contar páginas processadas
-        pages_processed = 0
-        try:
-            with open(output_file_path, 'rb') as f:
-                pdf_reader = PdfReader(f)
-                pages_processed = len(pdf_reader.pages)
-        except Exception:
-            pages_processed = 0
+        page_confidence = [confiancas.get(indice) for indice in range(pages_processed)]
+        
+        if cache_key and pages_text:
+            ocr_cache.put(cache_key, output_file_path, pages_text, {
+                'pages_processed': pages_processed,
+                'page_confidence': page_confidence
+            })
         
         return {
             'success': True,
             'processing_time': processing_time,
             'pages_processed': pages_processed,
+            'pages_ocr': len(paginas_ocr) if paginas_ocr is not None else pages_processed,
+            'pages_skipped': pages_processed - len(paginas_ocr) if paginas_ocr is not None else 0,
+            'pages_cached': len(paginas_cache),
+            'page_timings': page_timings,
             'output_file': output_file_path,
-            'message': f'PDF processado com sucesso em {processing_time:.2f} segundos (OCR + remoção de assinatura)'
+            'text': text,
+            'pages_text': pages_text,
+            'page_confidence': page_confidence,
+            'pages_retried': [indice + 1 for indice in paginas_refeitas],
+            'cached': False,
+            'ocr_plan': plano,
+            'message': f'PDF processado com sucesso em {processing_time:.2f} segundos ({plano["strategy"]})'
         }
         
+    except JobCancelledError:
+        raise
+    except OCRTimeoutError as e:
+        logging.error(f"OCR interrompido por tempo limite em {input_file_path}: {e}")
+        return _resultado_prazo_esgotado(e, plano, pdf_analisado, paginas_cache, pasta_temp, start_time)
     except Exception as e:
         import traceback
         logging.error(traceback.format_exc())
@@ -282,6 +909,8 @@ def process_pdf_with_ocr(input_file_path, output_file_path, options=None):
                     os.remove(temp_file)
                 except Exception:
                     pass
+        for temp_dir in temp_dirs:
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
 def extract_text_from_pdf(pdf_path):
     """
@@ -294,30 +923,44 @@ def extract_text_from_pdf(pdf_path):
         str: Texto extraído
     """
     try:
-        if not PDF_AVAILABLE:
-            return "Erro: PyPDF2 não está disponível"
+        from ai.ocr_windows import documento_grande, iterar_textos
+        if documento_grande(pdf_path):
+            # PDFs grandes: uma página por vez, sem carregar o arquivo inteiro
+            return '\n'.join(iterar_textos(pdf_path)).strip()
         
-        text = ""
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        
-        return text.strip()
+        return extrair_texto(pdf_path).strip()
         
     except Exception as e:
         return f"Erro ao extrair texto: {str(e)}"
 
-def get_ocr_info(pdf_path):
+def get_ocr_info(pdf_path, pages_text=None, page_confidence=None):
     """
     Obtém informações sobre um PDF processado
     
     Args:
         pdf_path: Caminho do PDF
+        pages_text: Texto de cada página já obtido no OCR (evita reler o PDF)
+        page_confidence: Confiança média do Tesseract em cada página (None nas páginas sem OCR)
     
     Returns:
         dict: Informações do PDF
     """
+    if pages_text is not None:
+        text = '\n'.join(pages_text)
+        info = {
+            'pages': len(pages_text),
+            'text_length': len(text),
+            'has_text': len(text) > 100,
+            'text_preview': text[:500],
+            'file_size': os.path.getsize(pdf_path)
+        }
+        if page_confidence is not None:
+            confiancas = [confianca for confianca in page_confidence if confianca is not None]
+            info['page_confidence'] = page_confidence
+            info['mean_confidence'] = round(sum(confiancas) / len(confiancas), 1) if confiancas else None
+            info['min_confidence'] = min(confiancas) if confiancas else None
+        return info
+    
     try:
         if not PDF_AVAILABLE:
             return {
@@ -328,28 +971,26 @@ def get_ocr_info(pdf_path):
                 'text_preview': ""
             }
         
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PdfReader(file)
-            
-            # Contar páginas
-            num_pages = len(pdf_reader.pages)
-            
-            # Extrair texto para análise
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            # Calcular estatísticas básicas
-            text_length = len(text)
-            has_text = text_length > 100  # Considera que tem texto se mais de 100 caracteres
-            
-            return {
-                'pages': num_pages,
-                'text_length': text_length,
-                'has_text': has_text,
-                'text_preview': text[:500] if text else ""
-            }
-            
+        from ai.ocr_windows import documento_grande, iterar_textos
+        if documento_grande(pdf_path):
+            return _info_pdf_grande(pdf_path, iterar_textos(pdf_path))
+        
+        inspection = inspect_pdf(pdf_path)
+        text = inspection.text
+        
+        # Calcular estatísticas básicas
+        text_length = len(text)
+        has_text = text_length > 100  # Considera que tem texto se mais de 100 caracteres
+        
+        return {
+            'pages': inspection.page_count,
+            'text_length': text_length,
+            'has_text': has_text,
+            'text_preview': text[:500] if text else "",
+            'file_size': inspection.byte_size,
+            'has_signature': inspection.has_signature
+        }
+        
     except Exception as e:
         return {
             'error': f'Erro ao analisar PDF: {str(e)}',
@@ -359,28 +1000,38 @@ def get_ocr_info(pdf_path):
             'text_preview': ""
         } 
 
-def processar_pdfs(diretorio_pdf, diretorio_saida):
+def _info_pdf_grande(pdf_path, textos):
+    """Informações de get_ocr_info contadas página a página, guardando só o início do texto"""
+    from ai.ocr_windows import possui_assinatura
+
+    paginas = 0
+    text_length = 0
+    preview = ''
+    for texto in textos:
+        # As páginas são unidas por '\n' no texto do documento
+        text_length += len(texto) + (1 if paginas else 0)
+        if len(preview) < 500:
+            preview = (preview + '\n' + texto if paginas else texto)[:500]
+        paginas += 1
+    return {
+        'pages': paginas,
+        'text_length': text_length,
+        'has_text': text_length > 100,
+        'text_preview': preview,
+        'file_size': os.path.getsize(pdf_path),
+        'has_signature': possui_assinatura(pdf_path)
+    }
+
+def processar_pdfs(diretorio_pdf, diretorio_saida, max_workers=None):
     """
     Processa todos os PDFs em um diretório
     Função utilitária para processamento em lote
-    """
-    os.makedirs(diretorio_saida, exist_ok=True)
-    
-    for nome_arquivo in os.listdir(diretorio_pdf):
-        if not nome_arquivo.lower().endswith('.pdf'):
-            continue
 
-        caminho_pdf = os.path.join(diretorio_pdf, nome_arquivo)
-        caminho_qpdf_tmp = os.path.join(diretorio_saida, f"qpdf_{nome_arquivo}")
-        caminho_pdf_limpo = os.path.join(diretorio_saida, f"limpo_{nome_arquivo}")
-        caminho_pdf_saida = os.path.join(diretorio_saida, f"ocr_{nome_arquivo}")
-
-        if is_pdf_signed(caminho_pdf):
-            logging.info(f"PDF assinado detectado: {nome_arquivo}")
-            if remove_signature_qpdf(caminho_pdf, caminho_qpdf_tmp):
-                if reescrever_pdf_sem_assinatura(caminho_qpdf_tmp, caminho_pdf_limpo):
-                    aplicar_ocr(caminho_pdf_limpo, caminho_pdf_saida)
-                    os.remove(caminho_pdf_limpo)
-                os.remove(caminho_qpdf_tmp)
-        else:
-            aplicar_ocr(caminho_pdf, caminho_pdf_saida) 
\ No newline at end of file
+    Os arquivos são processados em paralelo e de forma retomável (ver
+    ai.ocr_batch.processar_lote); uma falha em um arquivo não interrompe o lote.
+
+    Returns:
+        dict: Resumo do lote, também gravado como relatório JSON no diretório de saída
+    """
+    from ai.ocr_batch import processar_lote
+    return processar_lote(diretorio_pdf, diretorio_saida, max_workers=max_workers)
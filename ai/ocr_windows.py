@@ -0,0 +1,339 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# Processamento de PDFs grandes em janelas de páginas
+#
+# O PyPDF2 lê o arquivo inteiro para a memória e a limpeza de assinaturas
+# grava o PDF limpo em memória: com uploads de até 100MB, alguns documentos
+# grandes ao mesmo tempo esgotam a memória do processo. Aqui o documento é
+# dividido em janelas de Config.OCR_WINDOW_PAGES páginas, copiadas com o
+# pikepdf (que lê do disco só os objetos usados); cada janela passa pelo OCR,
+# tem o texto extraído e o PDF gravado antes da próxima. O pico de memória
+# depende do tamanho da janela, não do número de páginas do documento.
+
+import os
+import time
+import shutil
+import logging
+import tempfile
+from config import Config
+from ai.ocr_cache import ocr_cache
+from ai.ocr_budget import PrazoOCR
+from ai.jobs import JobCancelledError
+from ai.pdf_text import iterar_paginas, PDFIUM_AVAILABLE
+
+try:
+    import pikepdf
+    PIKEPDF_AVAILABLE = True
+except ImportError:
+    PIKEPDF_AVAILABLE = False
+
+# Páginas reunidas por vez no PDF final (arquivos abertos ao mesmo tempo na junção)
+LOTE_PAGINAS = 32
+
+class MontagemPDF:
+    """
+    Reúne PDFs em um único documento, na ordem em que são adicionados
+
+    As páginas são copiadas para um lote; a cada `paginas_por_lote` o lote é
+    gravado e os arquivos adicionados são removidos, e no fim os lotes formam
+    o PDF. A cópia de uma página só lê o conteúdo do arquivo de origem na
+    gravação, então a memória depende do lote, não do documento.
+    """
+
+    def __init__(self, pasta_temp, paginas_por_lote=LOTE_PAGINAS):
+        self.pasta_temp = pasta_temp
+        self.paginas_por_lote = paginas_por_lote
+        self.lotes = []
+        self.lote = None
+        self.abertos = []
+        self.paginas = 0
+
+    def adicionar(self, caminho_pdf):
+        if self.lote is None:
+            self.lote = pikepdf.new()
+        origem = pikepdf.open(caminho_pdf)
+        # A página copiada depende do arquivo de origem até o lote ser gravado
+        self.abertos.append((origem, caminho_pdf))
+        self.lote.pages.extend(origem.pages)
+        self.paginas += len(origem.pages)
+        if self.paginas >= self.paginas_por_lote:
+            self._gravar_lote()
+
+    def _gravar_lote(self):
+        if self.lote is None:
+            return
+        caminho_lote = os.path.join(self.pasta_temp, f"lote_{len(self.lotes):05d}.pdf")
+        self.lote.save(caminho_lote)
+        self.lotes.append(caminho_lote)
+        self.fechar()
+
+    def fechar(self):
+        if self.lote is not None:
+            self.lote.close()
+            self.lote = None
+        for origem, caminho_pdf in self.abertos:
+            origem.close()
+            os.remove(caminho_pdf)
+        self.abertos = []
+        self.paginas = 0
+
+    def finalizar(self, pdf_saida):
+        self._gravar_lote()
+        if len(self.lotes) == 1:
+            shutil.move(self.lotes[0], pdf_saida)
+            return
+        lotes = [pikepdf.open(caminho) for caminho in self.lotes]
+        try:
+            with pikepdf.new() as pdf:
+                for lote in lotes:
+                    pdf.pages.extend(lote.pages)
+                pdf.save(pdf_saida)
+        finally:
+            for lote in lotes:
+                lote.close()
+
+def contar_paginas(caminho_pdf):
+    """Número de páginas lendo só a estrutura do PDF (None se o pikepdf não conseguir abrir)"""
+    if not PIKEPDF_AVAILABLE or hasattr(caminho_pdf, 'read'):
+        return None
+    try:
+        with pikepdf.open(caminho_pdf) as pdf:
+            return len(pdf.pages)
+    except Exception as e:
+        logging.warning(f"Não foi possível contar as páginas de {caminho_pdf}: {e}")
+        return None
+
+def documento_grande(caminho_pdf):
+    """
+    Número de páginas do PDF, se ele tiver mais de Config.OCR_WINDOW_MIN_PAGES
+    páginas ou mais de Config.OCR_WINDOW_MIN_BYTES; None nos demais casos
+    """
+    if not PIKEPDF_AVAILABLE or hasattr(caminho_pdf, 'read'):
+        return None
+    total_paginas = contar_paginas(caminho_pdf)
+    if not total_paginas:
+        return None
+    if ((Config.OCR_WINDOW_MIN_PAGES and total_paginas > Config.OCR_WINDOW_MIN_PAGES)
+            or (Config.OCR_WINDOW_MIN_BYTES and os.path.getsize(caminho_pdf) > Config.OCR_WINDOW_MIN_BYTES)):
+        return total_paginas
+    return None
+
+def usar_janelas(caminho_pdf, options):
+    """
+    Decide se o PDF deve ser processado em janelas (ver documento_grande;
+    options['window_pages'] = 0 desliga)
+
+    Returns:
+        int: Número de páginas do documento, ou None se não for processado em janelas
+    """
+    if not options.get('window_pages', Config.OCR_WINDOW_PAGES):
+        return None
+    total_paginas = documento_grande(caminho_pdf)
+    return total_paginas if total_paginas and total_paginas > 1 else None
+
+def gravar_janela(caminho_pdf, inicio, fim, destino):
+    """
+    Copia as páginas [inicio, fim) para um PDF próprio, sem criptografia,
+    formulário, metadados nem widgets de assinatura (como limpar_pdf_em_memoria)
+    """
+    from ai.ocr_service import _anotacao_de_assinatura
+
+    # O documento é reaberto a cada janela: os objetos lidos nas anteriores não ficam em memória
+    with pikepdf.open(caminho_pdf) as pdf, pikepdf.new() as janela:
+        janela.pages.extend(pdf.pages[inicio:fim])
+        for page in janela.pages:
+            annots = page.obj.get('/Annots')
+            if annots is None:
+                continue
+            mantidas = [annot for annot in annots if not _anotacao_de_assinatura(annot)]
+            if len(mantidas) != len(annots):
+                page.obj.Annots = janela.make_indirect(pikepdf.Array(mantidas))
+        janela.save(destino)
+
+def possui_assinatura(caminho_pdf):
+    """Se o PDF possui campo de assinatura digital (/SigFlags ou campo /Sig), lido com o pikepdf"""
+    from ai.ocr_service import _anotacao_de_assinatura
+
+    with pikepdf.open(caminho_pdf) as pdf:
+        acroform = pdf.Root.get('/AcroForm')
+        if acroform is not None and acroform.get('/SigFlags'):
+            return True
+        for page in pdf.pages:
+            if any(_anotacao_de_assinatura(annot) for annot in page.obj.get('/Annots') or []):
+                return True
+    return False
+
+def iterar_textos(caminho_pdf):
+    """
+    Texto de cada página de um PDF grande (ver documento_grande), com o
+    pypdfium2 se instalado: ele lê uma página por vez, os outros backends
+    carregam o arquivo inteiro
+    """
+    return iterar_paginas(caminho_pdf, 'pypdfium2' if PDFIUM_AVAILABLE else None)
+
+def processar_em_janelas(input_file_path, output_file_path, total_paginas, options):
+    """
+    Aplica o OCR (process_pdf_with_ocr) em cada janela de páginas e reúne o resultado
+
+    Cada janela segue pelo processamento normal (pré-análise, cache por página,
+    OCR paralelo, novo OCR das páginas fracas) com o prazo que resta ao
+    documento; o resultado tem o mesmo formato do de process_pdf_with_ocr, com
+    'windows' no plano. O cache por documento é consultado e gravado aqui, para
+    o documento inteiro. Na etapa 'ocr' o progresso é contado em páginas do
+    documento (ver _progresso_documento).
+    """
+    from ai.ocr_service import process_pdf_with_ocr, _notificar_progresso, _configuracao_ocr, _motor_ocr, \
+        _resultado_do_cache
+
+    start_time = time.time()
+    paginas_por_janela = max(1, int(options.get('window_pages') or Config.OCR_WINDOW_PAGES))
+    janelas = [(inicio, min(inicio + paginas_por_janela, total_paginas))
+               for inicio in range(0, total_paginas, paginas_por_janela)]
+    force_ocr = options.get('force_ocr', Config.OCR_FORCE_OCR)
+    pasta_temp = tempfile.mkdtemp(prefix='ocr_janelas_', dir=Config.TEMP_DIRECTORY)
+    montagem = None
+    try:
+        cache_key = None
+        if options.get('use_cache', Config.OCR_CACHE_ENABLED) and options.get('document_cache', True):
+            cache_key = ocr_cache.make_key(input_file_path, _configuracao_ocr(force_ocr, _motor_ocr(options.get('engine'))))
+            cached = ocr_cache.get(cache_key, output_file_path)
+            if cached:
+                return _resultado_do_cache(cached, output_file_path, options, start_time)
+
+        logging.info(f"PDF grande processado em {len(janelas)} janelas de até {paginas_por_janela} páginas: "
+                     f"{input_file_path} ({total_paginas} páginas)")
+        prazo = PrazoOCR(total_paginas, options.get('timeout'))
+        montagem = MontagemPDF(pasta_temp)
+        pages_text = []
+        page_confidence = []
+        page_timings = []
+        pages_retried = []
+        pages_ocr = pages_skipped = pages_cached = 0
+        estrategias = []
+
+        for numero, (inicio, fim) in enumerate(janelas):
+            entrada_janela = os.path.join(pasta_temp, f"janela_{numero:05d}.pdf")
+            saida_janela = os.path.join(pasta_temp, f"janela_{numero:05d}_ocr.pdf")
+            gravar_janela(input_file_path, inicio, fim, entrada_janela)
+
+            # Progresso e prazo do documento inteiro
+            restante = prazo.restante()
+            opcoes_janela = dict(
+                options,
+                window_pages=0,
+                document_cache=False,
+                timeout=0 if restante is None else max(restante, 0.001),
+                progress_callback=lambda etapa, atual=None, total=None, inicio=inicio, fim=fim: _notificar_progresso(
+                    options, etapa, *_progresso_documento(etapa, atual, total, inicio, fim, total_paginas)
+                )
+            )
+            resultado = process_pdf_with_ocr(entrada_janela, saida_janela, opcoes_janela)
+            os.remove(entrada_janela)
+
+            if not resultado['success']:
+                if resultado.get('timed_out'):
+                    return _resultado_janela_interrompida(resultado, inicio, pages_text, total_paginas, start_time)
+                return dict(resultado, error=f"{resultado['error']} (páginas {inicio + 1} a {fim})",
+                            processing_time=time.time() - start_time)
+
+            montagem.adicionar(saida_janela)
+            pages_text.extend(resultado['pages_text'])
+            page_confidence.extend(resultado.get('page_confidence') or [None] * (fim - inicio))
+            page_timings.extend(dict(tempo, page=tempo['page'] + inicio) for tempo in resultado['page_timings'])
+            pages_retried.extend(pagina + inicio for pagina in resultado.get('pages_retried', []))
+            pages_ocr += resultado['pages_ocr']
+            pages_skipped += resultado['pages_skipped']
+            pages_cached += resultado.get('pages_cached', 0)
+            estrategias.append(resultado['ocr_plan']['strategy'])
+
+        montagem.finalizar(output_file_path)
+        text = '\n'.join(pages_text).strip()
+        processing_time = time.time() - start_time
+
+        if cache_key and pages_text:
+            ocr_cache.put(cache_key, output_file_path, pages_text, {
+                'pages_processed': total_paginas,
+                'page_confidence': page_confidence
+            })
+
+        plano = {
+            'strategy': 'skip' if all(e == 'skip' for e in estrategias) else 'windows',
+            'total_pages': total_paginas,
+            'pages': None,
+            'windows': len(janelas),
+            'window_pages': paginas_por_janela,
+            'window_strategies': estrategias,
+            'reasons': [f'Documento grande: {len(janelas)} janelas de até {paginas_por_janela} páginas']
+        }
+        return {
+            'success': True,
+            'processing_time': processing_time,
+            'pages_processed': total_paginas,
+            'pages_ocr': pages_ocr,
+            'pages_skipped': pages_skipped,
+            'pages_cached': pages_cached,
+            'page_timings': page_timings,
+            'output_file': output_file_path,
+            'text': text,
+            'pages_text': pages_text,
+            'page_confidence': page_confidence,
+            'pages_retried': pages_retried,
+            'cached': False,
+            'ocr_plan': plano,
+            'message': f'PDF processado com sucesso em {processing_time:.2f} segundos '
+                       f'({len(janelas)} janelas de até {paginas_por_janela} páginas)'
+        }
+
+    except JobCancelledError:
+        raise
+    except Exception as e:
+        import traceback
+        logging.error(traceback.format_exc())
+        return {
+            'success': False,
+            'error': f'Erro no processamento OCR: {str(e)}',
+            'processing_time': time.time() - start_time
+        }
+    finally:
+        if montagem is not None:
+            montagem.fechar()
+        shutil.rmtree(pasta_temp, ignore_errors=True)
+
+def _progresso_documento(etapa, atual, total, inicio, fim, total_paginas):
+    """
+    Progresso da janela convertido para o documento: na etapa 'ocr', as páginas
+    com OCR concluídas na janela viram páginas do documento (proporcionalmente)
+    """
+    if etapa != 'ocr' or atual is None or not total:
+        return atual, total
+    return inicio + round(atual * (fim - inicio) / total), total_paginas
+
+def _resultado_janela_interrompida(resultado, inicio, pages_text, total_paginas, start_time):
+    """Resultado do documento quando o prazo acaba em uma janela (as janelas anteriores estão completas)"""
+    pages_text = pages_text + resultado['pages_text']
+    pages_text += [''] * (total_paginas - len(pages_text))
+    pendentes = [pagina + inicio for pagina in resultado['pages_pending']]
+    pendentes += list(range(inicio + len(resultado['pages_text']) + 1, total_paginas + 1))
+    ultima_pagina = inicio + resultado['timed_out_after_page']
+    return dict(
+        resultado,
+        error=f'Tempo limite do OCR excedido após a página {ultima_pagina} de {total_paginas}',
+        timed_out_after_page=ultima_pagina,
+        pages_pending=pendentes,
+        pages_processed=total_paginas - len(pendentes),
+        pages_text=pages_text,
+        text='\n'.join(pages_text).strip(),
+        processing_time=time.time() - start_time
+    )
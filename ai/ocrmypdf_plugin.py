@@ -0,0 +1,104 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# Plugin do ocrmypdf (plugins=['ai.ocrmypdf_plugin']), executado nos processos do próprio ocrmypdf:
+# - reduz a resolução e aplica o pré-processamento de ai.image_preprocessing na imagem
+#   que o Tesseract recebe (--axion-target-dpi e --axion-preprocess no novo OCR das
+#   páginas com confiança baixa)
+# - devolve as coordenadas do hOCR das páginas endireitadas para a página original, antes
+#   de o ocrmypdf gerar a camada de texto (a imagem visível não é girada)
+# - copia o hOCR de cada página para a pasta axion_hocr_dir (usado no cache de OCR por página)
+# - verifica o cancelamento do job (ai.jobs) a cada página concluída, quando o ocrmypdf roda
+#   no processo do job (sem prazo, ver ai.ocr_budget.executar_com_prazo)
+
+import os
+import shutil
+from ocrmypdf import hookimpl
+from ocrmypdf.builtin_plugins.tesseract_ocr import TesseractOcrEngine
+from ocrmypdf.builtin_plugins.tesseract_ocr import filter_ocr_image as reduzir_para_tesseract
+from config import Config
+from ai.image_preprocessing import (ajustar_resolucao, preprocessar_pagina, desfazer_inclinacao_hocr,
+                                    PREPROCESSING_AVAILABLE)
+
+# Inclinação corrigida na imagem do OCR de cada página ({número da página (base 0): graus});
+# a imagem do OCR e o hOCR da página são gerados no mesmo processo do ocrmypdf
+_inclinacoes = {}
+
+@hookimpl
+def add_options(parser):
+    grupo = parser.add_argument_group('AxionDocs')
+    grupo.add_argument('--axion-hocr-dir', default=None, help='Pasta em que o hOCR de cada página é copiado')
+    grupo.add_argument('--axion-target-dpi', type=float, default=None,
+                       help='Resolução enviada ao Tesseract (padrão: Config.OCR_TARGET_DPI)')
+    grupo.add_argument('--axion-preprocess', action='store_true',
+                       help='Pré-processar a imagem mesmo com Config.OCR_PREPROCESS desligado')
+
+@hookimpl
+def filter_ocr_image(page, image):
+    # O hook retorna o primeiro resultado: manter a redução de imagens grandes do plugin do Tesseract
+    image = reduzir_para_tesseract(page=page, image=image)
+    if not PREPROCESSING_AVAILABLE:
+        return image
+    image = ajustar_resolucao(image, page.options.axion_target_dpi)
+    _inclinacoes.pop(page.pageno, None)
+    if Config.OCR_PREPROCESS or page.options.axion_preprocess:
+        image = preprocessar_pagina(image)
+        if image.info.get('inclinacao'):
+            _inclinacoes[page.pageno] = image.info['inclinacao']
+    return image
+
+class TesseractGuardandoHocr(TesseractOcrEngine):
+    """Tesseract do ocrmypdf que alinha o hOCR à página original e guarda uma cópia de cada página"""
+
+    @staticmethod
+    def generate_hocr(input_file, output_hocr, output_text, options):
+        TesseractOcrEngine.generate_hocr(input_file, output_hocr, output_text, options)
+        # O nome (NNNNNN_ocr_hocr.hocr) traz o número da página (base 1)
+        angulo = _inclinacoes.pop(int(os.path.basename(output_hocr)[:6]) - 1, None)
+        if angulo:
+            with open(output_hocr, 'r', encoding='utf-8') as f:
+                hocr = f.read()
+            with open(output_hocr, 'w', encoding='utf-8') as f:
+                f.write(desfazer_inclinacao_hocr(hocr, angulo))
+        if options.axion_hocr_dir:
+            shutil.copyfile(output_hocr, os.path.join(options.axion_hocr_dir, os.path.basename(output_hocr)))
+
+@hookimpl
+def get_ocr_engine():
+    return TesseractGuardandoHocr()
+
+class ProgressoCancelavel:
+    """
+    "Barra de progresso" do ocrmypdf que não mostra nada: as atualizações
+    chegam na thread que chamou ocrmypdf.ocr a cada etapa concluída (uma
+    página, no OCR), e o cancelamento do job dessa thread interrompe o
+    ocrmypdf, que descarta as páginas que ainda não começaram
+    """
+
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def update(self, n=1, *, completed=None):
+        from ai.jobs import job_manager
+        job_manager.verificar_cancelamento()
+
+@hookimpl
+def get_progressbar_class():
+    return ProgressoCancelavel
@@ -16,11 +16,50 @@ Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São
 
 # (O conteúdo será movido do app_ocr_melhor.py) 
 
+import os
 import openai
+import httpx
 import re
 import json
+import threading
 from config import Config
 
+# Cliente da OpenAI compartilhado pelas chamadas do processo: o pool de conexões HTTP (e as
+# sessões TLS) é reaproveitado entre as requisições em vez de ser descartado a cada chamada
+_client = None
+_client_key = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+def get_openai_client():
+    """
+    Retorna o cliente da OpenAI do processo, criado no primeiro uso
+
+    O cliente (e o httpx.Client por baixo dele) é seguro para uso entre
+    threads. O pool de conexões, os tempos limite e o keep-alive vêm de
+    Config.OPENAI_*; um processo criado por fork, ou uma troca de
+    OPENAI_API_KEY, ganha um cliente novo.
+    """
+    global _client, _client_key, _client_pid
+    with _client_lock:
+        if _client is None or _client_key != Config.OPENAI_API_KEY or _client_pid != os.getpid():
+            http_client = openai.DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=Config.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=Config.OPENAI_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(Config.OPENAI_TIMEOUT, connect=Config.OPENAI_CONNECT_TIMEOUT)
+            )
+            _client = openai.OpenAI(
+                api_key=Config.OPENAI_API_KEY,
+                http_client=http_client,
+                max_retries=Config.OPENAI_MAX_RETRIES
+            )
+            _client_key = Config.OPENAI_API_KEY
+            _client_pid = os.getpid()
+        return _client
+
 def identify_document_type_from_filename(filename):
     """Identifica o tipo do documento baseado no nome do arquivo"""
     if not filename:
@@ -200,7 +239,7 @@ Responda apenas com o tipo do documento, sem explicações.
         if not Config.OPENAI_API_KEY:
             raise ValueError("A variável de ambiente OPENAI_API_KEY não está definida!")
         
-        client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        client = get_openai_client()
         response = client.chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt_classificacao}],
@@ -564,7 +603,7 @@ Sua tarefa é extrair **TODOS OS DADOS RELEVANTES** do documento, independenteme
         if not Config.OPENAI_API_KEY:
             raise ValueError("A variável de ambiente OPENAI_API_KEY não está definida!")
         
-        client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        client = get_openai_client()
         response = client.chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
@@ -764,7 +803,7 @@ CHECKLIST A SER RESPONDIDO:
         if not Config.OPENAI_API_KEY:
             raise ValueError("A variável de ambiente OPENAI_API_KEY não está definida!")
         
-        client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        client = get_openai_client()
         response = client.chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
@@ -945,7 +984,7 @@ def extract_fields_with_openai(text, model="gpt-4o", service_type="certidao"):
         
         # Fazer a chamada para a API OpenAI
         print("📡 Enviando requisição para OpenAI...")
-        client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        client = get_openai_client()
         response = client.chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
@@ -1045,7 +1084,7 @@ def extract_relevant_sections(document_text, doc_type):
             raise ValueError("A variável de ambiente OPENAI_API_KEY não está definida!")
         
         print("📡 Enviando requisição para OpenAI (Análise de Qualificação)...")
-        client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        client = get_openai_client()
         response = client.chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
@@ -0,0 +1,170 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# Remoção de cabeçalhos e rodapés repetidos antes do envio à OpenAI
+#
+# Matrículas e certidões repetem em toda página o cabeçalho do cartório, o
+# rodapé "Página X de Y", códigos de validação e selos. Esse texto não muda a
+# extração dos campos, mas é cobrado em tokens a cada chamada. Aqui são
+# procuradas as linhas que se repetem na mesma posição no topo (cabeçalho) ou
+# no fim (rodapé) de muitas páginas, comparadas sem os códigos e sem os
+# contadores de página ("Página 3 de 40", "Fls. 3", "3/40"), que mudam de
+# página para página. Só as linhas seguidas a partir do topo ou do fim da
+# página são removidas; a primeira ocorrência fica no texto.
+
+import re
+import math
+import logging
+from config import Config
+from ai.text_normalization import normalizar_paginas, juntar_paginas, texto_normalizado
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    # Sem tiktoken os tokens são estimados em 4 caracteres por token
+    TIKTOKEN_AVAILABLE = False
+
+# Códigos de validação, selos e hashes: 12 ou mais letras e números misturados
+_CODIGO = re.compile(r'\b(?=[A-Za-z]*\d)(?=\d*[A-Za-z])[A-Za-z0-9]{12,}\b')
+
+# Contadores de página, também dentro de linhas longas ("... INTEIRO TEOR - Página 1 de 10");
+# "N/M" só isolado, para não confundir com datas (12/03/2015) e números (4.321/2016)
+_CONTADOR_PAGINA = re.compile(
+    r'\b(?:p[áa]gina|p[áa]g|folhas?|fls?|ficha)\.?\s*(?:n[º°o.]\s*)?\d+(?:\s*(?:de|/)\s*\d+)?'
+    r'|(?<![\d.,/])\d{1,4}\s*/\s*\d{1,4}(?![\d.,/])',
+    re.IGNORECASE
+)
+
+_codificador = None
+
+def estimar_tokens(texto):
+    """Número de tokens do texto (tiktoken, se instalado; senão estimado pelo tamanho)"""
+    global _codificador
+    if not texto:
+        return 0
+    if TIKTOKEN_AVAILABLE:
+        if _codificador is None:
+            _codificador = tiktoken.get_encoding('o200k_base')
+        return len(_codificador.encode(texto, disallowed_special=()))
+    return math.ceil(len(texto) / 4)
+
+def _chave_linha(linha):
+    """Linha comparada entre páginas: sem códigos, contadores de página, caixa e espaços extras"""
+    linha = _CONTADOR_PAGINA.sub('<página>', _CODIGO.sub('§', linha))
+    return ' '.join(linha.lower().split())
+
+def remover_linhas_repetidas(paginas, linhas_borda=None, proporcao_minima=None):
+    """
+    Remove os cabeçalhos e rodapés repetidos em muitas páginas
+
+    Cada uma das `linhas_borda` primeiras linhas (não vazias) da página é
+    comparada com a linha da mesma posição no topo das outras páginas, e as
+    últimas com as da mesma posição contada do fim. Uma linha é repetida se
+    aparecer na mesma posição em pelo menos `proporcao_minima` das páginas (e
+    em no mínimo 2). Em cada página só sai a sequência de linhas repetidas
+    encostada no topo ou no fim; uma linha do corpo nunca é removida, mesmo
+    que se repita. Documentos com menos de Config.LLM_BOILERPLATE_MIN_PAGES
+    páginas não são alterados.
+
+    Args:
+        paginas: Texto de cada página (com as quebras de linha)
+        linhas_borda: Linhas examinadas no topo e no fim de cada página
+            (padrão: Config.LLM_BOILERPLATE_EDGE_LINES)
+        proporcao_minima: Fração das páginas (padrão: Config.LLM_BOILERPLATE_MIN_PAGE_RATIO)
+
+    Returns:
+        tuple: (texto de cada página sem as repetições, linhas removidas)
+    """
+    paginas = list(paginas)
+    linhas_borda = linhas_borda if linhas_borda is not None else Config.LLM_BOILERPLATE_EDGE_LINES
+    proporcao_minima = proporcao_minima if proporcao_minima is not None else Config.LLM_BOILERPLATE_MIN_PAGE_RATIO
+    if not linhas_borda or len(paginas) < max(2, Config.LLM_BOILERPLATE_MIN_PAGES):
+        return paginas, []
+
+    # Chave de cada linha das bordas: ('topo', posição, linha) ou ('fim', posição a partir do fim, linha)
+    linhas_paginas = []
+    contagem = {}
+    for texto in paginas:
+        linhas = [linha for linha in (texto or '').splitlines() if linha.strip()]
+        topo = [('topo', posicao, _chave_linha(linha)) for posicao, linha in enumerate(linhas[:linhas_borda])]
+        fim = [('fim', posicao, _chave_linha(linha))
+               for posicao, linha in enumerate(reversed(linhas[-linhas_borda:]))]
+        linhas_paginas.append((linhas, topo, fim))
+        for chave in set(topo + fim):
+            if chave[2]:
+                contagem[chave] = contagem.get(chave, 0) + 1
+
+    minimo = max(2, math.ceil(proporcao_minima * len(paginas)))
+    repetidas = {chave for chave, paginas_com_linha in contagem.items() if paginas_com_linha >= minimo}
+    if not repetidas:
+        return paginas, []
+
+    vistas = set()
+    removidas = []
+    resultado = []
+    for linhas, topo, fim in linhas_paginas:
+        # Linhas repetidas seguidas a partir do topo e a partir do fim
+        cabecalho = 0
+        while cabecalho < len(topo) and topo[cabecalho] in repetidas:
+            cabecalho += 1
+        rodape = 0
+        while rodape < len(fim) and rodape < len(linhas) - cabecalho and fim[rodape] in repetidas:
+            rodape += 1
+
+        mantidas = []
+        for posicao, linha in enumerate(linhas):
+            if posicao < cabecalho:
+                chave = topo[posicao]
+            elif posicao >= len(linhas) - rodape:
+                chave = fim[len(linhas) - 1 - posicao]
+            else:
+                mantidas.append(linha)
+                continue
+            if chave in vistas:
+                removidas.append(linha)
+                continue
+            vistas.add(chave)
+            mantidas.append(linha)
+        resultado.append('\n'.join(mantidas))
+    return resultado, removidas
+
+def texto_para_llm(resultado):
+    """
+    Texto normalizado do resultado do OCR sem os cabeçalhos e rodapés repetidos
+
+    É calculado uma vez e guardado no próprio resultado ('llm_text'), com a
+    economia em 'llm_boilerplate' (linhas removidas, tokens antes e depois e
+    tokens economizados).
+    """
+    if 'llm_text' not in resultado:
+        paginas = resultado.get('pages_text')
+        if paginas is None:
+            paginas = [resultado.get('text', '')]
+        limpas, removidas = remover_linhas_repetidas(paginas)
+        texto = juntar_paginas(normalizar_paginas(limpas)) if removidas else texto_normalizado(resultado)
+        tokens_antes = estimar_tokens(texto_normalizado(resultado))
+        tokens_depois = estimar_tokens(texto) if removidas else tokens_antes
+        resultado['llm_text'] = texto
+        resultado['llm_boilerplate'] = {
+            'lines_removed': len(removidas),
+            'tokens_before': tokens_antes,
+            'tokens_after': tokens_depois,
+            'tokens_saved': tokens_antes - tokens_depois,
+            'tokens_estimated': not TIKTOKEN_AVAILABLE
+        }
+        if removidas:
+            logging.info(f"{len(removidas)} linhas repetidas (cabeçalhos/rodapés) removidas antes da IA: "
+                         f"{tokens_antes - tokens_depois} tokens economizados ({tokens_antes} -> {tokens_depois})")
+    return resultado['llm_text']
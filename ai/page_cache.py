@@ -0,0 +1,303 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+import os
+import re
+import html
+import json
+import hashlib
+import logging
+import threading
+import time
+from config import Config
+from security import secure_manager
+from ai import ocr_capabilities
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+# Dimensões da página no hOCR do Tesseract (pixels da imagem reconhecida)
+_HOCR_BBOX_PAGINA = re.compile(r"class=['\"]ocr_page['\"][^>]*?bbox (\d+) (\d+) (\d+) (\d+)")
+
+# Nome dos arquivos hOCR gravados pelo OCR (mesmo padrão da pasta de trabalho do ocrmypdf)
+_NOME_HOCR = re.compile(r'^(\d{6})_ocr_hocr\.hocr$')
+
+def ler_pasta_hocr(pasta):
+    """Lê os arquivos hOCR de uma pasta ({índice da página (base 0): hOCR})"""
+    resultado = {}
+    if not pasta or not os.path.isdir(pasta):
+        return resultado
+    for filename in os.listdir(pasta):
+        nome = _NOME_HOCR.match(filename)
+        if nome:
+            with open(os.path.join(pasta, filename), 'r', encoding='utf-8') as f:
+                resultado[int(nome.group(1)) - 1] = f.read()
+    return resultado
+
+def nome_arquivo_hocr(indice):
+    """Nome do arquivo hOCR da página (índice base 0)"""
+    return f"{indice + 1:06d}_ocr_hocr.hocr"
+
+# Linhas e palavras do hOCR
+_HOCR_LINHA = re.compile(r"<span class=['\"](?:ocr_line|ocr_textfloat|ocr_header|ocr_caption)['\"].*?</span>\s*</span>", re.S)
+_HOCR_PALAVRA = re.compile(r"<span class=['\"]ocrx_word['\"][^>]*>(.*?)</span>", re.S)
+_TAG = re.compile(r'<[^>]+>')
+
+def texto_hocr(hocr):
+    """Texto de uma página a partir do hOCR (uma linha do documento por linha)"""
+    linhas = []
+    for linha in _HOCR_LINHA.finditer(hocr or ''):
+        palavras = [html.unescape(_TAG.sub('', palavra)) for palavra in _HOCR_PALAVRA.findall(linha.group(0))]
+        if palavras:
+            linhas.append(' '.join(palavras))
+    return '\n'.join(linhas)
+
+# Confiança de cada palavra no hOCR (0-100)
+_HOCR_CONFIANCA = re.compile(r"<span class=['\"]ocrx_word['\"][^>]*?x_wconf (\d+)[^>]*>(.*?)</span>", re.S)
+
+def confianca_hocr(hocr):
+    """Confiança média das palavras reconhecidas na página (0-100), ou None se não houver palavras"""
+    confiancas = [
+        int(confianca) for confianca, palavra in _HOCR_CONFIANCA.findall(hocr or '')
+        if _TAG.sub('', palavra).strip()
+    ]
+    if not confiancas:
+        return None
+    return round(sum(confiancas) / len(confiancas), 1)
+
+class PageCache:
+    """
+    Cache de OCR por página, endereçado pela imagem da página
+
+    Folhas de rosto do cartório, selos de emolumentos, modelos "Página x de y"
+    e as páginas antigas de uma matrícula pedida de novo com averbações novas
+    se repetem entre documentos diferentes. Cada página é renderizada em baixa
+    resolução (Config.OCR_PAGE_CACHE_DPI), em tons de cinza quantizados em 16
+    níveis, e o SHA-256 desses pixels mais as configurações do OCR identifica
+    a entrada, que guarda o texto e o hOCR reconhecidos pelo Tesseract.
+
+    A chave é exata: páginas que diferem em um dígito têm pixels diferentes e
+    não compartilham entrada, para nunca devolver o texto de outro documento.
+    Entradas expiram em Config.MAX_FILE_AGE e o tamanho total é limitado
+    (as menos usadas são removidas primeiro), como no cache de documentos.
+    Com Config.ENCRYPT_TEMP_FILES, o texto e o hOCR das entradas são cifrados.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or Config.OCR_PAGE_CACHE_DIRECTORY
+        self.max_bytes = max_bytes if max_bytes is not None else Config.OCR_PAGE_CACHE_MAX_BYTES
+        self.lock = threading.Lock()
+        # Última remoção de entradas expiradas (0 = ainda não feita; ver _preparar)
+        self.ultima_limpeza = 0
+
+    @property
+    def available(self):
+        return PDFIUM_AVAILABLE and self.max_bytes > 0 and ocr_capabilities.hocr_available()
+
+    def make_keys(self, pdf, paginas, settings=None):
+        """
+        Gera a chave de cada página a partir da imagem renderizada
+
+        Args:
+            pdf: Caminho do PDF ou stream em memória (io.BytesIO)
+            paginas: Índices (base 0) das páginas
+            settings: Configurações do OCR que alteram o resultado
+
+        Returns:
+            dict: {índice: chave}
+        """
+        configuracao = json.dumps(settings or {}, sort_keys=True).encode('utf-8')
+        if hasattr(pdf, 'seek'):
+            pdf.seek(0)
+        documento = pdfium.PdfDocument(pdf)
+        try:
+            chaves = {}
+            for indice in paginas:
+                pixels = documento[indice].render(scale=Config.OCR_PAGE_CACHE_DPI / 72, grayscale=True).to_numpy()
+                digest = hashlib.sha256()
+                digest.update(f'{pixels.shape[1]}x{pixels.shape[0]}'.encode('ascii'))
+                digest.update((pixels >> 4).tobytes())
+                digest.update(configuracao)
+                chaves[indice] = digest.hexdigest()
+            return chaves
+        finally:
+            documento.close()
+            if hasattr(pdf, 'seek'):
+                pdf.seek(0)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """
+        Busca uma página no cache
+
+        Returns:
+            dict: Texto, hOCR e confiança (se houver), ou None se não estiver em cache
+        """
+        path = self._path(key)
+        with self.lock:
+            self._preparar()
+            if not os.path.exists(path):
+                return None
+            try:
+                with open(path, 'rb') as f:
+                    dados = f.read()
+                if Config.ENCRYPT_TEMP_FILES:
+                    dados = secure_manager.fernet.decrypt(dados)
+                entrada = json.loads(dados.decode('utf-8'))
+                if self._expirado(entrada):
+                    self._remover(key)
+                    return None
+                # Marcar a entrada como usada recentemente (LRU)
+                os.utime(path, None)
+                return entrada
+            except Exception as e:
+                logging.warning(f"Entrada de cache de páginas inválida {key}: {e}")
+                self._remover(key)
+                return None
+
+    def get_many(self, keys):
+        """Busca várias páginas ({índice: chave}) e retorna as encontradas ({índice: entrada})"""
+        encontradas = {}
+        for indice, key in keys.items():
+            entrada = self.get(key)
+            if entrada is not None:
+                encontradas[indice] = entrada
+        if encontradas:
+            logging.info(f"{len(encontradas)} de {len(keys)} páginas encontradas no cache de OCR por página")
+        return encontradas
+
+    def put_many(self, entries):
+        """
+        Armazena várias páginas e aplica o limite de tamanho uma única vez
+
+        Args:
+            entries: {chave: {'text': texto, 'hocr': hOCR ou None, 'confidence': confiança ou None}}
+        """
+        if self.max_bytes <= 0 or not entries:
+            return False
+        try:
+            with self.lock:
+                self._preparar()
+                for key, entrada in entries.items():
+                    dados = json.dumps(dict(entrada, created_at=time.time()), ensure_ascii=False).encode('utf-8')
+                    if Config.ENCRYPT_TEMP_FILES:
+                        # Texto e hOCR das páginas cifrados como os demais arquivos temporários
+                        dados = secure_manager.fernet.encrypt(dados)
+                    path = self._path(key)
+                    # Gravar em arquivo temporário e renomear para não expor entradas incompletas
+                    with open(path + '.tmp', 'wb') as f:
+                        f.write(dados)
+                    os.replace(path + '.tmp', path)
+                self._evict()
+            return True
+        except Exception as e:
+            logging.error(f"Erro ao gravar páginas no cache de OCR: {e}")
+            return False
+
+    def _preparar(self):
+        """Cria a pasta no primeiro uso e remove entradas expiradas a cada Config.CLEANUP_INTERVAL (com o lock)"""
+        agora = time.time()
+        if agora - self.ultima_limpeza < Config.CLEANUP_INTERVAL.total_seconds():
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._evict()
+        self.ultima_limpeza = agora
+
+    def _expirado(self, entrada):
+        return time.time() - entrada.get('created_at', 0) > Config.MAX_FILE_AGE.total_seconds()
+
+    def _remover(self, key):
+        path = self._path(key)
+        if os.path.exists(path):
+            secure_manager.secure_delete(path)
+
+    def _evict(self):
+        """Remove entradas expiradas e, se necessário, as menos usadas até caber no limite"""
+        entradas = []
+        total_bytes = 0
+        limite_idade = time.time() - Config.MAX_FILE_AGE.total_seconds()
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            key = filename[:-len('.json')]
+            path = self._path(key)
+            try:
+                # A data de uso (mtime) nunca é anterior à criação da entrada
+                modificado = os.path.getmtime(path)
+                if modificado < limite_idade:
+                    self._remover(key)
+                    continue
+                tamanho = os.path.getsize(path)
+                entradas.append((modificado, key, tamanho))
+                total_bytes += tamanho
+            except OSError:
+                continue
+
+        # Menos usadas primeiro
+        entradas.sort()
+        for _, key, tamanho in entradas:
+            if total_bytes <= self.max_bytes:
+                break
+            self._remover(key)
+            total_bytes -= tamanho
+            logging.info(f"Página removida do cache de OCR (LRU): {key[:12]}")
+
+def aplicar_camadas_hocr(pdf_path, hocr_por_pagina, pasta_temp):
+    """
+    Sobrepõe às páginas do PDF a camada de texto invisível gerada a partir do hOCR
+
+    Usado nas páginas encontradas no cache, que não passam pelo Tesseract.
+    A resolução do hOCR é deduzida da largura da imagem reconhecida e da
+    largura da página.
+
+    Args:
+        pdf_path: PDF alterado no próprio arquivo
+        hocr_por_pagina: {índice: hOCR}
+        pasta_temp: Pasta para os arquivos intermediários
+    """
+    import pikepdf
+    from ocrmypdf.hocrtransform import HocrTransform
+
+    camadas = []
+    try:
+        with pikepdf.open(pdf_path, allow_overwriting_input=True) as pdf:
+            for indice, hocr in sorted(hocr_por_pagina.items()):
+                bbox = _HOCR_BBOX_PAGINA.search(hocr or '')
+                if not bbox:
+                    continue
+                pagina = pdf.pages[indice]
+                largura_pontos = float(pagina.mediabox[2]) - float(pagina.mediabox[0])
+                dpi = (int(bbox.group(3)) - int(bbox.group(1))) * 72 / largura_pontos
+
+                caminho_hocr = os.path.join(pasta_temp, nome_arquivo_hocr(indice))
+                caminho_camada = os.path.join(pasta_temp, f"pagina_{indice:05d}_cache.pdf")
+                with open(caminho_hocr, 'w', encoding='utf-8') as f:
+                    f.write(hocr)
+                HocrTransform(hocr_filename=caminho_hocr, dpi=dpi).to_pdf(out_filename=caminho_camada,
+                                                                            invisible_text=True)
+                camada = pikepdf.open(caminho_camada)
+                camadas.append(camada)
+                pagina.add_overlay(camada.pages[0])
+            pdf.save(pdf_path)
+    finally:
+        for camada in camadas:
+            camada.close()
+
+# Instância global do cache de OCR por página
+page_cache = PageCache()
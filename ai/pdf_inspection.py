@@ -0,0 +1,188 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from config import Config
+from ai.pdf_text import extrair_paginas
+
+try:
+    from PyPDF2 import PdfReader
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+    logging.warning("PyPDF2 não está disponível. A inspeção de PDFs não funcionará.")
+
+def _resolve(obj):
+    """Resolve referências indiretas do PyPDF2"""
+    return obj.get_object() if hasattr(obj, 'get_object') else obj
+
+def _recursos_da_pagina(page):
+    """
+    Analisa os recursos de uma página
+
+    Returns:
+        tuple: (número de imagens, se usa fontes, DPI estimado da maior imagem ou None)
+    """
+    try:
+        resources = _resolve(page.get('/Resources')) or {}
+        fontes = bool(_resolve(resources.get('/Font')))
+        xobjects = _resolve(resources.get('/XObject')) or {}
+        # A largura da página em polegadas: imagens escaneadas costumam ocupar a página inteira
+        largura_pol = float(page.mediabox.width) / 72 or 1
+        if int(_resolve(page.get('/Rotate')) or 0) % 180:
+            largura_pol = float(page.mediabox.height) / 72 or 1
+
+        imagens = 0
+        maior_largura = 0
+        for nome in xobjects:
+            xobject = _resolve(xobjects[nome])
+            if xobject.get('/Subtype') != '/Image':
+                continue
+            imagens += 1
+            maior_largura = max(maior_largura, int(_resolve(xobject.get('/Width')) or 0))
+
+        dpi = round(maior_largura / largura_pol) if imagens else None
+        return imagens, fontes, dpi
+    except (TypeError, AttributeError, KeyError, ValueError, ZeroDivisionError):
+        return 0, False, None
+
+class PDFInspection:
+    """
+    Informações de um PDF obtidas em uma única leitura do arquivo
+
+    Atributos:
+        path: Caminho do PDF (None para PDFs em memória: o stream não fica guardado)
+        byte_size: Tamanho do arquivo em bytes
+        page_count: Número de páginas
+        page_texts: Texto extraído de cada página
+        page_annotations: Número de anotações em cada página
+        page_images: Número de imagens em cada página
+        page_fonts: Se cada página usa fontes (indício de camada de texto)
+        page_dpi: Resolução estimada da maior imagem de cada página (None se não houver imagem)
+        has_annotations: Se alguma página possui anotações
+        has_signature: Se o PDF possui campo de assinatura digital (/SigFlags ou campo /Sig)
+        encrypted: Se o PDF está criptografado (mesmo que com senha de usuário vazia)
+    """
+
+    def __init__(self, path):
+        self.path = None if hasattr(path, 'getbuffer') else path
+        self.byte_size = path.getbuffer().nbytes if hasattr(path, 'getbuffer') else os.path.getsize(path)
+        self.page_texts = []
+        self.page_annotations = []
+        self.page_images = []
+        self.page_fonts = []
+        self.page_dpi = []
+        self.has_signature = False
+
+        reader = PdfReader(path)
+        self.encrypted = reader.is_encrypted
+
+        # Texto pelo backend de extração (Config.PDF_TEXT_BACKEND); o PyPDF2 só se ele falhar
+        try:
+            textos = extrair_paginas(path)
+        except Exception as e:
+            logging.warning(f"Erro ao extrair o texto de {path}; usando o PyPDF2: {e}")
+            textos = None
+        if textos is not None and len(textos) != len(reader.pages):
+            textos = None
+
+        try:
+            acroform = _resolve(reader.trailer['/Root'].get('/AcroForm'))
+            if acroform:
+                if int(_resolve(acroform.get('/SigFlags')) or 0) > 0:
+                    self.has_signature = True
+                for field in _resolve(acroform.get('/Fields')) or []:
+                    if _resolve(field).get('/FT') == '/Sig':
+                        self.has_signature = True
+        except (TypeError, AttributeError, KeyError, ValueError) as e:
+            logging.warning(f"Não foi possível ler o formulário (AcroForm) de {path}: {e}")
+
+        for page in reader.pages:
+            try:
+                annots = _resolve(page.get('/Annots')) or []
+                total_annots = len(annots)
+                for annot in annots:
+                    if _resolve(annot).get('/FT') == '/Sig':
+                        self.has_signature = True
+            except (TypeError, AttributeError, KeyError):
+                # Anotações malformadas: contar a página como anotada, por segurança
+                total_annots = 1
+            self.page_annotations.append(total_annots)
+
+            imagens, fontes, dpi = _recursos_da_pagina(page)
+            self.page_images.append(imagens)
+            self.page_fonts.append(fontes)
+            self.page_dpi.append(dpi)
+
+            if textos is not None:
+                self.page_texts.append(textos[len(self.page_texts)])
+                continue
+            try:
+                self.page_texts.append(page.extract_text() or '')
+            except Exception as e:
+                logging.warning(f"Erro ao extrair texto de uma página de {path}: {e}")
+                self.page_texts.append('')
+
+        self.page_count = len(self.page_texts)
+        self.has_annotations = any(self.page_annotations)
+
+    @property
+    def text(self):
+        """Texto completo do documento, uma página por linha"""
+        return '\n'.join(self.page_texts)
+
+_inspections = OrderedDict()
+_inspections_lock = threading.Lock()
+
+def inspect_pdf(path):
+    """
+    Retorna a inspeção do PDF, reaproveitando a leitura anterior do mesmo arquivo
+
+    A inspeção fica em cache por processo, identificada pelo caminho, data de
+    modificação e tamanho do arquivo; se o arquivo mudar, ele é lido de novo.
+    PDFs em memória (io.BytesIO, PDFs assinados já limpos) são lidos a cada
+    chamada e não entram no cache: a inspeção guarda o texto de todas as
+    páginas, que ficaria em memória depois de o documento ser descartado.
+
+    Args:
+        path: Caminho do PDF ou stream em memória (io.BytesIO)
+
+    Returns:
+        PDFInspection: Informações do PDF
+    """
+    if not PDF_AVAILABLE:
+        raise Exception("PyPDF2 não está disponível")
+
+    if hasattr(path, 'getbuffer'):
+        return PDFInspection(path)
+
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    with _inspections_lock:
+        inspection = _inspections.get(key)
+        if inspection is not None:
+            _inspections.move_to_end(key)
+            return inspection
+
+    inspection = PDFInspection(path)
+
+    with _inspections_lock:
+        _inspections[key] = inspection
+        while len(_inspections) > Config.PDF_INSPECTION_CACHE_SIZE:
+            _inspections.popitem(last=False)
+    return inspection
@@ -0,0 +1,136 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# Extração da camada de texto de PDFs
+#
+# Toda leitura de texto de PDF (inspeção/pré-análise, extract_text_from_pdf,
+# get_ocr_info, download do texto, extrator de memoriais e rotas) passa por
+# aqui. O backend é escolhido por Config.PDF_TEXT_BACKEND; se ele não estiver
+# instalado, vale o próximo de BACKENDS. O texto é lido página a página
+# (iterar_paginas, iterar_paginas_normalizadas): quem consome pode começar na
+# primeira página antes de a última ser lida, e só junta o documento
+# (ai.text_normalization.juntar_paginas) se precisar dele inteiro. Para
+# comparar a velocidade dos backends nos PDFs do benchmark:
+#
+#   python -m benchmarks.text_benchmark
+
+import logging
+from config import Config
+from ai.text_normalization import normalizar_paginas
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+try:
+    import pypdf
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+try:
+    import PyPDF2
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
+
+def _paginas_pdfium(pdf):
+    """pypdfium2 (PDFium): lê só as páginas pedidas, uma por vez"""
+    if hasattr(pdf, 'seek'):
+        pdf.seek(0)
+    documento = pdfium.PdfDocument(pdf)
+    try:
+        for indice in range(len(documento)):
+            pagina = documento[indice]
+            try:
+                textpage = pagina.get_textpage()
+                try:
+                    # O PDFium separa as linhas com '\r\n'
+                    yield textpage.get_text_range().replace('\r\n', '\n')
+                finally:
+                    textpage.close()
+            finally:
+                pagina.close()
+    finally:
+        documento.close()
+        if hasattr(pdf, 'seek'):
+            pdf.seek(0)
+
+def _paginas_pypdf(pdf):
+    """pypdf: carrega o arquivo inteiro em memória"""
+    for pagina in pypdf.PdfReader(pdf).pages:
+        yield pagina.extract_text() or ''
+
+def _paginas_pypdf2(pdf):
+    """PyPDF2: carrega o arquivo inteiro em memória"""
+    for pagina in PyPDF2.PdfReader(pdf).pages:
+        yield pagina.extract_text() or ''
+
+# Nome -> (disponível, função que gera o texto de cada página), do mais rápido para o mais
+# lento no benchmark. O pikepdf não extrai texto (só manipula a estrutura do PDF), por isso
+# não é um backend.
+BACKENDS = {
+    'pypdfium2': (PDFIUM_AVAILABLE, _paginas_pdfium),
+    'PyPDF2': (PYPDF2_AVAILABLE, _paginas_pypdf2),
+    'pypdf': (PYPDF_AVAILABLE, _paginas_pypdf),
+}
+
+def backends_disponiveis():
+    """Nomes dos backends instalados, em ordem de preferência"""
+    return [nome for nome, (disponivel, _) in BACKENDS.items() if disponivel]
+
+def backend_texto(backend=None):
+    """
+    Backend usado na extração: o pedido (ou Config.PDF_TEXT_BACKEND) se estiver
+    instalado, senão o primeiro disponível
+
+    Raises:
+        ValueError: Backend desconhecido
+        Exception: Nenhum backend instalado
+    """
+    backend = backend or Config.PDF_TEXT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de extração de texto desconhecido: {backend} "
+                         f"(disponíveis: {', '.join(BACKENDS)})")
+    if BACKENDS[backend][0]:
+        return backend
+    disponiveis = backends_disponiveis()
+    if not disponiveis:
+        raise Exception("Nenhuma biblioteca de extração de texto de PDF disponível. Instale pypdfium2 ou pypdf")
+    logging.warning(f"Backend de extração de texto {backend} não está instalado; usando {disponiveis[0]}")
+    return disponiveis[0]
+
+def iterar_paginas(pdf, backend=None):
+    """
+    Texto de cada página do PDF, na ordem, uma página por vez
+
+    Args:
+        pdf: Caminho do PDF ou stream em memória (io.BytesIO)
+        backend: Nome em BACKENDS (padrão: Config.PDF_TEXT_BACKEND)
+    """
+    return BACKENDS[backend_texto(backend)][1](pdf)
+
+def extrair_paginas(pdf, backend=None):
+    """Lista com o texto de cada página do PDF (ver iterar_paginas)"""
+    return list(iterar_paginas(pdf, backend))
+
+def extrair_texto(pdf, backend=None):
+    """Texto completo do PDF, uma página por linha (ver iterar_paginas)"""
+    return '\n'.join(iterar_paginas(pdf, backend))
+
+def iterar_paginas_normalizadas(pdf, backend=None):
+    """Texto de cada página do PDF normalizado (ai.text_normalization), uma página por vez"""
+    return normalizar_paginas(iterar_paginas(pdf, backend))
@@ -0,0 +1,384 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+import os
+import time
+import shutil
+import atexit
+import logging
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from config import Config
+from ai.page_cache import nome_arquivo_hocr, confianca_hocr
+from ai.ocr_preflight import texto_utilizavel
+from ai.jobs import job_manager
+from ai import ocr_capabilities
+from ai.image_preprocessing import (ajustar_resolucao, preprocessar_pagina, desfazer_inclinacao_hocr,
+                                    PREPROCESSING_AVAILABLE)
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+# Motor do Tesseract do processo (criado uma vez por processo do pool, em _iniciar_motor)
+_motor = None
+
+def _iniciar_motor(idioma):
+    """Inicializador dos processos do pool: carrega o modelo do idioma uma única vez"""
+    import tesserocr
+
+    global _motor
+    _motor = tesserocr.PyTessBaseAPI(lang=idioma)
+    atexit.register(_motor.End)
+
+def _tempo_maximo_ms(limite):
+    """
+    Tempo máximo do reconhecimento de uma página, em milissegundos (0 = sem limite):
+    Config.OCR_PAGE_TIMEOUT e o que falta até `limite` (fim do prazo do documento, em time.time())
+    """
+    limites = [Config.OCR_PAGE_TIMEOUT] if Config.OCR_PAGE_TIMEOUT else []
+    if limite is not None:
+        limites.append(max(0.001, limite - time.time()))
+    return max(1, round(min(limites) * 1000)) if limites else 0
+
+def _reconhecer(imagem, nome, pasta_temp, perfil=None, limite=None):
+    """
+    Reconhece o texto da imagem (info['dpi'] definido) com o motor já carregado do processo
+
+    O reconhecimento para sozinho no tempo máximo da página (_tempo_maximo_ms):
+    o prazo de um documento nunca exige encerrar os processos do pool, que são
+    compartilhados com os demais documentos.
+
+    Args:
+        perfil: Opções do OCR reforçado, no formato do ocrmypdf (axion_target_dpi,
+            axion_preprocess, tesseract_pagesegmode); ver ai.ocr_service._opcoes_reforco
+        limite: Fim do prazo do documento (time.time()); None = sem prazo
+
+    Returns:
+        dict: Texto, hOCR, confiança média e PDF com a camada de texto invisível
+    """
+    from ocrmypdf.hocrtransform import HocrTransform
+
+    perfil = perfil or {}
+    if PREPROCESSING_AVAILABLE:
+        imagem = ajustar_resolucao(imagem, perfil.get('axion_target_dpi'))
+        if Config.OCR_PREPROCESS or perfil.get('axion_preprocess'):
+            imagem = preprocessar_pagina(imagem)
+    dpi = imagem.info['dpi'][0]
+
+    segmentacao = perfil.get('tesseract_pagesegmode')
+    if segmentacao is not None:
+        # O motor é reaproveitado entre as páginas: restaurar o modo depois
+        segmentacao_anterior = _motor.GetPageSegMode()
+        _motor.SetPageSegMode(segmentacao)
+    try:
+        _motor.SetImage(imagem)
+        _motor.SetSourceResolution(round(dpi))
+        if not _motor.Recognize(_tempo_maximo_ms(limite)):
+            # Tempo esgotado: fica o que o Tesseract reconheceu até ali
+            logging.warning(f"OCR de {nome} interrompido pelo tempo limite da página")
+        texto = _motor.GetUTF8Text()
+        # Coordenadas da imagem endireitada de volta para a página, que não é girada
+        hocr = desfazer_inclinacao_hocr(_motor.GetHOCRText(0), imagem.info.get('inclinacao'))
+        confianca = _motor.MeanTextConf()
+    finally:
+        if segmentacao is not None:
+            _motor.SetPageSegMode(segmentacao_anterior)
+
+    caminho_hocr = os.path.join(pasta_temp, f"{nome}.hocr")
+    caminho_camada = os.path.join(pasta_temp, f"{nome}_texto.pdf")
+    with open(caminho_hocr, 'w', encoding='utf-8') as f:
+        f.write(hocr)
+    HocrTransform(hocr_filename=caminho_hocr, dpi=dpi).to_pdf(out_filename=caminho_camada, invisible_text=True)
+    return {
+        'text': texto,
+        'hocr': hocr,
+        'confidence': confianca,
+        'layer': caminho_camada
+    }
+
+def _reconhecer_pagina(caminho_pdf, indice, dpi, pasta_temp, perfil=None, limite=None):
+    """
+    Renderiza uma página e reconhece o texto com o motor já carregado do processo
+
+    Returns:
+        dict: Índice da página, texto, hOCR, confiança média, PDF com a camada
+            de texto invisível da página e tempo gasto
+    """
+    inicio = time.time()
+    documento = pdfium.PdfDocument(caminho_pdf)
+    try:
+        imagem = documento[indice].render(scale=dpi / 72, grayscale=Config.OCR_GRAYSCALE).to_pil()
+    finally:
+        documento.close()
+    imagem.info['dpi'] = (dpi, dpi)
+
+    resultado = _reconhecer(imagem, f"pagina_{indice:05d}", pasta_temp, perfil, limite)
+    return dict(resultado, page=indice, seconds=time.time() - inicio)
+
+def _textos_existentes(caminho_pdf, paginas):
+    """
+    Camada de texto das páginas que já têm texto utilizável ({índice: texto};
+    mesmo critério da pré-análise, ai.ocr_preflight.texto_utilizavel)
+    """
+    textos = {}
+    documento = pdfium.PdfDocument(caminho_pdf)
+    try:
+        for indice in paginas:
+            pagina = documento[indice]
+            try:
+                textpage = pagina.get_textpage()
+                try:
+                    texto = textpage.get_text_range().replace('\r\n', '\n')
+                finally:
+                    textpage.close()
+            finally:
+                pagina.close()
+            if texto_utilizavel(texto):
+                textos[indice] = texto
+    finally:
+        documento.close()
+    return textos
+
+def _reconhecer_quadro(caminho_imagem, quadro, total_quadros, pasta_temp, confianca_minima=None, perfil_reforco=None,
+                       limite=None):
+    """
+    Reconhece um quadro de uma imagem (ver ai.image_ocr) e grava a página PDF
+    com a imagem e a camada de texto invisível
+
+    Se a confiança média ficar abaixo de `confianca_minima`, o quadro é
+    reconhecido de novo com `perfil_reforco` e fica o resultado de maior confiança.
+
+    Returns:
+        dict: Quadro, texto, hOCR, confiança média (das palavras do hOCR), se
+            passou pelo OCR reforçado, PDF da página e tempo gasto
+    """
+    import pikepdf
+    from ai.image_ocr import abrir_quadro, preparar_quadro, pdf_da_imagem
+
+    inicio = time.time()
+    nome = f"quadro_{quadro:06d}"
+    resultado = _reconhecer(abrir_quadro(caminho_imagem, quadro), nome, pasta_temp, limite=limite)
+    confianca = confianca_hocr(resultado['hocr'])
+    reforcado = False
+    if confianca_minima and confianca is not None and confianca < confianca_minima:
+        reforco = _reconhecer(abrir_quadro(caminho_imagem, quadro), f"{nome}_reforco", pasta_temp, perfil_reforco,
+                              limite)
+        confianca_reforco = confianca_hocr(reforco['hocr'])
+        reforcado = True
+        if confianca_reforco is not None and confianca_reforco > confianca:
+            os.remove(resultado['layer'])
+            os.rename(reforco['layer'], resultado['layer'])
+            resultado = dict(reforco, layer=resultado['layer'])
+            confianca = confianca_reforco
+        else:
+            os.remove(reforco['layer'])
+        os.remove(os.path.join(pasta_temp, f"{nome}_reforco.hocr"))
+
+    # A imagem visível é a original (sem o pré-processamento do OCR)
+    arquivo, dpi = preparar_quadro(caminho_imagem, quadro, total_quadros, os.path.join(pasta_temp, nome))
+    caminho_pdf = os.path.join(pasta_temp, f"{nome}.pdf")
+    pdf_da_imagem(arquivo, dpi, caminho_pdf)
+    if arquivo != caminho_imagem:
+        os.remove(arquivo)
+    with pikepdf.open(caminho_pdf, allow_overwriting_input=True) as pdf, pikepdf.open(resultado['layer']) as camada:
+        pdf.pages[0].add_overlay(camada.pages[0])
+        pdf.save(caminho_pdf)
+    os.remove(resultado['layer'])
+    os.remove(os.path.join(pasta_temp, f"{nome}.hocr"))
+
+    return dict(resultado, page=quadro, pdf=caminho_pdf, layer=None, confidence=confianca, retried=reforcado,
+                seconds=time.time() - inicio)
+
+class TesseractPool:
+    """
+    Processos com o Tesseract residente (tesserocr) para OCR página a página
+
+    Cada chamada do ocrmypdf inicia novos processos do Tesseract, que carregam
+    o modelo do idioma de novo; em certidões de 1 a 3 páginas esse custo fixo
+    domina. Aqui os processos do pool são criados uma vez e mantêm o motor
+    carregado entre as requisições: cada página é renderizada (pypdfium2),
+    reconhecida e convertida em camada de texto invisível (hOCR), que é
+    sobreposta à página original.
+
+    Diferente do force_ocr do ocrmypdf, a página não é rasterizada: a imagem
+    e o conteúdo originais são mantidos e recebem a camada de texto por cima.
+    Por isso páginas que já têm texto utilizável nunca passam pelo OCR aqui,
+    mesmo com force_ocr (o texto ficaria duplicado no PDF).
+    """
+
+    def __init__(self, max_workers=None, idioma='por'):
+        self.max_workers = max_workers or Config.OCR_ENGINE_WORKERS or os.cpu_count() or 1
+        self.idioma = idioma
+        self.lock = threading.Lock()
+        self.executor = None
+
+    @property
+    def available(self):
+        # Verificado só quando o motor residente é configurado (ver ai.ocr_capabilities)
+        return PDFIUM_AVAILABLE and ocr_capabilities.tesserocr_available() and ocr_capabilities.hocr_available()
+
+    def _get_executor(self):
+        # Criado no primeiro uso e mantido: os motores ficam carregados entre as chamadas
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_iniciar_motor,
+                    initargs=(self.idioma,)
+                )
+                logging.info(f"Pool do Tesseract residente iniciado com {self.max_workers} processos ({self.idioma})")
+            return self.executor
+
+    def _descartar_executor(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Encerra os processos do pool (um novo pool é criado no próximo uso)"""
+        self._descartar_executor()
+
+    def submeter_quadro(self, caminho_imagem, quadro, total_quadros, pasta_temp, confianca_minima=None,
+                        perfil_reforco=None, limite=None):
+        """
+        Envia um quadro de imagem ao pool (ver ai.image_ocr); o reconhecimento
+        para sozinho em `limite` (fim do prazo, em time.time())
+
+        Returns:
+            Future: Resultado de _reconhecer_quadro; o PDF da página fica em pasta_temp
+        """
+        if not self.available:
+            raise Exception("Motor residente indisponível. Instale tesserocr e pypdfium2")
+        return self._get_executor().submit(_reconhecer_quadro, caminho_imagem, quadro, total_quadros, pasta_temp,
+                                           confianca_minima, perfil_reforco, limite)
+
+    def aplicar_ocr(self, pdf_entrada, pdf_saida, paginas=None, dpi=None, sidecar=None, progresso=None,
+                    pasta_hocr=None, prazo=None, perfil=None):
+        """
+        Aplica OCR nas páginas do PDF usando os motores residentes
+
+        Args:
+            pdf_entrada: Caminho do PDF ou stream em memória (io.BytesIO)
+            paginas: Índices (base 0) das páginas a processar; as demais são mantidas como estão
+            dpi: Resolução da renderização (padrão: Config.OCR_TARGET_DPI)
+            sidecar: Arquivo de texto no mesmo formato do sidecar do ocrmypdf
+                (uma página por bloco, separadas por form feed)
+            progresso: Função chamada com (páginas concluídas, total)
+            pasta_hocr: Pasta em que o hOCR de cada página é gravado (mesmo formato do ocrmypdf)
+            prazo: Prazo do documento (ai.ocr_budget.PrazoOCR)
+            perfil: Opções do OCR reforçado (ver _reconhecer)
+
+        Returns:
+            dict: Resultado de cada página processada ({índice: resultado de _reconhecer_pagina})
+
+        Raises:
+            OCRTimeoutError: O prazo acabou; só as páginas deste documento saem da fila
+                (as em andamento param sozinhas no prazo) e o pool continua atendendo
+                os demais documentos
+        """
+        if not self.available:
+            raise Exception("Motor residente indisponível. Instale tesserocr e pypdfium2")
+        import pikepdf
+
+        dpi = dpi or Config.OCR_TARGET_DPI
+        pasta_temp = tempfile.mkdtemp(prefix='tesseract_pool_', dir=Config.TEMP_DIRECTORY)
+        camadas = []
+        try:
+            # Os processos do pool leem o PDF do disco
+            caminho_pdf = os.path.join(pasta_temp, 'entrada.pdf')
+            if hasattr(pdf_entrada, 'read'):
+                pdf_entrada.seek(0)
+                with open(caminho_pdf, 'wb') as f:
+                    shutil.copyfileobj(pdf_entrada, f)
+                pdf_entrada.seek(0)
+            else:
+                shutil.copyfile(pdf_entrada, caminho_pdf)
+
+            with pikepdf.open(caminho_pdf) as pdf:
+                total_paginas = len(pdf.pages)
+                paginas = list(paginas) if paginas is not None else list(range(total_paginas))
+                # A camada nova fica por cima da original: páginas que já têm texto mantêm só o dele
+                textos_existentes = _textos_existentes(caminho_pdf, paginas)
+                if textos_existentes:
+                    paginas = [indice for indice in paginas if indice not in textos_existentes]
+                    logging.info(f"{len(textos_existentes)} páginas com texto utilizável mantidas sem OCR "
+                                 f"(Tesseract residente)")
+
+                resultados = {}
+                executor = self._get_executor()
+                limite = prazo.limite() if prazo else None
+                futures = [
+                    executor.submit(_reconhecer_pagina, caminho_pdf, indice, dpi, pasta_temp, perfil, limite)
+                    for indice in paginas
+                ]
+                def cancelar_fila():
+                    # O pool é compartilhado com outros documentos: só as páginas deste saem da fila
+                    for future in futures:
+                        future.cancel()
+
+                try:
+                    with job_manager.interromper_ao_cancelar(cancelar_fila):
+                        for future in as_completed(futures, timeout=prazo.restante() if prazo else None):
+                            resultado = future.result()
+                            resultados[resultado['page']] = resultado
+                            if progresso:
+                                progresso(len(resultados), len(paginas))
+                except FuturesTimeoutError:
+                    # Sem encerrar os processos do pool: as páginas de outros documentos continuam
+                    cancelar_fila()
+                    raise prazo.erro({indice: resultado['text'] for indice, resultado in resultados.items()})
+                except BrokenProcessPool:
+                    # Um processo morreu: recriar o pool na próxima chamada
+                    self._descartar_executor()
+                    raise
+                except BaseException:
+                    cancelar_fila()
+                    job_manager.verificar_cancelamento()
+                    raise
+
+                for indice in sorted(resultados):
+                    camada = pikepdf.open(resultados[indice]['layer'])
+                    camadas.append(camada)
+                    pdf.pages[indice].add_overlay(camada.pages[0])
+                pdf.save(pdf_saida)
+
+            if sidecar:
+                with open(sidecar, 'w', encoding='utf-8') as f:
+                    f.write('\f'.join(
+                        resultados[indice]['text'] if indice in resultados
+                        else textos_existentes[indice] if indice in textos_existentes
+                        else f'[OCR skipped on page(s) {indice + 1}]'
+                        for indice in range(total_paginas)
+                    ))
+
+            if pasta_hocr:
+                for indice, resultado in resultados.items():
+                    with open(os.path.join(pasta_hocr, nome_arquivo_hocr(indice)), 'w', encoding='utf-8') as f:
+                        f.write(resultado['hocr'])
+
+            logging.info(f"OCR (Tesseract residente) aplicado em {len(resultados)} páginas: {pdf_saida}")
+            return resultados
+        finally:
+            for camada in camadas:
+                camada.close()
+            shutil.rmtree(pasta_temp, ignore_errors=True)
+
+# Instância global do pool de motores do Tesseract
+tesseract_pool = TesseractPool()
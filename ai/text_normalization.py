@@ -0,0 +1,99 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# Normalização do texto extraído (OCR ou camada de texto) antes da IA
+#
+# Uma única expressão regular percorre o texto uma vez e trata, no mesmo
+# passo: palavras hifenizadas na quebra de linha ("matrí-\ncula"), hífens de
+# números e nomes compostos quebrados na linha ("789-\n00", "São-\nLuís", que
+# ficam com o hífen e sem espaço), hífens flexíveis, ligaduras tipográficas
+# (ﬁ, ﬂ...) e sequências de espaços e quebras de linha (viram um espaço). A
+# composição Unicode (NFC) só é feita se o texto ainda não estiver composto.
+# O texto de cada página pode ser normalizado à medida que é lido
+# (normalizar_paginas) e o resultado do OCR é normalizado uma vez por
+# documento (texto_normalizado).
+
+import re
+import unicodedata
+
+# Ligaduras que o Tesseract e a camada de texto de PDFs tipografados devolvem
+LIGADURAS = {
+    'ﬀ': 'ff',
+    'ﬁ': 'fi',
+    'ﬂ': 'fl',
+    'ﬃ': 'ffi',
+    'ﬄ': 'ffl',
+    'ﬅ': 'st',
+    'ﬆ': 'st',
+}
+
+# Hífen (comum, flexível ou o marcador de hifenização do PDFium) entre uma letra e uma
+# minúscula na linha seguinte: palavra quebrada, o hífen sai. Nos demais hífens no fim da
+# linha (números como "789-\n00", nomes como "São-\nLuís") o hífen fica e a quebra sai
+_NORMALIZACAO = re.compile(
+    r'(?P<hifen>(?<=[^\W\d_])[-\u00ad\ufffe][ \t]*\r?\n\s*(?=[a-zà-öø-ÿ]))'
+    r'|(?P<quebra>(?<=\S)-[ \t]*\r?\n\s*(?=\S))'
+    r'|(?P<flexivel>[\u00ad\ufffe])'
+    r'|(?P<ligadura>[' + ''.join(LIGADURAS) + r'])'
+    r'|(?P<espaco>\s[\s\u00ad\ufffe]*)'
+)
+
+def _substituir(match):
+    grupo = match.lastgroup
+    if grupo == 'espaco':
+        return ' '
+    if grupo == 'ligadura':
+        return LIGADURAS[match.group(0)]
+    if grupo == 'quebra':
+        return '-'
+    return ''
+
+def normalizar_texto(texto):
+    """
+    Normaliza o texto em um único passo: junta palavras hifenizadas na quebra
+    de linha (números e nomes compostos mantêm o hífen), remove hífens flexíveis, desfaz ligaduras, aplica a composição
+    Unicode NFC e reduz espaços e quebras de linha a um espaço
+
+    Returns:
+        str: Texto em uma linha, sem espaços no início e no fim
+    """
+    if not texto:
+        return ''
+    if not unicodedata.is_normalized('NFC', texto):
+        texto = unicodedata.normalize('NFC', texto)
+    return _NORMALIZACAO.sub(_substituir, texto).strip()
+
+def normalizar_paginas(paginas):
+    """Normaliza o texto de cada página (normalizar_texto) à medida que as páginas chegam"""
+    for texto in paginas:
+        yield normalizar_texto(texto)
+
+def juntar_paginas(paginas):
+    """Documento completo a partir do texto normalizado das páginas, sem as páginas vazias"""
+    return ' '.join(texto for texto in paginas if texto)
+
+def texto_normalizado(resultado):
+    """
+    Texto normalizado do documento a partir de um resultado do OCR (process_pdf_with_ocr)
+
+    É calculado na primeira chamada e guardado no próprio resultado
+    ('normalized_text'): etapas seguintes que recebem o mesmo resultado não
+    normalizam o documento de novo.
+    """
+    if 'normalized_text' not in resultado:
+        paginas = resultado.get('pages_text')
+        if paginas is None:
+            paginas = [resultado.get('text', '')]
+        resultado['normalized_text'] = juntar_paginas(normalizar_paginas(paginas))
+    return resultado['normalized_text']
@@ -0,0 +1,353 @@
+# Processamento dos endpoints de OCR/IA, compartilhado pelas rotas síncronas e pelos jobs assíncronos
+
+import os
+import uuid
+import time
+import shutil
+import logging
+from config import Config
+from security import secure_manager
+from ai.jobs import JobCancelledError
+from ai.text_normalization import texto_normalizado
+from ai.page_boilerplate import texto_para_llm
+
+def save_upload(file, original_filename, user_ip):
+    """
+    Salva o arquivo enviado (de forma segura, se habilitado) e o deixa pronto para o OCR
+
+    Returns:
+        tuple: (caminho do arquivo descriptografado, file_id)
+    """
+    if Config.SECURE_PROCESSING:
+        temp_file_path, file_id = secure_manager.process_file_securely(
+            file, original_filename, user_ip
+        )
+    else:
+        file_id = str(uuid.uuid4())
+        temp_file_path = os.path.join(Config.UPLOAD_FOLDER, f"{file_id}_{original_filename}")
+        file.save(temp_file_path)
+
+    # DESCRIPTOGRAFAR ANTES DO OCR!
+    if Config.SECURE_PROCESSING and Config.ENCRYPT_TEMP_FILES:
+        temp_file_path = secure_manager.decrypt_file(temp_file_path)
+    return temp_file_path, file_id
+
+def no_progress(stage, current=None, total=None, message=None):
+    """Callback de progresso usado pelas rotas síncronas"""
+
+def _ocr_options(progress):
+    """Repassa o progresso do OCR (pré-análise, descriptografia, páginas) ao callback do job"""
+    return {'progress_callback': lambda stage, current, total: progress(stage, current, total)}
+
+def _remove_temp_ocr(temp_ocr_path):
+    if temp_ocr_path and os.path.exists(temp_ocr_path):
+        try:
+            os.remove(temp_ocr_path)
+        except Exception:
+            pass
+
+def _extract_text(progress, temp_file_path, temp_ocr_path):
+    """
+    Roda o OCR e valida o texto extraído
+
+    Returns:
+        tuple: (resultado do OCR, None) ou (None, (payload de erro, status HTTP)); o texto
+            normalizado vem de texto_normalizado e o enviado à IA de texto_para_llm
+    """
+    from ai.ocr_service import process_pdf_with_ocr
+
+    text_content = ""
+    try:
+        ocr_result = process_pdf_with_ocr(temp_file_path, temp_ocr_path, _ocr_options(progress))
+        if ocr_result.get('success'):
+            print("✅ OCR bem-sucedido, extraindo texto...")
+            text_content = texto_normalizado(ocr_result)
+        else:
+            print(f"❌ OCR falhou: {ocr_result.get('error', 'Erro desconhecido')}")
+            if ocr_result.get('timed_out'):
+                return None, ({
+                    'error': 'O OCR do PDF excedeu o tempo limite.',
+                    'details': ocr_result['error'],
+                    'suggestion': 'Envie o documento em partes menores ou com menos páginas digitalizadas.',
+                    'timed_out_after_page': ocr_result['timed_out_after_page']
+                }, 504)
+            return None, ({
+                'error': 'Não foi possível extrair texto suficiente do PDF.',
+                'details': 'O arquivo pode estar corrompido, protegido por senha, ou ser uma imagem escaneada de baixa qualidade.',
+                'suggestion': 'Tente com um arquivo PDF diferente ou verifique se o arquivo não está protegido.',
+                'ocr_error': ocr_result.get('error', 'Erro desconhecido')
+            }, 400)
+    except JobCancelledError:
+        raise
+    except Exception as ocr_error:
+        print(f"❌ Erro durante OCR: {str(ocr_error)}")
+        return None, ({
+            'error': 'Erro durante processamento OCR.',
+            'details': str(ocr_error),
+            'suggestion': 'Verifique se o arquivo é um PDF válido e não está corrompido.'
+        }, 400)
+
+    # Verificar se temos texto suficiente para processar
+    if not text_content or len(text_content.strip()) < 10:
+        return None, ({
+            'error': 'Texto insuficiente para processamento.',
+            'details': f'Extraído apenas {len(text_content)} caracteres.',
+            'suggestion': 'O arquivo pode estar vazio ou não conter texto legível.',
+            'text_preview': text_content[:200] if text_content else ''
+        }, 400)
+
+    print(f"✅ Texto extraído com sucesso: {len(text_content)} caracteres")
+    print(f"📄 Preview do texto (primeiros 500 chars): {text_content[:500]}")
+    return ocr_result, None
+
+def pipeline_ocr(progress, temp_input_path, file_id, original_filename, user_ip):
+    """Processamento do /api/ocr: PDF pesquisável para download e texto extraído"""
+    from ai.ocr_service import process_pdf_with_ocr, get_ocr_info, is_pdf_signed
+    from ai.image_ocr import formato_imagem, nome_saida_pdf
+
+    # Imagens (JPEG, PNG, TIFF) geram um PDF com o mesmo nome e extensão .pdf
+    output_filename = f"ocr_{file_id}_{nome_saida_pdf(original_filename)}"
+    temp_output_path = os.path.join(Config.TEMP_DIRECTORY, output_filename)
+
+    try:
+        progress('uploaded')
+
+        # Verificar se o PDF tem assinatura digital (imagens não têm)
+        has_signature = not formato_imagem(temp_input_path) and is_pdf_signed(temp_input_path)
+
+        # Processar com nova implementação OCR (reaproveita o cache de OCR se o arquivo já foi enviado)
+        result = process_pdf_with_ocr(temp_input_path, temp_output_path, _ocr_options(progress))
+
+        if not result['success']:
+            if result.get('timed_out'):
+                # OCR interrompido pelo tempo limite: devolver o texto das páginas concluídas
+                return {
+                    'error': result['error'],
+                    'timed_out': True,
+                    'timed_out_after_page': result['timed_out_after_page'],
+                    'pages_pending': result['pages_pending'],
+                    'partial_text': result['text']
+                }, 504
+            return {'error': result['error']}, 500
+
+        # Obter informações do resultado a partir do texto do OCR, sem reler o PDF gerado
+        ocr_info = get_ocr_info(temp_output_path, result.get('pages_text'), result.get('page_confidence'))
+        ocr_info['pages_retried'] = result.get('pages_retried', [])
+
+        # Guardar o texto para o download em /api/ocr/text
+        with open(os.path.join(Config.TEMP_DIRECTORY, f"text_{file_id}.txt"), 'w', encoding='utf-8') as f:
+            f.write(result.get('text', ''))
+
+        progress('done')
+        return {
+            'success': True,
+            'message': result['message'],
+            'file_id': file_id,
+            'original_filename': original_filename,
+            'output_filename': output_filename,
+            'processing_time': result['processing_time'],
+            'pages_processed': result.get('pages_processed', 0),
+            'ocr_info': ocr_info,
+            'has_signature': has_signature,
+            'secure_processing': Config.SECURE_PROCESSING,
+            'cached': result.get('cached', False)
+        }, 200
+
+    except Exception as e:
+        # Garantir limpeza em caso de erro (ou cancelamento)
+        if Config.SECURE_PROCESSING:
+            secure_manager.cleanup_file(temp_input_path, user_ip)
+            secure_manager.cleanup_file(temp_output_path, user_ip)
+        if isinstance(e, JobCancelledError):
+            raise
+        return {'error': f'Erro interno do servidor: {str(e)}'}, 500
+
+def pipeline_process_file(progress, temp_file_path, file_id, original_filename, user_ip, service_type, model):
+    """Processamento do /api/process-file: OCR e, exceto no serviço 'ocr', extração de campos com a OpenAI"""
+    from ai.openai_service import extract_fields_with_openai
+    from ai.image_ocr import nome_saida_pdf
+
+    start_time = time.time()
+    temp_ocr_path = temp_file_path + '_ocr.pdf'
+    try:
+        progress('uploaded')
+
+        # Sempre rodar OCR antes da IA
+        ocr_result, erro = _extract_text(progress, temp_file_path, temp_ocr_path)
+        if erro:
+            return erro
+        text_content = texto_normalizado(ocr_result)
+
+        # Verificar tipo de serviço antes de fazer logs
+        if service_type == 'ocr':
+            print("📄 Serviço OCR - retornando apenas texto extraído, sem IA")
+            campos = {'text_content': text_content}
+            # Para OCR, salvar o arquivo processado para download
+            if os.path.exists(temp_ocr_path):
+                try:
+                    # Mesmo nome do /api/ocr e da rota de download (imagens geram um .pdf)
+                    ocr_download_path = os.path.join(Config.TEMP_DIRECTORY,
+                                                     f"ocr_{file_id}_{nome_saida_pdf(original_filename)}")
+                    shutil.copy2(temp_ocr_path, ocr_download_path)
+                    logging.info(f"Arquivo OCR salvo para download: {ocr_download_path}")
+                except Exception as e:
+                    logging.error(f"Erro ao salvar arquivo OCR: {str(e)}")
+        else:
+            progress('extracting')
+            print("🤖 Iniciando extração com IA...")
+            print(f"🎯 Modelo recebido no endpoint /api/process-file: {model}")
+            print("🤖 Serviço com IA - extraindo campos com OpenAI")
+            campos = extract_fields_with_openai(texto_para_llm(ocr_result), model=model, service_type=service_type)
+
+        # Preparar resposta baseada no tipo de serviço
+        response_data = {
+            'success': True,
+            'original_filename': original_filename,
+            'file_id': file_id,
+            'campos': campos,
+            'service_type': service_type,
+            'text_length': len(text_content),
+            'used_ocr_fallback': True,
+            'secure_processing': Config.SECURE_PROCESSING
+        }
+
+        # Calcular tempo de processamento
+        processing_time = time.time() - start_time
+
+        # Adicionar informações específicas para OCR
+        if service_type == 'ocr':
+            response_data.update({
+                'message': 'OCR executado com sucesso!',
+                'text_content': text_content,
+                'processing_time': f'{processing_time:.2f}s',
+                'ocr_quality': 'Alta' if len(text_content) > 1000 else 'Média' if len(text_content) > 500 else 'Baixa',
+                'ocr_only': True  # Marcar que foi apenas OCR, sem IA
+            })
+        else:
+            # Adicionar model apenas se não for OCR
+            response_data['model'] = model
+            response_data['llm_boilerplate'] = ocr_result['llm_boilerplate']
+            response_data['message'] = f'PDF processado e campos extraídos com ChatGPT ({service_type})!'
+            response_data['processing_time'] = f'{processing_time:.2f}s'
+
+        progress('done')
+        return response_data, 200
+    except JobCancelledError:
+        raise
+    except Exception as e:
+        return {'error': f'Erro interno do servidor: {str(e)}'}, 500
+    finally:
+        # Limpar arquivos temporários após processamento
+        if Config.SECURE_PROCESSING and temp_file_path:
+            secure_manager.cleanup_file(temp_file_path, user_ip)
+        _remove_temp_ocr(temp_ocr_path)
+
+def pipeline_certidao_data(progress, temp_file_path, user_ip, model):
+    """Processamento do /api/certidao/data: OCR, extração dos campos com a OpenAI e HTML do preview"""
+    from ai.openai_service import extract_fields_with_openai
+
+    temp_ocr_path = temp_file_path + '_ocr.pdf'
+    try:
+        progress('uploaded')
+
+        # SEMPRE fazer OCR primeiro para extrair texto do PDF
+        print("🔍 Iniciando OCR para extração de texto...")
+        ocr_result, erro = _extract_text(progress, temp_file_path, temp_ocr_path)
+        if erro:
+            return erro
+        text_content = texto_normalizado(ocr_result)
+
+        # Extrair campos usando OpenAI (após OCR), sem cabeçalhos e rodapés repetidos
+        progress('extracting')
+        print("🤖 Extraindo campos da certidão com IA...")
+        print(f"🎯 Modelo recebido no endpoint /api/certidao/data: {model}")
+        campos = extract_fields_with_openai(texto_para_llm(ocr_result), model=model, service_type="certidao")
+
+        if not campos or 'error' in campos:
+            error_msg = campos.get('error', 'Erro desconhecido na extração') if campos else 'Nenhum dado extraído'
+            return {'error': f'Erro na extração de dados: {error_msg}'}, 500
+
+        # Gerar HTML formatado para o preview
+        progress('rendering')
+        formatted_html = generate_formatted_html(campos)
+
+        progress('done')
+        return {
+            'success': True,
+            'data': campos,
+            'text_content': text_content,
+            'formatted_html': formatted_html,
+            'llm_boilerplate': ocr_result['llm_boilerplate'],
+            'message': 'Dados da certidão extraídos com sucesso'
+        }, 200
+
+    except JobCancelledError:
+        raise
+    except Exception as e:
+        print(f"❌ Erro geral na extração de dados da certidão: {str(e)}")
+        return {'error': f'Erro interno: {str(e)}'}, 500
+    finally:
+        # Limpar arquivos temporários
+        if Config.SECURE_PROCESSING and temp_file_path:
+            secure_manager.cleanup_file(temp_file_path, user_ip)
+        _remove_temp_ocr(temp_ocr_path)
+
+def generate_formatted_html(certidao_data):
+    """Gera o HTML do preview da certidão a partir dos campos extraídos"""
+    from datetime import datetime
+    data_certidao = datetime.now().strftime('%d/%m/%Y')
+    
+    html = f"""<div class="certidao-preview">
+        <div class="certidao-title">CERTIDÃO DE SITUAÇÃO JURÍDICA DO IMÓVEL</div>
+        <div class="certidao-separator"></div>
+        <div class="certidao-content">
+            <p class="certidao-intro">CERTIFICO, nos termos dos arts. 17 e 19, §9º, da Lei n.º 6.015/1973, e art. 123, caput, do Provimento n.º 149/2023, do Conselho Nacional de Justiça - CNJ, que, revendo os livros, arquivos e sistemas eletrônicos desta Serventia, inclusive cadastro interno de ações reais e pessoais reipersecutórias envolvendo imóveis desta circunscrição, encontrei o lançamento relativo ao registro de imóvel seguinte:</p>
+            <div class="certidao-section">
+                <div class="section-title">CADASTRO NACIONAL DE MATRÍCULA - CNM</div>
+                <div class="section-content">{certidao_data.get('cnm', '')}</div>
+            </div>
+            <div class="certidao-section">
+                <div class="section-title">DESCRIÇÃO DO IMÓVEL</div>
+                <div class="section-content">{certidao_data.get('descricao_imovel', '')}</div>
+            </div>"""
+    
+    if certidao_data.get('senhorio_direto'):
+        html += f"""<div class="certidao-section">
+                <div class="section-title">SENHORIO DIRETO</div>
+                <div class="section-content">{certidao_data.get('senhorio_direto')}</div>
+            </div>"""
+    if certidao_data.get('enfiteuta'):
+        html += f"""<div class="certidao-section">
+                <div class="section-title">ENFITEUTA</div>
+                <div class="section-content">{certidao_data.get('enfiteuta')}</div>
+            </div>"""
+    html += f"""<div class="certidao-section">
+                <div class="section-title">PROPRIETÁRIO(S)</div>
+                <div class="section-content">{certidao_data.get('proprietarios', '')}</div>
+            </div>
+            <div class="certidao-section">
+                <div class="section-title">INSCRIÇÃO IMOBILIÁRIA</div>
+                <div class="section-content">{certidao_data.get('inscricao_imobiliaria', '')}</div>
+            </div>"""
+    
+    if certidao_data.get('rip'):
+        html += f"""<div class="certidao-section">
+                <div class="section-title">REGISTRO IMOBILIÁRIO PATRIMONIAL (RIP)</div>
+                <div class="section-content">{certidao_data.get('rip')}</div>
+            </div>"""
+    html += f"""<div class="certidao-section">
+                <div class="section-title">DIREITOS, ÔNUS REAIS E RESTRIÇÕES JUDICIAIS E ADMINISTRATIVAS</div>
+                <div class="section-content">O referido é verdade e dou fé. São Luís/MA, {data_certidao}.</div>
+            </div>
+            <div class="certidao-section">
+                <div class="section-title">Emolumentos</div>
+                <div class="section-content">{certidao_data.get('emolumentos', '')}</div>
+            </div>
+            <div class="certidao-signature">
+                <div class="signature-left">João Gabriel Santos Barros,<br>Escrevente</div>
+                <div class="signature-right">Autorizado.</div>
+            </div>
+            <div class="certidao-validity">Validade: 30 dias.</div>
+        </div>
+    </div>"""
+    return html
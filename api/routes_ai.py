@@ -3,15 +3,16 @@
 from flask import Blueprint, request, jsonify, send_file, current_app
 import os
 import uuid
-import shutil
-import re
 import tempfile
 from werkzeug.utils import secure_filename
 from ai.openai_service import extract_fields_with_openai
-import pypdf
+from ai.pdf_text import iterar_paginas_normalizadas
+from ai.text_normalization import juntar_paginas, texto_normalizado
+from ai.page_boilerplate import texto_para_llm
 from config import Config
 from security import secure_manager
 import pandas as pd
+from api.pipelines import save_upload, no_progress, pipeline_process_file, pipeline_certidao_data
 
 ai_bp = Blueprint('ai', __name__)
 
@@ -26,10 +27,6 @@ def allowed_file(filename):
 @ai_bp.route('/api/process-file', methods=['POST'])
 def process_file_chatgpt():
     """Endpoint otimizado para processamento com ChatGPT - agora SEMPRE faz OCR antes da IA"""
-    from ai.ocr_service import extract_text_from_pdf, process_pdf_with_ocr
-    import time
-    
-    start_time = time.time()
     temp_file_path = None
     user_ip = request.remote_addr
     try:
@@ -45,114 +42,13 @@ def process_file_chatgpt():
         print(f"🎯 Serviço recebido: {service_type}")
         original_filename = secure_filename(file.filename or 'unknown.pdf')
         # Processar arquivo de forma segura
-        if Config.SECURE_PROCESSING:
-            temp_file_path, file_id = secure_manager.process_file_securely(
-                file, original_filename, user_ip
-            )
-        else:
-            file_id = str(uuid.uuid4())
-            upload_filename = f"{file_id}_{original_filename}"
-            temp_file_path = os.path.join(Config.UPLOAD_FOLDER, upload_filename)
-            file.save(temp_file_path)
-        # DESCRIPTOGRAFAR ANTES DO OCR!
-        if Config.SECURE_PROCESSING and Config.ENCRYPT_TEMP_FILES:
-            temp_file_path = secure_manager.decrypt_file(temp_file_path)
-        # Sempre rodar OCR antes da IA
-        text_content = ""
-        temp_ocr_path = temp_file_path + '_ocr.pdf'
-        try:
-            ocr_result = process_pdf_with_ocr(temp_file_path, temp_ocr_path)
-            if ocr_result.get('success'):
-                print("✅ OCR bem-sucedido, extraindo texto...")
-                text_content = extract_text_from_pdf(temp_ocr_path)
-                text_content = re.sub(r'\s+', ' ', text_content.replace('\n', ' ')).strip()
-            else:
-                print(f"❌ OCR falhou: {ocr_result.get('error', 'Erro desconhecido')}")
-                return jsonify({
-                    'error': 'Não foi possível extrair texto suficiente do PDF.',
-                    'details': 'O arquivo pode estar corrompido, protegido por senha, ou ser uma imagem escaneada de baixa qualidade.',
-                    'suggestion': 'Tente com um arquivo PDF diferente ou verifique se o arquivo não está protegido.',
-                    'ocr_error': ocr_result.get('error', 'Erro desconhecido')
-                }), 400
-        except Exception as ocr_error:
-            print(f"❌ Erro durante OCR: {str(ocr_error)}")
-            return jsonify({
-                'error': 'Erro durante processamento OCR.',
-                'details': str(ocr_error),
-                'suggestion': 'Verifique se o arquivo é um PDF válido e não está corrompido.'
-            }), 400
-        # Verificar se temos texto suficiente para processar
-        if not text_content or len(text_content.strip()) < 10:
-            return jsonify({
-                'error': 'Texto insuficiente para processamento.',
-                'details': f'Extraído apenas {len(text_content)} caracteres.',
-                'suggestion': 'O arquivo pode estar vazio ou não conter texto legível.',
-                'text_preview': text_content[:200] if text_content else ''
-            }), 400
-        print(f"✅ Texto extraído com sucesso: {len(text_content)} caracteres")
-        print(f"📄 Preview do texto (primeiros 500 chars): {text_content[:500]}")
-        # Verificar tipo de serviço antes de fazer logs
-        if service_type == 'ocr':
-            print("📄 Serviço OCR - retornando apenas texto extraído, sem IA")
-            campos = {'text_content': text_content}
-        else:
-            print("🤖 Iniciando extração com IA...")
-            model = request.form.get('model', 'gpt-4o')
-            print(f"🎯 Modelo recebido no endpoint /api/process-file: {model}")
-            print("🤖 Serviço com IA - extraindo campos com OpenAI")
-            campos = extract_fields_with_openai(text_content, model=model, service_type=service_type)
-        # Para OCR, salvar o arquivo processado para download
-        if service_type == 'ocr' and 'temp_ocr_path' in locals() and temp_ocr_path and os.path.exists(temp_ocr_path):
-            try:
-                # Salvar arquivo OCR para download
-                ocr_download_path = os.path.join(Config.TEMP_DIRECTORY, f"ocr_{file_id}_{original_filename}")
-                shutil.copy2(temp_ocr_path, ocr_download_path)
-                print(f"✅ Arquivo OCR salvo para download: {ocr_download_path}")
-            except Exception as e:
-                print(f"❌ Erro ao salvar arquivo OCR: {str(e)}")
-        
-        # Limpar arquivo temporário após processamento
-        if Config.SECURE_PROCESSING and temp_file_path:
-            secure_manager.cleanup_file(temp_file_path, user_ip)
-        if 'temp_ocr_path' in locals() and temp_ocr_path and os.path.exists(temp_ocr_path):
-            try:
-                os.remove(temp_ocr_path)
-            except Exception:
-                pass
-        # Preparar resposta baseada no tipo de serviço
-        response_data = {
-            'success': True,
-            'original_filename': original_filename,
-            'file_id': file_id,
-            'campos': campos,
-            'service_type': service_type,
-            'text_length': len(text_content),
-            'used_ocr_fallback': True,
-            'secure_processing': Config.SECURE_PROCESSING
-        }
-        
-        # Adicionar model apenas se não for OCR
-        if service_type != 'ocr':
-            model = request.form.get('model', 'gpt-4o')
-            response_data['model'] = model
-        
-        # Calcular tempo de processamento
-        processing_time = time.time() - start_time
-        
-        # Adicionar informações específicas para OCR
-        if service_type == 'ocr':
-            response_data.update({
-                'message': 'OCR executado com sucesso!',
-                'text_content': text_content,
-                'processing_time': f'{processing_time:.2f}s',
-                'ocr_quality': 'Alta' if len(text_content) > 1000 else 'Média' if len(text_content) > 500 else 'Baixa',
-                'ocr_only': True  # Marcar que foi apenas OCR, sem IA
-            })
-        else:
-            response_data['message'] = f'PDF processado e campos extraídos com ChatGPT ({service_type})!'
-            response_data['processing_time'] = f'{processing_time:.2f}s'
-        
-        return jsonify(response_data)
+        temp_file_path, file_id = save_upload(file, original_filename, user_ip)
+        # OCR e IA (mesmo processamento do job assíncrono em /api/jobs)
+        response_data, status_code = pipeline_process_file(
+            no_progress, temp_file_path, file_id, original_filename, user_ip,
+            service_type, request.form.get('model', 'gpt-4o')
+        )
+        return jsonify(response_data), status_code
     except Exception as e:
         # Garantir limpeza em caso de erro
         if Config.SECURE_PROCESSING and temp_file_path:
@@ -162,7 +58,7 @@ def process_file_chatgpt():
 @ai_bp.route('/api/certidao', methods=['POST'])
 def process_certidao():
     """Endpoint para processar PDF de matrícula, extrair campos via OpenAI e gerar certidão personalizada"""
-    from ai.ocr_service import extract_text_from_pdf, process_pdf_with_ocr
+    from ai.ocr_service import process_pdf_with_ocr
     from reportlab.pdfgen import canvas
     from reportlab.lib.pagesizes import A4
     import io
@@ -206,8 +102,7 @@ def process_certidao():
             ocr_result = process_pdf_with_ocr(temp_file_path, temp_ocr_path)
             if ocr_result.get('success'):
                 print("✅ OCR bem-sucedido, extraindo texto...")
-                text_content = extract_text_from_pdf(temp_ocr_path)
-                text_content = re.sub(r'\s+', ' ', text_content.replace('\n', ' ')).strip()
+                text_content = texto_normalizado(ocr_result)
             else:
                 print(f"❌ OCR falhou: {ocr_result.get('error', 'Erro desconhecido')}")
                 return jsonify({
@@ -249,7 +144,7 @@ def process_certidao():
 
         campos = None
         try:
-            campos = extract_fields_with_openai(text_content, model=model, service_type='certidao')
+            campos = extract_fields_with_openai(texto_para_llm(ocr_result), model=model, service_type='certidao')
         except Exception as ia_error:
             print(f"❌ Erro na extração de campos pela IA: {ia_error}")
             return jsonify({'error': 'Erro ao extrair campos da certidão com IA.', 'details': str(ia_error)}), 500
@@ -393,10 +288,6 @@ def process_certidao():
 @ai_bp.route('/api/certidao/data', methods=['POST'])
 def get_certidao_data():
     """Endpoint para extrair dados da certidão para download Word"""
-    from ai.ocr_service import extract_text_from_pdf, process_pdf_with_ocr
-    from ai.openai_service import extract_fields_with_openai
-    import io
-
     temp_file_path = None
     user_ip = request.remote_addr
 
@@ -411,162 +302,19 @@ def get_certidao_data():
 
         original_filename = secure_filename(file.filename or 'unknown.pdf')
         # Processar arquivo de forma segura
-        if Config.SECURE_PROCESSING:
-            temp_file_path, file_id = secure_manager.process_file_securely(
-                file, original_filename, user_ip
-            )
-        else:
-            file_id = str(uuid.uuid4())
-            upload_filename = f"{file_id}_{original_filename}"
-            temp_file_path = os.path.join(Config.UPLOAD_FOLDER, upload_filename)
-            file.save(temp_file_path)
-
-        # SEMPRE fazer OCR primeiro para extrair texto do PDF
-        text_content = ""
-        temp_ocr_path = temp_file_path + '_ocr.pdf'
-        
-        try:
-            # Descriptografar se necessário
-            if Config.SECURE_PROCESSING and Config.ENCRYPT_TEMP_FILES:
-                temp_file_path = secure_manager.decrypt_file(temp_file_path)
-            
-            print("🔍 Iniciando OCR para extração de texto...")
-            from ai.ocr_service import process_pdf_with_ocr
-            
-            ocr_result = process_pdf_with_ocr(temp_file_path, temp_ocr_path)
-            if ocr_result.get('success'):
-                print("✅ OCR bem-sucedido, extraindo texto...")
-                from ai.ocr_service import extract_text_from_pdf
-                text_content = extract_text_from_pdf(temp_ocr_path)
-                text_content = re.sub(r'\s+', ' ', text_content.replace('\n', ' ')).strip()
-            else:
-                print(f"❌ OCR falhou: {ocr_result.get('error', 'Erro desconhecido')}")
-                return jsonify({
-                    'error': 'Não foi possível extrair texto suficiente do PDF.',
-                    'details': 'O arquivo pode estar corrompido, protegido por senha, ou ser uma imagem escaneada de baixa qualidade.',
-                    'suggestion': 'Tente com um arquivo PDF diferente ou verifique se o arquivo não está protegido.',
-                    'ocr_error': ocr_result.get('error', 'Erro desconhecido')
-                }), 400
-                
-        except Exception as ocr_error:
-            print(f"❌ Erro durante OCR: {str(ocr_error)}")
-            return jsonify({
-                'error': 'Erro durante processamento OCR.',
-                'details': str(ocr_error),
-                'suggestion': 'Verifique se o arquivo é um PDF válido e não está corrompido.'
-            }), 400
-        
-        # Verificar se temos texto suficiente para processar
-        if not text_content or len(text_content.strip()) < 10:
-            return jsonify({
-                'error': 'Texto insuficiente para processamento.',
-                'details': f'Extraído apenas {len(text_content)} caracteres.',
-                'suggestion': 'O arquivo pode estar vazio ou não conter texto legível.',
-                'text_preview': text_content[:200] if text_content else ''
-            }), 400
-        
-        print(f"✅ Texto extraído com sucesso via OCR: {len(text_content)} caracteres")
-        print(f"📄 Preview do texto (primeiros 500 chars): {text_content[:500]}")
+        temp_file_path, file_id = save_upload(file, original_filename, user_ip)
 
-        # Extrair campos usando OpenAI (após OCR)
-        print("🤖 Extraindo campos da certidão com IA...")
-        model = request.form.get('model', 'gpt-4o')
-        print(f"🎯 Modelo recebido no endpoint /api/certidao/data: {model}")
-        campos = extract_fields_with_openai(text_content, model=model, service_type="certidao")
-        
-        if not campos or 'error' in campos:
-            error_msg = campos.get('error', 'Erro desconhecido na extração') if campos else 'Nenhum dado extraído'
-            return jsonify({'error': f'Erro na extração de dados: {error_msg}'}), 500
-
-        # Limpar arquivos temporários
-        if Config.SECURE_PROCESSING and temp_file_path:
-            secure_manager.cleanup_file(temp_file_path, user_ip)
-        if 'temp_ocr_path' in locals() and temp_ocr_path and os.path.exists(temp_ocr_path):
-            try:
-                os.remove(temp_ocr_path)
-            except Exception:
-                pass
-
-        # Gerar HTML formatado para o preview
-        def generate_formatted_html(certidao_data):
-            from datetime import datetime
-            data_certidao = datetime.now().strftime('%d/%m/%Y')
-            
-            html = f"""<div class="certidao-preview">
-                <div class="certidao-title">CERTIDÃO DE SITUAÇÃO JURÍDICA DO IMÓVEL</div>
-                <div class="certidao-separator"></div>
-                <div class="certidao-content">
-                    <p class="certidao-intro">CERTIFICO, nos termos dos arts. 17 e 19, §9º, da Lei n.º 6.015/1973, e art. 123, caput, do Provimento n.º 149/2023, do Conselho Nacional de Justiça - CNJ, que, revendo os livros, arquivos e sistemas eletrônicos desta Serventia, inclusive cadastro interno de ações reais e pessoais reipersecutórias envolvendo imóveis desta circunscrição, encontrei o lançamento relativo ao registro de imóvel seguinte:</p>
-                    <div class="certidao-section">
-                        <div class="section-title">CADASTRO NACIONAL DE MATRÍCULA - CNM</div>
-                        <div class="section-content">{certidao_data.get('cnm', '')}</div>
-                    </div>
-                    <div class="certidao-section">
-                        <div class="section-title">DESCRIÇÃO DO IMÓVEL</div>
-                        <div class="section-content">{certidao_data.get('descricao_imovel', '')}</div>
-                    </div>"""
-            
-            if certidao_data.get('senhorio_direto'):
-                html += f"""<div class="certidao-section">
-                        <div class="section-title">SENHORIO DIRETO</div>
-                        <div class="section-content">{certidao_data.get('senhorio_direto')}</div>
-                    </div>"""
-            if certidao_data.get('enfiteuta'):
-                html += f"""<div class="certidao-section">
-                        <div class="section-title">ENFITEUTA</div>
-                        <div class="section-content">{certidao_data.get('enfiteuta')}</div>
-                    </div>"""
-            html += f"""<div class="certidao-section">
-                        <div class="section-title">PROPRIETÁRIO(S)</div>
-                        <div class="section-content">{certidao_data.get('proprietarios', '')}</div>
-                    </div>
-                    <div class="certidao-section">
-                        <div class="section-title">INSCRIÇÃO IMOBILIÁRIA</div>
-                        <div class="section-content">{certidao_data.get('inscricao_imobiliaria', '')}</div>
-                    </div>"""
-            
-            if certidao_data.get('rip'):
-                html += f"""<div class="certidao-section">
-                        <div class="section-title">REGISTRO IMOBILIÁRIO PATRIMONIAL (RIP)</div>
-                        <div class="section-content">{certidao_data.get('rip')}</div>
-                    </div>"""
-            html += f"""<div class="certidao-section">
-                        <div class="section-title">DIREITOS, ÔNUS REAIS E RESTRIÇÕES JUDICIAIS E ADMINISTRATIVAS</div>
-                        <div class="section-content">O referido é verdade e dou fé. São Luís/MA, {data_certidao}.</div>
-                    </div>
-                    <div class="certidao-section">
-                        <div class="section-title">Emolumentos</div>
-                        <div class="section-content">{certidao_data.get('emolumentos', '')}</div>
-                    </div>
-                    <div class="certidao-signature">
-                        <div class="signature-left">João Gabriel Santos Barros,<br>Escrevente</div>
-                        <div class="signature-right">Autorizado.</div>
-                    </div>
-                    <div class="certidao-validity">Validade: 30 dias.</div>
-                </div>
-            </div>"""
-            return html
-        
-        formatted_html = generate_formatted_html(campos)
-        
-        return jsonify({
-            'success': True,
-            'data': campos,
-            'text_content': text_content,
-            'formatted_html': formatted_html,
-            'message': 'Dados da certidão extraídos com sucesso'
-        })
+        # OCR, extração com IA e HTML do preview (mesmo processamento do job assíncrono em /api/jobs)
+        response_data, status_code = pipeline_certidao_data(
+            no_progress, temp_file_path, user_ip, request.form.get('model', 'gpt-4o')
+        )
+        return jsonify(response_data), status_code
 
     except Exception as e:
         print(f"❌ Erro geral na extração de dados da certidão: {str(e)}")
         # Limpar arquivos temporários em caso de erro
         if Config.SECURE_PROCESSING and temp_file_path:
             secure_manager.cleanup_file(temp_file_path, user_ip)
-        if 'temp_ocr_path' in locals() and temp_ocr_path and os.path.exists(temp_ocr_path):
-            try:
-                os.remove(temp_ocr_path)
-            except Exception:
-                pass
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500 
 
 @ai_bp.route('/api/certidao/word', methods=['POST'])
@@ -906,34 +654,28 @@ def generate_certidao_word():
                     print(f"📄 Arquivo temporário: {temp_file_path}")
                     print(f"📁 Arquivo existe: {os.path.exists(temp_file_path)}")
                     
-                    # Tentar extrair texto diretamente
-                    with open(temp_file_path, 'rb') as f:
-                        pdf_reader = pypdf.PdfReader(f)
-                        print(f"📊 Número de páginas: {len(pdf_reader.pages)}")
-                        for i, page in enumerate(pdf_reader.pages):
-                            page_text = page.extract_text()
-                            text_content += page_text + "\n"
-                            print(f"📝 Página {i+1}: {len(page_text)} caracteres")
+                    # Tentar extrair texto diretamente (normalizado página a página)
+                    paginas = []
+                    for i, page_text in enumerate(iterar_paginas_normalizadas(temp_file_path)):
+                        paginas.append(page_text)
+                        print(f"📝 Página {i+1}: {len(page_text)} caracteres")
+                    print(f"📊 Número de páginas: {len(paginas)}")
                     
+                    text_content = juntar_paginas(paginas)
                     print(f"✅ Extração direta: {len(text_content)} caracteres totais")
                 except Exception as e:
                     print(f"❌ Erro ao extrair texto de {original_filename}: {str(e)}")
                     text_content = ""
                 
-                # Limpar e normalizar texto
-                text_content = re.sub(r'\s+', ' ', text_content.replace('\n', ' ')).strip()
-                print(f"🧹 Texto após limpeza: {len(text_content)} caracteres")
-                
                 # SEMPRE tentar OCR primeiro para garantir melhor extração de texto
                 print(f"📄 Executando OCR para {original_filename} (SEMPRE para qualificação)...")
                 try:
-                    from ai.ocr_service import process_pdf_with_ocr, extract_text_from_pdf
+                    from ai.ocr_service import process_pdf_with_ocr
                     temp_ocr_path = temp_file_path + '_ocr.pdf'
                     ocr_result = process_pdf_with_ocr(temp_file_path, temp_ocr_path)
                     if ocr_result.get('success'):
                         print(f"✅ OCR bem-sucedido para {original_filename}")
-                        ocr_text = extract_text_from_pdf(temp_ocr_path)
-                        ocr_text = re.sub(r'\s+', ' ', ocr_text.replace('\n', ' ')).strip()
+                        ocr_text = texto_normalizado(ocr_result)
                         
                         # Usar o melhor texto (OCR ou extração direta)
                         if len(ocr_text) > len(text_content):
@@ -0,0 +1,179 @@
+# Endpoints de processamento assíncrono (jobs de OCR/IA)
+
+import json
+import time
+from flask import Blueprint, Response, request, jsonify, url_for, stream_with_context
+from werkzeug.utils import secure_filename
+from config import Config
+from security import secure_manager
+from ai.jobs import job_manager, JobQueueFullError, STATUS_ATIVOS
+from api.pipelines import save_upload, pipeline_ocr, pipeline_process_file, pipeline_certidao_data
+
+jobs_bp = Blueprint('jobs', __name__)
+
+# Tipos de job aceitos em /api/jobs (equivalentes às rotas síncronas)
+JOB_TYPES = ('ocr', 'process-file', 'certidao-data')
+
+# Intervalo máximo sem mensagens no stream de eventos (evita timeout de proxies)
+SSE_KEEPALIVE_SECONDS = 15
+
+@jobs_bp.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Envia um PDF para processamento assíncrono
+
+    Form:
+        file: PDF
+        type: 'ocr' (como /api/ocr), 'process-file' (como /api/process-file)
+            ou 'certidao-data' (como /api/certidao/data)
+        service, model: Mesmos campos das rotas síncronas
+
+    Responde 202 com o job_id; o andamento fica em /api/jobs/<job_id>
+    e o resultado em /api/jobs/<job_id>/result.
+    """
+    temp_file_path = None
+    user_ip = request.remote_addr
+
+    try:
+        job_type = request.form.get('type', 'ocr')
+        if job_type not in JOB_TYPES:
+            return jsonify({'error': f'Tipo de job inválido: {job_type}', 'types': list(JOB_TYPES)}), 400
+
+        if 'file' not in request.files:
+            return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
+        if not file.filename or file.filename.rsplit('.', 1)[-1].lower() not in Config.ALLOWED_EXTENSIONS:
+            return jsonify({'error': 'Apenas arquivos PDF ou imagens (JPEG, PNG, TIFF) são permitidos'}), 400
+
+        # O /api/ocr mantém o nome original (usado no download do PDF pesquisável)
+        original_filename = file.filename if job_type == 'ocr' else secure_filename(file.filename or 'unknown.pdf')
+        model = request.form.get('model', 'gpt-4o')
+        temp_file_path, file_id = save_upload(file, original_filename, user_ip)
+
+        if job_type == 'ocr':
+            job_id = job_manager.submit(job_type, pipeline_ocr, temp_file_path, file_id, original_filename, user_ip)
+        elif job_type == 'process-file':
+            job_id = job_manager.submit(job_type, pipeline_process_file, temp_file_path, file_id, original_filename,
+                                        user_ip, request.form.get('service', 'certidao'), model)
+        else:
+            job_id = job_manager.submit(job_type, pipeline_certidao_data, temp_file_path, user_ip, model)
+
+        print(f"📥 Job {job_id} ({job_type}) enfileirado")
+        status_url = url_for('jobs.get_job_status', job_id=job_id)
+        response = jsonify({
+            'success': True,
+            'job_id': job_id,
+            'file_id': file_id,
+            'type': job_type,
+            'status': 'queued',
+            'status_url': status_url,
+            'result_url': url_for('jobs.get_job_result', job_id=job_id),
+            'events_url': url_for('jobs.job_events', job_id=job_id),
+            'cancel_url': url_for('jobs.cancel_job', job_id=job_id)
+        })
+        response.headers['Location'] = status_url
+        return response, 202
+
+    except JobQueueFullError as e:
+        if temp_file_path:
+            secure_manager.cleanup_file(temp_file_path, user_ip)
+        response = jsonify({'error': 'Servidor ocupado, muitos arquivos em processamento.', 'details': str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    except Exception as e:
+        if Config.SECURE_PROCESSING and temp_file_path:
+            secure_manager.cleanup_file(temp_file_path, user_ip)
+        return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
+
+@jobs_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Estado e progresso do job (etapa, página atual / total)"""
+    job = job_manager.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado ou expirado'}), 404
+    return jsonify(job)
+
+@jobs_bp.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """
+    Resultado do job: a mesma resposta (corpo e status HTTP) da rota síncrona
+    equivalente, ou 202 enquanto o job não terminou
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado ou expirado'}), 404
+    if job['status'] in STATUS_ATIVOS:
+        response = jsonify({
+            'job_id': job_id,
+            'status': job['status'],
+            'progress': job['progress']
+        })
+        response.headers['Retry-After'] = '2'
+        return response, 202
+    return jsonify(job['result']), job['http_status']
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@jobs_bp.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Stream (Server-Sent Events) do andamento do job
+
+    Eventos:
+        progress: estado e progresso a cada mudança (etapa, página atual / total)
+        done: job finalizado, com o resultado e o status HTTP da rota equivalente
+    """
+    if job_manager.status(job_id) is None:
+        return jsonify({'error': 'Job não encontrado ou expirado'}), 404
+
+    def gerar():
+        ultimo = None
+        ultimo_envio = time.time()
+        while True:
+            job = job_manager.get(job_id)
+            if job is None:
+                yield _sse('done', {'job_id': job_id, 'status': 'failed', 'http_status': 404,
+                                    'result': {'error': 'Job não encontrado ou expirado'}})
+                return
+
+            if job['status'] not in STATUS_ATIVOS:
+                yield _sse('done', {
+                    'job_id': job_id,
+                    'status': job['status'],
+                    'progress': job['progress'],
+                    'http_status': job['http_status'],
+                    'result': job['result']
+                })
+                return
+
+            if job['updated_at'] != ultimo:
+                ultimo = job['updated_at']
+                ultimo_envio = time.time()
+                yield _sse('progress', {'job_id': job_id, 'status': job['status'], 'progress': job['progress']})
+            elif time.time() - ultimo_envio >= SSE_KEEPALIVE_SECONDS:
+                ultimo_envio = time.time()
+                yield ': keepalive\n\n'
+
+            job_manager.wait_for_update(job_id, ultimo, SSE_KEEPALIVE_SECONDS)
+
+    return Response(stream_with_context(gerar()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Desabilitar o buffer do nginx para os eventos chegarem na hora
+        'X-Accel-Buffering': 'no'
+    })
+
+@jobs_bp.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancela o job; o OCR em andamento é interrompido (processos do ocrmypdf e do OCR paralelo encerrados)"""
+    job = job_manager.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado ou expirado'}), 404
+    if not job_manager.cancel(job_id):
+        if job['status'] in STATUS_ATIVOS:
+            return jsonify({'error': 'Job em execução em outro processo do servidor', 'status': job['status']}), 409
+        return jsonify({'error': 'Job já finalizado', 'status': job['status']}), 409
+    print(f"🛑 Cancelamento do job {job_id} solicitado")
+    return jsonify({'success': True, 'job_id': job_id, 'status': 'cancelling'}), 202
@@ -2,12 +2,15 @@
 
 from flask import Blueprint, jsonify, send_file, current_app, request
 import os
-import uuid
 import tempfile
 from datetime import datetime
 from config import Config
 from security import secure_manager
-from ai.ocr_service import process_pdf_with_ocr, extract_text_from_pdf, get_ocr_info, is_pdf_signed
+from ai.ocr_service import extract_text_from_pdf
+from ai.image_ocr import nome_saida_pdf
+from ai.ocr_windows import documento_grande, iterar_textos
+from ai import ocr_capabilities
+from api.pipelines import save_upload, no_progress, pipeline_ocr
 import logging
 
 utils_bp = Blueprint('utils', __name__)
@@ -31,9 +34,8 @@ def download_file(filename):
 
 @utils_bp.route('/api/ocr', methods=['POST'])
 def process_ocr():
-    """Endpoint para processar PDFs com OCR - Nova implementação com detecção de assinatura digital"""
+    """Endpoint para processar PDFs e imagens (JPEG, PNG, TIFF) com OCR - Nova implementação com detecção de assinatura digital"""
     temp_input_path = None
-    temp_output_path = None
     user_ip = request.remote_addr
     
     try:
@@ -46,84 +48,29 @@ def process_ocr():
             return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
         
         # Verificar extensão
-        if not file.filename or not file.filename.lower().endswith('.pdf'):
-            return jsonify({'error': 'Apenas arquivos PDF são permitidos'}), 400
+        if not file.filename or file.filename.rsplit('.', 1)[-1].lower() not in Config.ALLOWED_EXTENSIONS:
+            return jsonify({'error': 'Apenas arquivos PDF ou imagens (JPEG, PNG, TIFF) são permitidos'}), 400
         
         # Processar arquivo de forma segura
         original_filename = file.filename
-        if Config.SECURE_PROCESSING:
-            temp_input_path, file_id = secure_manager.process_file_securely(
-                file, original_filename, user_ip
-            )
-        else:
-            file_id = str(uuid.uuid4())
-            temp_input_path = os.path.join(Config.UPLOAD_FOLDER, f"{file_id}_{original_filename}")
-            file.save(temp_input_path)
-        
-        # Verificar se já existe um arquivo OCR para este file_id
-        output_filename = f"ocr_{file_id}_{original_filename}"
-        temp_output_path = os.path.join(Config.TEMP_DIRECTORY, output_filename)
-        
-        if os.path.exists(temp_output_path):
-            # Se o arquivo já existe, retornar sucesso sem reprocessar
-            ocr_info = get_ocr_info(temp_output_path)
-            return jsonify({
-                'success': True,
-                'message': 'Arquivo OCR já processado anteriormente',
-                'file_id': file_id,
-                'original_filename': original_filename,
-                'output_filename': output_filename,
-                'processing_time': 0,
-                'pages_processed': ocr_info.get('pages', 0),
-                'ocr_info': ocr_info,
-                'secure_processing': Config.SECURE_PROCESSING,
-                'cached': True
-            })
-        
-        # Descriptografar se necessário
-        if Config.SECURE_PROCESSING and Config.ENCRYPT_TEMP_FILES:
-            temp_input_path = secure_manager.decrypt_file(temp_input_path)
-        
-        # Verificar se o PDF tem assinatura digital
-        has_signature = is_pdf_signed(temp_input_path)
-        
-        # Processar com nova implementação OCR
-        result = process_pdf_with_ocr(temp_input_path, temp_output_path)
+        temp_input_path, file_id = save_upload(file, original_filename, user_ip)
         
-        if not result['success']:
-            return jsonify({'error': result['error']}), 500
-        
-        # Obter informações do resultado
-        ocr_info = get_ocr_info(temp_output_path)
-        
-        return jsonify({
-            'success': True,
-            'message': result['message'],
-            'file_id': file_id,
-            'original_filename': original_filename,
-            'output_filename': output_filename,
-            'processing_time': result['processing_time'],
-            'pages_processed': result.get('pages_processed', 0),
-            'ocr_info': ocr_info,
-            'has_signature': has_signature,
-            'secure_processing': Config.SECURE_PROCESSING
-        })
+        # OCR (mesmo processamento do job assíncrono em /api/jobs)
+        response_data, status_code = pipeline_ocr(no_progress, temp_input_path, file_id, original_filename, user_ip)
+        return jsonify(response_data), status_code
         
     except Exception as e:
         # Garantir limpeza em caso de erro
-        if Config.SECURE_PROCESSING:
-            if temp_input_path:
-                secure_manager.cleanup_file(temp_input_path, user_ip)
-            if temp_output_path:
-                secure_manager.cleanup_file(temp_output_path, user_ip)
+        if Config.SECURE_PROCESSING and temp_input_path:
+            secure_manager.cleanup_file(temp_input_path, user_ip)
         return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
 
 @utils_bp.route('/api/ocr/download/<file_id>', methods=['GET'])
 def download_ocr_result(file_id):
     """Download do resultado do OCR"""
     try:
-        # Construir nome do arquivo
-        filename = request.args.get('filename', 'ocr_result.pdf')
+        # Construir nome do arquivo (o PDF gerado de uma imagem tem extensão .pdf)
+        filename = nome_saida_pdf(request.args.get('filename', 'ocr_result.pdf'))
         
         # Caminho do arquivo - usar o diretório temporário correto
         file_path = os.path.join(Config.TEMP_DIRECTORY, f"ocr_{file_id}_{filename}")
@@ -160,8 +107,8 @@ def download_ocr_result(file_id):
 def download_ocr_text(file_id):
     """Download do texto extraído do OCR"""
     try:
-        # Construir nome do arquivo
-        filename = request.args.get('filename', 'ocr_result.pdf')
+        # Construir nome do arquivo (o PDF gerado de uma imagem tem extensão .pdf)
+        filename = nome_saida_pdf(request.args.get('filename', 'ocr_result.pdf'))
         
         # Caminho do arquivo - usar o diretório temporário correto
         file_path = os.path.join(Config.TEMP_DIRECTORY, f"ocr_{file_id}_{filename}")
@@ -175,13 +122,18 @@ def download_ocr_text(file_id):
             else:
                 return jsonify({'error': f'Arquivo não encontrado: {file_path}'}), 404
         
-        # Extrair texto
-        text = extract_text_from_pdf(file_path)
-        
-        # Criar arquivo temporário com o texto
+        # Texto gravado pelo /api/ocr; se não existir, extrair do PDF
         temp_text_file = os.path.join(Config.TEMP_DIRECTORY, f"text_{file_id}.txt")
-        with open(temp_text_file, 'w', encoding='utf-8') as f:
-            f.write(text)
+        if not os.path.exists(temp_text_file):
+            if documento_grande(file_path):
+                # PDFs grandes: texto gravado página a página, sem montar o documento em memória
+                with open(temp_text_file, 'w', encoding='utf-8') as f:
+                    for indice, texto in enumerate(iterar_textos(file_path)):
+                        f.write(('\n' if indice else '') + texto)
+            else:
+                text = extract_text_from_pdf(file_path)
+                with open(temp_text_file, 'w', encoding='utf-8') as f:
+                    f.write(text)
         
         return send_file(
             temp_text_file,
@@ -195,14 +147,25 @@ def download_ocr_text(file_id):
 
 @utils_bp.route('/api/health')
 def health_check():
+    # Dependências do OCR verificadas na primeira chamada e mantidas em cache no processo;
+    # ?refresh=1 verifica de novo (ex.: depois de instalar o Tesseract)
+    if request.args.get('refresh') == '1':
+        ocr_capabilities.clear_cache()
+    capabilities = ocr_capabilities.capabilities()
+    ocr_ok = capabilities['ocrmypdf']['available'] and (
+        capabilities['tesseract']['available']
+        or (Config.OCR_ENGINE == 'tesserocr' and capabilities['tesserocr']['available'])
+    )
+
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if ocr_ok else 'degraded',
         'timestamp': datetime.now().isoformat(),
         'version': '8.0.0',
         'mode': 'chatgpt_and_ocr',
-        'message': 'Sistema funcionando com ChatGPT e OCR',
+        'message': 'Sistema funcionando com ChatGPT e OCR' if ocr_ok else 'Sistema funcionando sem OCR disponível',
+        'capabilities': capabilities,
         'features': {
-            'ocr': True,
+            'ocr': ocr_ok,
             'chatgpt': True,
             'signature_detection': True,
             'secure_processing': Config.SECURE_PROCESSING
@@ -15,6 +15,7 @@ from flask import Flask, send_from_directory
 from flask_cors import CORS
 from api.routes_ai import ai_bp
 from api.routes_utils import utils_bp
+from api.routes_jobs import jobs_bp
 from config import Config
 
 app = Flask(__name__, static_folder='static')
@@ -26,6 +27,7 @@ Config.init_app(app)
 # Registrar blueprints
 app.register_blueprint(ai_bp)
 app.register_blueprint(utils_bp)
+app.register_blueprint(jobs_bp)
 
 # Servir index.html
 @app.route('/')
@@ -44,7 +46,9 @@ if __name__ == '__main__':
     
     # Verificar status do OCR
     try:
-        from ai.ocr_service import OCR_AVAILABLE, TESSERACT_AVAILABLE
+        from ai.ocr_capabilities import ocr_available, tesseract_available
+        OCR_AVAILABLE = ocr_available()
+        TESSERACT_AVAILABLE = tesseract_available()
         print("\n🔍 Status do OCR:")
         print("=" * 40)
         
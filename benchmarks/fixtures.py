@@ -0,0 +1,191 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# PDFs sintéticos usados no benchmark do OCR (benchmarks/ocr_benchmark.py)
+#
+# Gerados localmente com reportlab, pypdfium2 e Pillow a partir de uma semente
+# fixa: a mesma versão do código produz sempre os mesmos arquivos, e os
+# resultados de commits diferentes podem ser comparados.
+
+import io
+import os
+import random
+import numpy as np
+import pikepdf
+import pypdfium2 as pdfium
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+SEMENTE = 2025
+
+# Resolução e qualidade das páginas "digitalizadas"
+DPI_DIGITALIZACAO = 300
+QUALIDADE_JPEG = 60
+
+# Vocabulário das páginas (trechos típicos de certidões e matrículas)
+FRASES = [
+    "Certifico, a requerimento da parte interessada, que revendo os livros deste cartório",
+    "consta a matrícula do imóvel situado nesta cidade de São Luís, Estado do Maranhão,",
+    "com área total de 360,00 m², limitando-se ao norte com o lote 12 da quadra 7,",
+    "ao sul com a Rua das Gaivotas, a leste com o lote 14 e a oeste com área remanescente.",
+    "Proprietário: José da Silva Ribeiro, brasileiro, casado, CPF 123.456.789-00,",
+    "R-1: Compra e venda registrada em 12/03/2015, pelo valor de R$ 250.000,00 (duzentos",
+    "e cinquenta mil reais), conforme escritura pública lavrada no 2º Tabelionato de Notas.",
+    "AV-2: Averbação de construção de prédio residencial com 180,00 m² de área construída,",
+    "nos termos do habite-se nº 4.321/2016 expedido pela Prefeitura Municipal.",
+    "R-3: Hipoteca em favor do Banco do Brasil S.A., em garantia de dívida no valor",
+    "O referido é verdade e dou fé. Emolumentos: R$ 87,45. Selo de fiscalização nº",
+    "Não constam ônus reais, ações reais ou pessoais reipersecutórias sobre o imóvel.",
+]
+
+# Nome do arquivo -> (tipo, número de páginas)
+FIXTURES = {
+    'digital_1p': ('digital', 1),
+    'digital_10p': ('digital', 10),
+    'escaneado_1p': ('escaneado', 1),
+    'escaneado_10p': ('escaneado', 10),
+    'escaneado_100p': ('escaneado', 100),
+    'assinado_3p': ('assinado', 3),
+    'rotacionado_3p': ('rotacionado', 3),
+}
+
+def _texto_pagina(aleatorio, numero_pagina, total_paginas):
+    linhas = [f"REGISTRO DE IMÓVEIS - CERTIDÃO DE INTEIRO TEOR - Página {numero_pagina} de {total_paginas}", ""]
+    for _ in range(aleatorio.randint(28, 36)):
+        linhas.append(aleatorio.choice(FRASES))
+    return linhas
+
+def gerar_pdf_digital(caminho, paginas, semente=SEMENTE):
+    """PDF nato digital: texto com fonte padrão, uma certidão sintética por página"""
+    aleatorio = random.Random(semente)
+    documento = canvas.Canvas(caminho, pagesize=A4, invariant=1)
+    largura, altura = A4
+    for numero in range(1, paginas + 1):
+        texto = documento.beginText(50, altura - 60)
+        texto.setFont('Helvetica', 10)
+        for linha in _texto_pagina(aleatorio, numero, paginas):
+            texto.textLine(linha)
+        documento.drawText(texto)
+        documento.showPage()
+    documento.save()
+    return caminho
+
+def _digitalizar(imagem, aleatorio):
+    """Simula uma digitalização: inclinação leve, papel acinzentado, granulado e poeira"""
+    angulo = aleatorio.uniform(-2.0, 2.0)
+    imagem = imagem.rotate(angulo, resample=Image.BILINEAR, fillcolor=255)
+    gerador = np.random.default_rng(aleatorio.randrange(2 ** 32))
+    pixels = np.asarray(imagem, dtype=np.float32) * 0.85 + 25
+    pixels += gerador.normal(0, 2, pixels.shape)
+    pixels[gerador.random(pixels.shape) < 0.0005] = 40
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), mode='L')
+
+def gerar_pdf_escaneado(caminho, paginas, semente=SEMENTE, dpi=DPI_DIGITALIZACAO, girar=False):
+    """
+    PDF só com imagens, como o de um scanner: as páginas do PDF digital são
+    renderizadas em `dpi`, degradadas e gravadas em JPEG, sem camada de texto
+
+    Com girar=True a imagem é gravada deitada e a página recebe /Rotate 90
+    (digitalização feita com a folha de lado, corrigida no visualizador).
+    """
+    aleatorio = random.Random(semente)
+    origem = io.BytesIO()
+    gerar_pdf_digital(origem, paginas, semente)
+
+    documento_origem = pdfium.PdfDocument(origem)
+    documento = canvas.Canvas(caminho, pagesize=A4, invariant=1)
+    largura, altura = A4
+    try:
+        for indice in range(len(documento_origem)):
+            imagem = documento_origem[indice].render(scale=dpi / 72, grayscale=True).to_pil().convert('L')
+            imagem = _digitalizar(imagem, aleatorio)
+            if girar:
+                imagem = imagem.rotate(-90, expand=True)
+            jpeg = io.BytesIO()
+            imagem.save(jpeg, format='JPEG', quality=QUALIDADE_JPEG)
+            jpeg.seek(0)
+            if girar:
+                documento.setPageSize((altura, largura))
+                documento.drawImage(ImageReader(jpeg), 0, 0, altura, largura)
+            else:
+                documento.setPageSize(A4)
+                documento.drawImage(ImageReader(jpeg), 0, 0, largura, altura)
+            documento.showPage()
+        documento.save()
+    finally:
+        documento_origem.close()
+
+    if girar:
+        with pikepdf.open(caminho, allow_overwriting_input=True) as pdf:
+            for pagina in pdf.pages:
+                pagina.Rotate = 90
+            pdf.save(caminho)
+    return caminho
+
+def gerar_pdf_assinado(caminho, paginas, semente=SEMENTE):
+    """
+    PDF digital com campo de assinatura (/SigFlags e campo /Sig), que segue
+    pelo caminho de remoção da assinatura antes do OCR
+    """
+    gerar_pdf_digital(caminho, paginas, semente)
+    with pikepdf.open(caminho, allow_overwriting_input=True) as pdf:
+        campo = pdf.make_indirect(pikepdf.Dictionary(
+            Type=pikepdf.Name.Annot,
+            Subtype=pikepdf.Name.Widget,
+            FT=pikepdf.Name.Sig,
+            T=pikepdf.String('Assinatura1'),
+            Rect=[400, 40, 560, 80],
+            F=4,
+            P=pdf.pages[-1].obj,
+        ))
+        pdf.pages[-1].Annots = pdf.make_indirect(pikepdf.Array([campo]))
+        pdf.Root.AcroForm = pdf.make_indirect(pikepdf.Dictionary(
+            Fields=pikepdf.Array([campo]),
+            SigFlags=3,
+        ))
+        pdf.save(caminho)
+    return caminho
+
+def gerar_fixtures(diretorio, nomes=None, regenerar=False):
+    """
+    Gera os PDFs do benchmark que ainda não existem no diretório
+
+    Args:
+        diretorio: Diretório dos arquivos (<nome>.pdf)
+        nomes: Fixtures a gerar (padrão: todas de FIXTURES)
+        regenerar: Gerar de novo os arquivos que já existem
+
+    Returns:
+        dict: {nome: caminho do PDF}
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    caminhos = {}
+    for nome in nomes or FIXTURES:
+        tipo, paginas = FIXTURES[nome]
+        caminho = os.path.join(diretorio, f"{nome}.pdf")
+        caminhos[nome] = caminho
+        if os.path.exists(caminho) and not regenerar:
+            continue
+        print(f"🧪 Gerando {nome}.pdf ({paginas} páginas)")
+        if tipo == 'digital':
+            gerar_pdf_digital(caminho, paginas)
+        elif tipo == 'escaneado':
+            gerar_pdf_escaneado(caminho, paginas)
+        elif tipo == 'rotacionado':
+            gerar_pdf_escaneado(caminho, paginas, girar=True)
+        elif tipo == 'assinado':
+            gerar_pdf_assinado(caminho, paginas)
+    return caminhos
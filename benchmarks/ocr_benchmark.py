@@ -0,0 +1,303 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# Benchmark de desempenho do OCR
+#
+# Executa process_pdf_with_ocr, extract_text_from_pdf e get_ocr_info nos PDFs
+# sintéticos de benchmarks/fixtures.py e grava páginas por segundo, latência
+# (p50/p95) e pico de memória (RSS) em JSON, para comparar commits:
+#
+#   python -m benchmarks.ocr_benchmark -o antes.json
+#   python -m benchmarks.ocr_benchmark -o depois.json --compare antes.json
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from config import Config
+from benchmarks.fixtures import FIXTURES, gerar_fixtures
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    # Windows: pico de memória via psutil, se instalado
+    RESOURCE_AVAILABLE = False
+
+FUNCOES = ('process_pdf_with_ocr', 'extract_text_from_pdf', 'get_ocr_info')
+
+DIRETORIO_FIXTURES = os.path.join(Config.TEMP_DIRECTORY, 'benchmark_fixtures')
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+
+def percentil(valores, p):
+    """Percentil p (0-100) com interpolação linear entre as amostras ordenadas"""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+def _pico_memoria():
+    """Pico de memória residente (bytes) do processo e do maior processo filho já encerrado"""
+    if RESOURCE_AVAILABLE:
+        # ru_maxrss é em KB no Linux e em bytes no macOS
+        unidade = 1 if sys.platform == 'darwin' else 1024
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unidade
+        pico_filhos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unidade
+        try:
+            # No Linux ru_maxrss conserva o pico do processo que criou este (mantido no exec);
+            # VmHWM é só deste processo
+            with open('/proc/self/status', 'r') as f:
+                for linha in f:
+                    if linha.startswith('VmHWM:'):
+                        pico = int(linha.split()[1]) * 1024
+        except OSError:
+            pass
+        return pico, pico_filhos
+    try:
+        import psutil
+        memoria = psutil.Process().memory_info()
+        return getattr(memoria, 'peak_wset', memoria.rss), None
+    except ImportError:
+        return None, None
+
+def _limpar_cache_inspecoes():
+    """Descarta as inspeções de PDF em memória, para medir a leitura do arquivo a cada repetição"""
+    from ai import pdf_inspection
+    with pdf_inspection._inspections_lock:
+        pdf_inspection._inspections.clear()
+
+def _executar_cenario(funcao, caminho_pdf, repeticoes, aquecimento, opcoes_ocr):
+    """
+    Mede uma função em um PDF (executado em um processo novo por cenário)
+
+    O processo isolado dá a cada cenário o próprio pico de memória e evita que
+    módulos e caches carregados por um cenário favoreçam o seguinte.
+    """
+    from ai import ocr_service
+    from ai.pdf_inspection import inspect_pdf
+
+    paginas = inspect_pdf(caminho_pdf).page_count
+    pasta_saida = tempfile.mkdtemp(prefix='axion_bench_')
+    latencias = []
+    erro = None
+    try:
+        for repeticao in range(aquecimento + repeticoes):
+            _limpar_cache_inspecoes()
+            inicio = time.perf_counter()
+            if funcao == 'process_pdf_with_ocr':
+                resultado = ocr_service.process_pdf_with_ocr(
+                    caminho_pdf, os.path.join(pasta_saida, f'saida_{repeticao}.pdf'), dict(opcoes_ocr)
+                )
+                if not resultado.get('success'):
+                    erro = resultado.get('error', 'Erro desconhecido')
+                    break
+            elif funcao == 'extract_text_from_pdf':
+                ocr_service.extract_text_from_pdf(caminho_pdf)
+            else:
+                ocr_service.get_ocr_info(caminho_pdf)
+            if repeticao >= aquecimento:
+                latencias.append(time.perf_counter() - inicio)
+    finally:
+        shutil.rmtree(pasta_saida, ignore_errors=True)
+
+    pico, pico_filhos = _pico_memoria()
+    return {'pages': paginas, 'latencies': latencias, 'error': erro,
+            'peak_rss_bytes': pico, 'peak_rss_children_bytes': pico_filhos}
+
+def _resumir(funcao, nome, medicao):
+    latencias = medicao['latencies']
+    total = sum(latencias)
+    return {
+        'function': funcao,
+        'fixture': nome,
+        'pages': medicao['pages'],
+        'runs': len(latencias),
+        'latency_p50_s': round(percentil(latencias, 50), 4) if latencias else None,
+        'latency_p95_s': round(percentil(latencias, 95), 4) if latencias else None,
+        'latency_mean_s': round(total / len(latencias), 4) if latencias else None,
+        'pages_per_second': round(medicao['pages'] * len(latencias) / total, 2) if total else None,
+        'peak_rss_bytes': medicao['peak_rss_bytes'],
+        'peak_rss_children_bytes': medicao['peak_rss_children_bytes'],
+        'error': medicao['error']
+    }
+
+def _commit_atual():
+    try:
+        resultado = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                   timeout=10, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return resultado.stdout.strip() or None
+    except Exception:
+        return None
+
+def executar_benchmark(funcoes=None, fixtures=None, repeticoes=3, aquecimento=1, opcoes_ocr=None,
+                       diretorio_fixtures=None, caminho_saida=None):
+    """
+    Executa os cenários (função x fixture) e grava o relatório JSON
+
+    Args:
+        funcoes: Funções medidas (padrão: FUNCOES)
+        fixtures: Nomes dos PDFs de benchmarks/fixtures.py (padrão: todos)
+        repeticoes: Execuções medidas por cenário
+        aquecimento: Execuções descartadas antes das medidas (importações, pools)
+        opcoes_ocr: Options de process_pdf_with_ocr (o cache de OCR fica desligado por padrão)
+        diretorio_fixtures: Onde os PDFs são gerados (padrão: DIRETORIO_FIXTURES)
+        caminho_saida: Relatório JSON (padrão: benchmarks/resultados/ocr_<data>_<commit>.json)
+
+    Returns:
+        dict: Relatório (ambiente, configuração e resultados por cenário)
+    """
+    from ai import ocr_capabilities
+
+    funcoes = funcoes or FUNCOES
+    opcoes_ocr = dict({'use_cache': False}, **(opcoes_ocr or {}))
+    caminhos = gerar_fixtures(diretorio_fixtures or DIRETORIO_FIXTURES, fixtures)
+    capacidades = ocr_capabilities.capabilities()
+    motor = opcoes_ocr.get('engine', Config.OCR_ENGINE)
+    ocr_disponivel = capacidades['ocrmypdf']['available'] and (
+        capacidades['tesseract']['available']
+        or (motor == 'tesserocr' and capacidades['tesserocr']['available'])
+    )
+
+    commit = _commit_atual()
+    relatorio = {
+        'started_at': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'capabilities': capacidades,
+        'config': {
+            'engine': motor,
+            'parallel': opcoes_ocr.get('parallel', Config.OCR_PARALLEL),
+            'force_ocr': opcoes_ocr.get('force_ocr', Config.OCR_FORCE_OCR),
+            'use_cache': opcoes_ocr['use_cache'],
+            'preprocess': Config.OCR_PREPROCESS,
+            'target_dpi': Config.OCR_TARGET_DPI,
+            'runs': repeticoes,
+            'warmup': aquecimento
+        },
+        'results': []
+    }
+
+    contexto = multiprocessing.get_context('spawn')
+    for funcao in funcoes:
+        for nome, caminho in caminhos.items():
+            if funcao == 'process_pdf_with_ocr' and not ocr_disponivel:
+                print(f"⏭️ {funcao} / {nome}: OCR indisponível")
+                relatorio['results'].append({'function': funcao, 'fixture': nome, 'skipped': 'OCR indisponível'})
+                continue
+            print(f"⏱️ {funcao} / {nome}...", flush=True)
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                medicao = executor.submit(_executar_cenario, funcao, caminho, repeticoes, aquecimento,
+                                          opcoes_ocr).result()
+            resultado = _resumir(funcao, nome, medicao)
+            relatorio['results'].append(resultado)
+            if resultado['error']:
+                print(f"❌ {funcao} / {nome}: {resultado['error']}")
+            else:
+                print(f"✅ {funcao} / {nome}: {resultado['pages_per_second']} páginas/s, "
+                      f"p50 {resultado['latency_p50_s']}s, p95 {resultado['latency_p95_s']}s, "
+                      f"pico {(resultado['peak_rss_bytes'] or 0) / 1024 / 1024:.0f}MB")
+
+    relatorio['finished_at'] = datetime.now().isoformat()
+    if not caminho_saida:
+        os.makedirs(DIRETORIO_RESULTADOS, exist_ok=True)
+        caminho_saida = os.path.join(
+            DIRETORIO_RESULTADOS, f"ocr_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit or 'sem_commit'}.json"
+        )
+    with open(caminho_saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    relatorio['report'] = caminho_saida
+    print(f"📁 Relatório salvo em: {caminho_saida}")
+    return relatorio
+
+def comparar(relatorio_base, relatorio):
+    """
+    Compara dois relatórios, cenário a cenário
+
+    Returns:
+        list: Variação (%) da latência p50 e de páginas por segundo em cada cenário presente nos dois
+    """
+    base = {(r['function'], r['fixture']): r for r in relatorio_base['results'] if r.get('latency_p50_s')}
+    variacoes = []
+    for atual in relatorio['results']:
+        anterior = base.get((atual['function'], atual['fixture']))
+        if not anterior or not atual.get('latency_p50_s'):
+            continue
+        variacoes.append({
+            'function': atual['function'],
+            'fixture': atual['fixture'],
+            'latency_p50_change_pct': round((atual['latency_p50_s'] / anterior['latency_p50_s'] - 1) * 100, 1),
+            'pages_per_second_change_pct': round(
+                (atual['pages_per_second'] / anterior['pages_per_second'] - 1) * 100, 1
+            ) if anterior.get('pages_per_second') and atual.get('pages_per_second') else None
+        })
+    return variacoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do OCR com PDFs sintéticos (resultado em JSON).")
+    parser.add_argument('-f', '--function', action='append', choices=FUNCOES,
+                        help='Função medida (pode repetir; padrão: todas)')
+    parser.add_argument('-x', '--fixture', action='append', choices=list(FIXTURES),
+                        help='PDF sintético usado (pode repetir; padrão: todos)')
+    parser.add_argument('-n', '--runs', type=int, default=3, help='Execuções medidas por cenário')
+    parser.add_argument('--warmup', type=int, default=1, help='Execuções descartadas antes das medidas')
+    parser.add_argument('--engine', choices=('ocrmypdf', 'tesserocr'), default=None, help='Motor do OCR')
+    parser.add_argument('--no-parallel', action='store_true', help='Desligar o OCR paralelo por páginas')
+    parser.add_argument('--force-ocr', action='store_true', help='OCR em todas as páginas (sem modo híbrido)')
+    parser.add_argument('--fixtures-dir', default=None, help='Diretório dos PDFs sintéticos')
+    parser.add_argument('--regenerate', action='store_true', help='Gerar os PDFs sintéticos de novo')
+    parser.add_argument('-o', '--output', default=None, help='Caminho do relatório JSON')
+    parser.add_argument('--compare', default=None, help='Relatório anterior para comparação')
+    args = parser.parse_args()
+
+    opcoes_ocr = {}
+    if args.engine:
+        opcoes_ocr['engine'] = args.engine
+    if args.no_parallel:
+        opcoes_ocr['parallel'] = False
+    if args.force_ocr:
+        opcoes_ocr['force_ocr'] = True
+
+    if args.regenerate:
+        gerar_fixtures(args.fixtures_dir or DIRETORIO_FIXTURES, args.fixture, regenerar=True)
+
+    relatorio = executar_benchmark(args.function, args.fixture, args.runs, args.warmup, opcoes_ocr,
+                                   args.fixtures_dir, args.output)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            relatorio_base = json.load(f)
+        print(f"\n📊 Comparação com {args.compare} (commit {relatorio_base.get('commit')}):")
+        for variacao in comparar(relatorio_base, relatorio):
+            print(f"   {variacao['function']} / {variacao['fixture']}: "
+                  f"p50 {variacao['latency_p50_change_pct']:+.1f}%, "
+                  f"páginas/s {variacao['pages_per_second_change_pct'] or 0:+.1f}%")
+
+    if any(r.get('error') for r in relatorio['results']):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# Comparação dos backends de extração de texto (ai/pdf_text.py)
+#
+# Extrai o texto dos PDFs sintéticos de benchmarks/fixtures.py com cada
+# backend instalado, grava latência (p50/p95), páginas por segundo e
+# caracteres extraídos em JSON e mostra a classificação, para escolher
+# Config.PDF_TEXT_BACKEND:
+#
+#   python -m benchmarks.text_benchmark
+#   python -m benchmarks.text_benchmark -x digital_10p -n 10
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from datetime import datetime
+from config import Config
+from ai import pdf_text
+from benchmarks.fixtures import FIXTURES, gerar_fixtures
+from benchmarks.ocr_benchmark import percentil, _commit_atual, DIRETORIO_FIXTURES, DIRETORIO_RESULTADOS
+
+def _medir(backend, caminho_pdf, repeticoes, aquecimento):
+    """Extrai o texto do PDF repetidas vezes com o backend (latências das execuções medidas)"""
+    latencias = []
+    paginas = []
+    for repeticao in range(aquecimento + repeticoes):
+        inicio = time.perf_counter()
+        paginas = pdf_text.extrair_paginas(caminho_pdf, backend)
+        if repeticao >= aquecimento:
+            latencias.append(time.perf_counter() - inicio)
+    return latencias, paginas
+
+def classificar(resultados):
+    """
+    Backends do mais rápido para o mais lento, pelo tempo total em todos os PDFs
+
+    Returns:
+        list: {'backend', 'total_s', 'pages_per_second'} de cada backend sem erro
+    """
+    totais = {}
+    for resultado in resultados:
+        if resultado.get('error') or not resultado.get('latency_mean_s'):
+            continue
+        total = totais.setdefault(resultado['backend'], {'backend': resultado['backend'], 'total_s': 0, 'pages': 0})
+        total['total_s'] += resultado['latency_mean_s']
+        total['pages'] += resultado['pages']
+    falhas = {r['backend'] for r in resultados if r.get('error')}
+    ranking = sorted((total for nome, total in totais.items() if nome not in falhas), key=lambda t: t['total_s'])
+    for total in ranking:
+        total['pages_per_second'] = round(total.pop('pages') / total['total_s'], 2) if total['total_s'] else None
+        total['total_s'] = round(total['total_s'], 4)
+    return ranking
+
+def executar_benchmark(backends=None, fixtures=None, repeticoes=5, aquecimento=1, diretorio_fixtures=None,
+                       caminho_saida=None):
+    """
+    Mede cada backend (backend x fixture) e grava o relatório JSON
+
+    Args:
+        backends: Backends medidos (padrão: todos os instalados)
+        fixtures: Nomes dos PDFs de benchmarks/fixtures.py (padrão: todos)
+        repeticoes: Execuções medidas por cenário
+        aquecimento: Execuções descartadas antes das medidas
+        diretorio_fixtures: Onde os PDFs são gerados (padrão: o mesmo do benchmark do OCR)
+        caminho_saida: Relatório JSON (padrão: benchmarks/resultados/texto_<data>_<commit>.json)
+
+    Returns:
+        dict: Relatório (ambiente, resultados por cenário e classificação)
+    """
+    backends = backends or pdf_text.backends_disponiveis()
+    caminhos = gerar_fixtures(diretorio_fixtures or DIRETORIO_FIXTURES, fixtures)
+
+    commit = _commit_atual()
+    relatorio = {
+        'started_at': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'configured_backend': Config.PDF_TEXT_BACKEND,
+        'config': {'runs': repeticoes, 'warmup': aquecimento},
+        'results': []
+    }
+
+    for nome, caminho in caminhos.items():
+        for backend in backends:
+            if not pdf_text.BACKENDS[backend][0]:
+                print(f"⏭️ {backend} / {nome}: não instalado")
+                relatorio['results'].append({'backend': backend, 'fixture': nome, 'skipped': 'Não instalado'})
+                continue
+            try:
+                latencias, paginas = _medir(backend, caminho, repeticoes, aquecimento)
+                erro = None
+            except Exception as e:
+                latencias, paginas, erro = [], [], str(e)
+            total = sum(latencias)
+            resultado = {
+                'backend': backend,
+                'fixture': nome,
+                'pages': len(paginas),
+                'chars': sum(len(pagina) for pagina in paginas),
+                'runs': len(latencias),
+                'latency_p50_s': round(percentil(latencias, 50), 4) if latencias else None,
+                'latency_p95_s': round(percentil(latencias, 95), 4) if latencias else None,
+                'latency_mean_s': round(total / len(latencias), 4) if latencias else None,
+                'pages_per_second': round(len(paginas) * len(latencias) / total, 2) if total else None,
+                'error': erro
+            }
+            relatorio['results'].append(resultado)
+            if erro:
+                print(f"❌ {backend} / {nome}: {erro}")
+            else:
+                print(f"✅ {backend} / {nome}: {resultado['pages_per_second']} páginas/s, "
+                      f"p50 {resultado['latency_p50_s']}s, {resultado['chars']} caracteres")
+
+    relatorio['ranking'] = classificar(relatorio['results'])
+    relatorio['finished_at'] = datetime.now().isoformat()
+    if not caminho_saida:
+        os.makedirs(DIRETORIO_RESULTADOS, exist_ok=True)
+        caminho_saida = os.path.join(
+            DIRETORIO_RESULTADOS, f"texto_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit or 'sem_commit'}.json"
+        )
+    with open(caminho_saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    relatorio['report'] = caminho_saida
+    print(f"📁 Relatório salvo em: {caminho_saida}")
+    return relatorio
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os backends de extração de texto de PDF (resultado em JSON).")
+    parser.add_argument('-b', '--backend', action='append', choices=list(pdf_text.BACKENDS),
+                        help='Backend medido (pode repetir; padrão: todos os instalados)')
+    parser.add_argument('-x', '--fixture', action='append', choices=list(FIXTURES),
+                        help='PDF sintético usado (pode repetir; padrão: todos)')
+    parser.add_argument('-n', '--runs', type=int, default=5, help='Execuções medidas por cenário')
+    parser.add_argument('--warmup', type=int, default=1, help='Execuções descartadas antes das medidas')
+    parser.add_argument('--fixtures-dir', default=None, help='Diretório dos PDFs sintéticos')
+    parser.add_argument('-o', '--output', default=None, help='Caminho do relatório JSON')
+    args = parser.parse_args()
+
+    relatorio = executar_benchmark(args.backend, args.fixture, args.runs, args.warmup, args.fixtures_dir,
+                                   args.output)
+
+    print(f"\n🏁 Classificação (backend configurado: {Config.PDF_TEXT_BACKEND}):")
+    for posicao, total in enumerate(relatorio['ranking'], 1):
+        print(f"   {posicao}. {total['backend']}: {total['pages_per_second']} páginas/s ({total['total_s']}s no total)")
+
+    if any(r.get('error') for r in relatorio['results']):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -29,7 +29,8 @@ class Config:
     STATIC_FOLDER = 'static'
     
     # Configurações de arquivo
-    ALLOWED_EXTENSIONS = {'pdf'}
+    IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'tif', 'tiff'}  # Imagens aceitas no OCR (ver ai/image_ocr.py)
+    ALLOWED_EXTENSIONS = {'pdf'} | IMAGE_EXTENSIONS
     MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
     
     # Configurações de segurança para dados sensíveis
@@ -49,11 +50,78 @@ class Config:
     
     # Configurações do OCR
     OCR_LANGUAGES = 'por+eng'  # Português + Inglês
-    OCR_DESKEW = False         # Corrigir rotação (desabilitado - requer Ghostscript)
-    OCR_CLEAN = False          # Limpar imagem (desabilitado - requer unpaper)
-    OCR_FORCE_OCR = True       # Forçar OCR em todas as páginas
+    OCR_DESKEW = False         # Corrigir rotação no ocrmypdf (desabilitado - requer Ghostscript); ver OCR_PREPROCESS_DESKEW
+    OCR_CLEAN = False          # Limpar imagem (desabilitado - requer unpaper); ver OCR_PREPROCESS
+    # Pré-processamento em NumPy da imagem enviada ao Tesseract (inclinação, binarização adaptativa
+    # e remoção de ruído), feito no processo do OCR; a imagem visível do PDF não é alterada e as
+    # coordenadas do hOCR voltam para a página original (ver desfazer_inclinacao_hocr)
+    OCR_PREPROCESS = True
+    OCR_PREPROCESS_DESKEW = True   # Corrigir a inclinação pelo perfil de projeção horizontal
+    OCR_PREPROCESS_MAX_ANGLE = 5.0 # Maior inclinação procurada, em graus
+    # Resolução das páginas enviadas ao Tesseract (digitalizações de 400-600 DPI são reduzidas)
+    OCR_TARGET_DPI = 300
+    OCR_MIN_LINE_HEIGHT = 30       # A redução para antes de as linhas de texto ficarem menores que isso (pixels)
+    OCR_GRAYSCALE = True           # Converter páginas coloridas para tons de cinza antes do OCR
+    OCR_FORCE_OCR = False      # False = modo híbrido: OCR apenas nas páginas sem texto utilizável
+    OCR_MIN_TEXT_CHARS = 50        # Mínimo de caracteres para considerar o texto de uma página utilizável
+    OCR_MIN_TEXT_QUALITY = 0.8     # Proporção mínima de letras, números e pontuação no texto da página
+    OCR_MIN_IMAGE_DPI = 200        # Digitalizações abaixo desta resolução são reamostradas antes do OCR
+    OCR_OVERSAMPLE_DPI = 300       # Resolução usada na reamostragem
+    OCR_IMAGE_DPI = 300            # Resolução assumida para imagens (JPEG, PNG, TIFF) que não informam a sua
     OCR_OPTIMIZE = 0           # Sem otimização (desabilitado - requer Ghostscript)
-    
+    OCR_PROBE_TIMEOUT = 10         # Tempo máximo da verificação do Tesseract (feita no primeiro uso)
+    # Tempo máximo do OCR (segundos; None = sem limite). Esgotado o prazo do documento, os processos
+    # do OCR são encerrados e o resultado traz o texto das páginas concluídas
+    OCR_PAGE_TIMEOUT = 180         # Por página: o Tesseract desiste da página; o documento tem no máximo páginas x isso
+    OCR_DOCUMENT_TIMEOUT = 1800    # Por documento
+    # Novo OCR só das páginas com confiança média do Tesseract abaixo do mínimo, com um perfil mais
+    # pesado (resolução maior, pré-processamento e outro modo de segmentação); fica o melhor resultado
+    OCR_RETRY_MIN_CONFIDENCE = 60  # Confiança média das palavras (0-100); None = sem novo OCR
+    OCR_RETRY_DPI = 400            # Resolução do novo OCR
+    OCR_RETRY_PSM = 4              # Modo de segmentação do Tesseract (4 = uma coluna de texto de tamanhos variados)
+    # PDFs grandes são processados em janelas de páginas (limpeza, OCR e texto), com memória
+    # limitada pelo tamanho da janela; acima de qualquer um dos limites (None = sem limite)
+    OCR_WINDOW_PAGES = 50                      # Páginas por janela (0 = documento inteiro de uma vez)
+    OCR_WINDOW_MIN_PAGES = 100                 # Páginas do documento
+    OCR_WINDOW_MIN_BYTES = 20 * 1024 * 1024    # Tamanho do arquivo (20MB)
+
+    # Motor do OCR: 'ocrmypdf' (processos do Tesseract a cada chamada) ou 'tesserocr'
+    # (processos com o Tesseract residente e o idioma já carregado; requer tesserocr e pypdfium2)
+    OCR_ENGINE = os.environ.get('OCR_ENGINE', 'ocrmypdf')
+    OCR_ENGINE_WORKERS = None      # Processos do motor residente (None = número de núcleos da máquina)
+
+    # OCR paralelo por páginas
+    OCR_PARALLEL = True            # Dividir o PDF em faixas de páginas e processar em paralelo
+    OCR_PARALLEL_MIN_PAGES = 4     # Documentos menores seguem pelo OCR tradicional
+    OCR_PAGES_PER_CHUNK = 4        # Páginas por faixa enviada a cada processo
+    OCR_MAX_WORKERS = None         # Processos do pool (None = número de núcleos da máquina)
+
+    # OCR em lote de diretórios (ai/ocr_batch.py)
+    OCR_BATCH_MAX_WORKERS = None   # Arquivos processados ao mesmo tempo (None = número de núcleos)
+    OCR_BATCH_MANIFEST = '.ocr_manifest.json'  # Manifesto no diretório de saída (permite retomar o lote)
+
+    # Cache de resultados do OCR (chave: SHA-256 do arquivo + configurações do OCR)
+    OCR_CACHE_ENABLED = True
+    OCR_CACHE_DIRECTORY = os.path.join(TEMP_DIRECTORY, 'ocr_cache')
+    OCR_CACHE_MAX_BYTES = 500 * 1024 * 1024  # 500MB, entradas menos usadas são removidas primeiro
+
+    # Cache de OCR por página (chave: imagem da página renderizada; ver ai/page_cache.py)
+    OCR_PAGE_CACHE_ENABLED = True
+    OCR_PAGE_CACHE_DIRECTORY = os.path.join(TEMP_DIRECTORY, 'ocr_page_cache')
+    OCR_PAGE_CACHE_MAX_BYTES = 200 * 1024 * 1024  # 200MB, entradas menos usadas são removidas primeiro
+    OCR_PAGE_CACHE_DPI = 100       # Resolução da renderização usada na chave
+
+    # Inspeções de PDF mantidas em memória por processo (evita reler o mesmo arquivo)
+    PDF_INSPECTION_CACHE_SIZE = 16
+    # Biblioteca que extrai a camada de texto dos PDFs: 'pypdfium2', 'pypdf' ou 'PyPDF2'
+    # (ver ai/pdf_text.py; comparação com python -m benchmarks.text_benchmark)
+    PDF_TEXT_BACKEND = os.environ.get('PDF_TEXT_BACKEND', 'pypdfium2')
+
+    # Processamento assíncrono (jobs de OCR/IA fora da thread da requisição)
+    JOB_MAX_WORKERS = 2            # Jobs executados ao mesmo tempo
+    JOB_MAX_PENDING = 20           # Jobs na fila ou em execução; acima disso a API responde 503
+    JOB_DIRECTORY = os.path.join(TEMP_DIRECTORY, 'jobs')  # Estado e resultado, mantidos até MAX_FILE_AGE
+
     # Configurações de logging
     LOG_LEVEL = 'INFO'
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -69,6 +137,19 @@ class Config:
     
     # Chave da OpenAI API
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY') or "chave-openai"
+    # Cliente da OpenAI compartilhado pelo processo (ai/openai_service.get_openai_client)
+    OPENAI_MAX_CONNECTIONS = 10            # Conexões HTTP simultâneas com a API
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS = 5   # Conexões ociosas mantidas abertas para as próximas chamadas
+    OPENAI_KEEPALIVE_EXPIRY = 60           # Segundos até uma conexão ociosa ser fechada
+    # Tempo máximo de uma chamada (segundos). O padrão do SDK é 600s: com as novas tentativas, uma
+    # chamada travada prenderia o worker do job por até 30 minutos. Ajustável pela variável de ambiente
+    OPENAI_TIMEOUT = float(os.environ.get('OPENAI_TIMEOUT', 120))
+    OPENAI_CONNECT_TIMEOUT = 10            # Tempo máximo para abrir a conexão (segundos)
+    OPENAI_MAX_RETRIES = 2                 # Novas tentativas em erros de conexão e limites de taxa
+    # Cabeçalhos e rodapés repetidos removidos do texto antes da IA (ver ai/page_boilerplate.py)
+    LLM_BOILERPLATE_EDGE_LINES = 4         # Linhas examinadas no topo e no fim de cada página (0 = desligado)
+    LLM_BOILERPLATE_MIN_PAGE_RATIO = 0.5   # Fração das páginas em que a linha precisa se repetir
+    LLM_BOILERPLATE_MIN_PAGES = 3          # Documentos com menos páginas são enviados inteiros
     
     @staticmethod
     def init_app(app):
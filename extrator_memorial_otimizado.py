@@ -7,7 +7,7 @@ from io import BytesIO
 import argparse
 from concurrent.futures import ThreadPoolExecutor, as_completed, ProcessPoolExecutor
 import time
-import PyPDF2
+from ai.pdf_text import extrair_paginas
 
 # Regex compilados uma única vez para melhor performance - ULTRA OTIMIZADOS
 REGEX_TORRE = re.compile(
@@ -124,11 +124,7 @@ def extrair_pavimento_otimizado(texto):
 def extrair_texto_pdf(file_path):
     """Extrai texto de arquivo PDF"""
     try:
-        reader = PyPDF2.PdfReader(file_path)
-        texto = ""
-        for page in reader.pages:
-            texto += page.extract_text() + "\n"
-        return texto
+        return "".join(pagina + "\n" for pagina in extrair_paginas(file_path))
     except Exception as e:
         print(f"Erro ao extrair texto do PDF: {e}")
         return ""
@@ -1576,8 +1576,8 @@ async function processOCRFile() {
     }
     
     const file = fileInput.files[0];
-    if (!file.name.toLowerCase().endsWith('.pdf')) {
-        showAlert('Apenas arquivos PDF são permitidos para OCR', 'warning');
+    if (!/\.(pdf|jpe?g|png|tiff?)$/i.test(file.name)) {
+        showAlert('Apenas arquivos PDF ou imagens (JPEG, PNG, TIFF) são permitidos para OCR', 'warning');
         return;
     }
     
@@ -1680,7 +1680,8 @@ async function downloadOCRPDF() {
     
     // Usar apenas o nome original do arquivo, não o output_filename que contém file_id duplicado
     const downloadUrl = `/api/ocr/download/${window.ocrResult.file_id}?filename=${window.ocrResult.original_filename}`;
-    const filename = `ocr_pesquisavel_${window.ocrResult.original_filename}`;
+    // Imagens (JPEG, PNG, TIFF) geram um PDF pesquisável
+    const filename = `ocr_pesquisavel_${window.ocrResult.original_filename.replace(/\.(jpe?g|png|tiff?)$/i, '.pdf')}`;
     
     console.log('🔗 URL de download:', downloadUrl);
     console.log('📁 Nome do arquivo:', filename);
@@ -1696,7 +1697,7 @@ async function downloadOCRText() {
     
     // Usar apenas o nome original do arquivo, não o output_filename que contém file_id duplicado
     const downloadUrl = `/api/ocr/text/${window.ocrResult.file_id}?filename=${window.ocrResult.original_filename}`;
-    const filename = `texto_extraido_${window.ocrResult.original_filename.replace('.pdf', '.txt')}`;
+    const filename = `texto_extraido_${window.ocrResult.original_filename.replace(/\.(pdf|jpe?g|png|tiff?)$/i, '.txt')}`;
     
     await downloadOCRFile(downloadUrl, filename);
 }
@@ -4,7 +4,6 @@ const CONFIG = {
     MAX_FILE_SIZE: 10 * 1024 * 1024, // 10MB
     SUPPORTED_FORMATS: ['.pdf', '.jpg', '.jpeg', '.png'],
     ALERT_TIMEOUT: 5000,
-    PROGRESS_INTERVAL: 200,
     HEALTH_CHECK_INTERVAL: 30000
 };
 
@@ -0,0 +1,146 @@
+// jobs.js - Processamento assíncrono (/api/jobs) com progresso real via Server-Sent Events
+
+// Faixa da barra de progresso (%) de cada etapa do job
+const STAGE_PROGRESS = {
+    queued: [0, 2],
+    uploaded: [2, 5],
+    preflight: [5, 10],
+    decrypt: [10, 15],
+    ocr: [15, 65],
+    reocr: [65, 75],
+    extracting: [75, 90],
+    rendering: [90, 98],
+    done: [100, 100]
+};
+
+const STAGE_LABELS = {
+    queued: 'Na fila de processamento...',
+    uploaded: 'Arquivo recebido',
+    preflight: 'Analisando o PDF...',
+    decrypt: 'Removendo assinatura e criptografia...',
+    ocr: 'Executando OCR',
+    reocr: 'Refazendo o OCR das páginas com baixa confiança',
+    extracting: 'Extraindo dados com IA...',
+    rendering: 'Gerando documento...',
+    done: 'Concluído'
+};
+
+// Converter o progresso enviado pelo servidor em porcentagem e texto
+export function describeProgress(progress) {
+    const stage = (progress && progress.stage) || 'queued';
+    const [start, end] = STAGE_PROGRESS[stage] || [0, 0];
+    let percent = start;
+    let label = STAGE_LABELS[stage] || stage;
+
+    if (progress && progress.total) {
+        percent = start + (end - start) * (progress.current || 0) / progress.total;
+        label += ` - página ${progress.current || 0} de ${progress.total}`;
+    }
+    return { percent: Math.round(percent), label };
+}
+
+// Buscar o resultado por polling (usado se o stream de eventos cair)
+async function pollResult(resultUrl) {
+    while (true) {
+        const response = await fetch(resultUrl);
+        const data = await response.json();
+        if (response.status !== 202) {
+            return { ok: response.ok, status: response.status, data, cancelled: response.status === 409 };
+        }
+        await new Promise(resolve => setTimeout(resolve, 2000));
+    }
+}
+
+// Enviar o arquivo como job e acompanhar o andamento
+// Retorna { promise, cancel }; a promise resolve com { ok, status, data, cancelled },
+// onde data é a mesma resposta da rota síncrona equivalente
+export function runJob(formData, { onProgress } = {}) {
+    let jobId = null;
+    let cancelRequested = false;
+
+    const cancel = () => {
+        cancelRequested = true;
+        if (jobId) {
+            fetch(`/api/jobs/${jobId}/cancel`, { method: 'POST' }).catch(error => {
+                console.error('Erro ao cancelar o job:', error);
+            });
+        }
+    };
+
+    const promise = (async () => {
+        const response = await fetch('/api/jobs', { method: 'POST', body: formData });
+        const submitted = await response.json();
+        if (response.status !== 202) {
+            return { ok: false, status: response.status, data: submitted, cancelled: false };
+        }
+
+        jobId = submitted.job_id;
+        console.log(`📥 Job ${jobId} enviado`);
+        if (cancelRequested) cancel();
+
+        return new Promise(resolve => {
+            const source = new EventSource(submitted.events_url);
+
+            source.addEventListener('progress', event => {
+                const data = JSON.parse(event.data);
+                if (onProgress) onProgress(describeProgress(data.progress), data);
+            });
+
+            source.addEventListener('done', event => {
+                const data = JSON.parse(event.data);
+                source.close();
+                if (onProgress) onProgress(describeProgress(data.progress), data);
+                resolve({
+                    ok: data.http_status < 400,
+                    status: data.http_status,
+                    data: data.result,
+                    cancelled: data.status === 'cancelled'
+                });
+            });
+
+            source.onerror = () => {
+                // Sem reconexão automática: seguir por polling
+                if (source.readyState === EventSource.CLOSED) {
+                    pollResult(submitted.result_url).then(resolve);
+                }
+            };
+        });
+    })();
+
+    return { promise, cancel };
+}
+
+// Barra de progresso com botão de cancelar, criada dentro do container
+export function createProgressView(container, onCancel) {
+    container.innerHTML = `
+        <div class="alert alert-info fade-in">
+            <div class="d-flex justify-content-between align-items-center mb-2">
+                <span class="job-progress-label"><i class="fas fa-spinner fa-spin me-2"></i>Enviando arquivo...</span>
+                <button type="button" class="btn btn-sm btn-outline-danger job-cancel">
+                    <i class="fas fa-times me-1"></i>Cancelar
+                </button>
+            </div>
+            <div class="progress">
+                <div class="progress-bar progress-bar-striped progress-bar-animated" role="progressbar" style="width: 0%">0%</div>
+            </div>
+        </div>
+    `;
+
+    const label = container.querySelector('.job-progress-label');
+    const bar = container.querySelector('.progress-bar');
+    const cancelButton = container.querySelector('.job-cancel');
+
+    cancelButton.addEventListener('click', () => {
+        cancelButton.disabled = true;
+        cancelButton.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i>Cancelando...';
+        onCancel();
+    });
+
+    return {
+        update({ percent, label: text }) {
+            bar.style.width = `${percent}%`;
+            bar.textContent = `${percent}%`;
+            label.innerHTML = `<i class="fas fa-spinner fa-spin me-2"></i>${text}`;
+        }
+    };
+}
@@ -1,5 +1,6 @@
 // main.js - Configuração principal do sistema NicSan
 import { processFile } from './process.js';
+import { runJob, createProgressView } from './jobs.js';
 
 // Configuração da UI moderna
 const ui = {
@@ -182,6 +183,7 @@ function setupCertidaoEventListeners() {
                 const file = files[0];
                 const formData = new FormData();
                 formData.append('file', file);
+                formData.append('type', 'certidao-data');
                 
                 // Obter modelo das configurações globais
                 const modelElement = document.querySelector('input[name="chatgptModel"]:checked');
@@ -197,17 +199,18 @@ function setupCertidaoEventListeners() {
                     documentPreviewArea: !!documentPreviewArea
                 });
                 
-                if (statusArea) statusArea.innerHTML = '<div class="alert alert-info">Executando OCR e processando certidão, aguarde...</div>';
                 if (documentPreviewArea) documentPreviewArea.style.display = 'none';
                 
-                // Fazer chamada para extrair dados
-                const response = await fetch('/api/certidao/data', {
-                    method: 'POST',
-                    body: formData
+                // Extrair dados em um job assíncrono, acompanhando o progresso real (etapa e página do OCR)
+                let progressView = null;
+                const job = runJob(formData, {
+                    onProgress: (progress) => progressView && progressView.update(progress)
                 });
+                if (statusArea) progressView = createProgressView(statusArea, job.cancel);
                 
-                if (response.ok) {
-                    const result = await response.json();
+                const { ok, data: result, cancelled } = await job.promise;
+                
+                if (ok) {
                     window.currentCertidaoData = result.data;
                     
                     // Mostrar dados extraídos
@@ -254,14 +257,10 @@ function setupCertidaoEventListeners() {
                     } else {
                         statusArea.innerHTML = '<div class="alert alert-warning">Processamento concluído, mas nenhum dado foi extraído.</div>';
                     }
+                } else if (cancelled) {
+                    statusArea.innerHTML = '<div class="alert alert-warning">Processamento cancelado.</div>';
                 } else {
-                    let errorMsg = 'Erro ao processar certidão.';
-                    try {
-                        const err = await response.json();
-                        errorMsg = err.error || errorMsg;
-                    } catch (jsonError) {
-                        console.error('Erro ao fazer parse do JSON de erro:', jsonError);
-                    }
+                    const errorMsg = (result && result.error) || 'Erro ao processar certidão.';
                     statusArea.innerHTML = `<div class="alert alert-danger">${errorMsg}</div>`;
                 }
             } catch (error) {
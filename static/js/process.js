@@ -1,5 +1,7 @@
 // process.js - Processamento de arquivos
 
+import { runJob, createProgressView } from './jobs.js';
+
 // Utilitários
 const UTILS = {
     validateFile: function(file) {
@@ -39,6 +41,9 @@ export async function processFile(files, ui, setCurrentData, serviceType = 'matr
         }
     }
 
+    // O OCR mostra o andamento na própria aba; os demais serviços no status geral
+    const statusId = serviceType === 'ocr' ? 'ocrStatus' : 'status';
+
     ui.showProgress(true);
     ui.updateStatus(`Processando ${files.length} arquivo(s)...`, 'info');
 
@@ -54,30 +59,39 @@ export async function processFile(files, ui, setCurrentData, serviceType = 'matr
 
             const formData = new FormData();
             formData.append('file', file);
+            formData.append('type', 'process-file');
             
             // Sempre usar gpt-4o como modelo
             formData.append('model', 'gpt-4o');
             formData.append('service', serviceType);
 
-            const response = await fetch('/api/process-file', {
-                method: 'POST',
-                body: formData
+            // Processar em um job assíncrono: barra com a etapa e a página do OCR (avançando
+            // pelo total dos arquivos) e botão para cancelar o job
+            const statusArea = document.getElementById(statusId);
+            let progressView = null;
+            const job = runJob(formData, {
+                onProgress: ({ percent, label }) => {
+                    const progress = {
+                        percent: Math.round((i * 100 + percent) / files.length),
+                        label: `Arquivo ${i + 1} de ${files.length} (${file.name}): ${label} (${percent}%)`
+                    };
+                    if (progressView) {
+                        progressView.update(progress);
+                    } else {
+                        ui.updateStatus(progress.label, 'info');
+                    }
+                }
             });
+            if (statusArea) progressView = createProgressView(statusArea, job.cancel);
+            const { ok, data, cancelled } = await job.promise;
 
-            if (response.ok) {
-                let data;
-                try {
-                    data = await response.json();
-                } catch (jsonError) {
-                    // Se não conseguir fazer parse do JSON, tentar ler como texto
-                    const textResponse = await response.text();
-                    console.error('Erro ao fazer parse do JSON:', jsonError);
-                    console.error('Resposta recebida:', textResponse);
-                    ui.updateStatus(`Erro no processamento do arquivo ${file.name}: Resposta inválida do servidor`, 'danger');
-                    ui.showAlert(`Erro no processamento do arquivo ${file.name}: Resposta inválida do servidor`, 'danger');
-                    return;
-                }
-                
+            if (cancelled) {
+                ui.updateStatus(`Processamento cancelado no arquivo ${file.name}`, 'warning', statusId);
+                ui.showAlert('Processamento cancelado', 'warning');
+                return;
+            }
+
+            if (ok) {
                 // Armazenar último resultado processado
                 lastProcessedData = data;
                 
@@ -88,19 +102,8 @@ export async function processFile(files, ui, setCurrentData, serviceType = 'matr
                 
                 processedCount++;
             } else {
-                let errorData;
-                try {
-                    errorData = await response.json();
-                } catch (jsonError) {
-                    // Se não conseguir fazer parse do JSON de erro, tentar ler como texto
-                    const textResponse = await response.text();
-                    console.error('Erro ao fazer parse do JSON de erro:', jsonError);
-                    console.error('Resposta de erro recebida:', textResponse);
-                    ui.updateStatus(`Erro no arquivo ${file.name}: Erro no servidor`, 'danger');
-                    ui.showAlert(`Erro no processamento do arquivo ${file.name}: Erro no servidor`, 'danger');
-                    return;
-                }
-                ui.updateStatus(`Erro no arquivo ${file.name}: ${errorData.error}`, 'danger');
+                const errorData = data || { error: 'Erro no servidor' };
+                ui.updateStatus(`Erro no arquivo ${file.name}: ${errorData.error}`, 'danger', statusId);
                 ui.showAlert(`Erro no processamento do arquivo ${file.name}: ${errorData.error}`, 'danger');
                 return;
             }
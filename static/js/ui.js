@@ -57,7 +57,7 @@ class UI {
         }
     }
     
-    // Mostrar/esconder progresso
+    // Mostrar/esconder progresso (o avanço vem do servidor, ver setProgress)
     showProgress(show) {
         const progress = this.elements.progress;
         const progressBar = document.querySelector(DOM_ELEMENTS.progressBar);
@@ -67,29 +67,20 @@ class UI {
         if (show) {
             progress.classList.remove('d-none');
             progressBar.style.width = '0%';
-            
-            // Simular progresso
-            let width = 0;
-            const interval = setInterval(() => {
-                if (width >= 90) {
-                    clearInterval(interval);
-                } else {
-                    width += Math.random() * 10;
-                    progressBar.style.width = width + '%';
-                }
-            }, CONFIG.PROGRESS_INTERVAL);
-            
-            // Armazenar o intervalo para limpar depois
-            progress.dataset.interval = interval;
         } else {
             progress.classList.add('d-none');
             progressBar.style.width = '100%';
-            
-            // Limpar intervalo se existir
-            if (progress.dataset.interval) {
-                clearInterval(parseInt(progress.dataset.interval));
-                delete progress.dataset.interval;
-            }
+        }
+    }
+    
+    // Atualizar a barra com o progresso real do job (ver describeProgress em jobs.js)
+    setProgress({ percent, label }) {
+        const progressBar = document.querySelector(DOM_ELEMENTS.progressBar);
+        if (progressBar) {
+            progressBar.style.width = percent + '%';
+        }
+        if (label) {
+            this.updateStatus(label, 'info');
         }
     }
     
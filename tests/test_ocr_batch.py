@@ -0,0 +1,133 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# OCR em lote com process_pdf_with_ocr substituído por uma função que copia o
+# arquivo: os processos do lote herdam a substituição (fork) e registram cada
+# chamada em CHAMADAS, no diretório de entrada
+
+import os
+import json
+import shutil
+import pytest
+from ai import ocr_service
+from ai.ocr_batch import processar_lote, carregar_manifesto, hash_arquivo
+
+CHAMADAS = 'chamadas.log'
+
+def _ocr_falso(entrada, saida, options=None):
+    with open(os.path.join(os.path.dirname(entrada), CHAMADAS), 'a', encoding='utf-8') as f:
+        f.write(os.path.basename(entrada) + '\n')
+    nome = os.path.basename(entrada)
+    if nome.startswith('quebra'):
+        # Processo do pool morto (falta de memória, segfault do Tesseract)
+        os._exit(1)
+    if nome.startswith('falha'):
+        return {'success': False, 'error': 'PDF corrompido'}
+    shutil.copyfile(entrada, saida)
+    estrategia = 'skip' if nome.startswith('digital') else 'ocr'
+    return {'success': True, 'pages_processed': 2, 'pages_ocr': 2, 'ocr_plan': {'strategy': estrategia}}
+
+@pytest.fixture
+def lote(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_service, 'process_pdf_with_ocr', _ocr_falso)
+    entrada = tmp_path / 'entrada'
+    entrada.mkdir()
+    return entrada, tmp_path / 'saida'
+
+def _criar(diretorio, nome, conteudo):
+    (diretorio / nome).write_bytes(b'%PDF-1.4\n' + conteudo.encode('utf-8'))
+
+def _chamadas(diretorio):
+    caminho = diretorio / CHAMADAS
+    return sorted(caminho.read_text(encoding='utf-8').split()) if caminho.exists() else []
+
+def _situacoes(resumo):
+    return {arquivo['file']: arquivo['status'] for arquivo in resumo['files']}
+
+def test_lote_grava_saidas_manifesto_e_relatorio(lote):
+    entrada, saida = lote
+    _criar(entrada, 'a.pdf', 'matrícula 1')
+    _criar(entrada, 'digital.pdf', 'nato-digital')
+    _criar(entrada, 'falha.pdf', 'corrompido')
+    (entrada / 'notas.txt').write_text('ignorado')
+
+    resumo = processar_lote(str(entrada), str(saida), max_workers=2)
+
+    assert _situacoes(resumo) == {'a.pdf': 'done', 'digital.pdf': 'skipped', 'falha.pdf': 'failed'}
+    assert resumo['counts'] == {'done': 1, 'skipped': 1, 'failed': 1}
+    assert resumo['pages'] == 4 and not resumo['interrupted']
+    assert (saida / 'ocr_a.pdf').read_bytes() == (entrada / 'a.pdf').read_bytes()
+
+    manifesto = carregar_manifesto(resumo['manifest'])
+    assert manifesto[hash_arquivo(str(entrada / 'a.pdf'))]['status'] == 'done'
+    assert manifesto[hash_arquivo(str(entrada / 'falha.pdf'))]['error'] == 'PDF corrompido'
+
+    with open(resumo['report'], 'r', encoding='utf-8') as f:
+        relatorio = json.load(f)
+    assert relatorio['counts'] == resumo['counts']
+    assert all('input' not in arquivo for arquivo in relatorio['files'])
+
+def test_lote_retomado_pula_arquivos_concluidos(lote):
+    entrada, saida = lote
+    _criar(entrada, 'a.pdf', 'matrícula 1')
+    _criar(entrada, 'b.pdf', 'matrícula 2')
+    _criar(entrada, 'falha.pdf', 'corrompido')
+    processar_lote(str(entrada), str(saida), max_workers=1)
+    assert _chamadas(entrada) == ['a.pdf', 'b.pdf', 'falha.pdf']
+
+    # Arquivo renomeado e um arquivo novo: só o novo passa pelo OCR
+    os.rename(entrada / 'b.pdf', entrada / 'b_renomeado.pdf')
+    _criar(entrada, 'c.pdf', 'matrícula 3')
+    resumo = processar_lote(str(entrada), str(saida), max_workers=1)
+
+    assert _chamadas(entrada) == ['a.pdf', 'b.pdf', 'c.pdf', 'falha.pdf']
+    assert _situacoes(resumo) == {
+        'a.pdf': 'already_done', 'b_renomeado.pdf': 'already_done', 'c.pdf': 'done',
+        'falha.pdf': 'previously_failed'
+    }
+    assert (saida / 'ocr_b_renomeado.pdf').exists()
+
+    # Falhas só são refeitas quando pedido
+    resumo = processar_lote(str(entrada), str(saida), max_workers=1, reprocessar_falhas=True)
+    assert _situacoes(resumo)['falha.pdf'] == 'failed'
+    assert _chamadas(entrada).count('falha.pdf') == 2
+
+def test_arquivos_repetidos_no_lote_passam_uma_vez_pelo_ocr(lote):
+    entrada, saida = lote
+    _criar(entrada, 'a.pdf', 'mesmo conteúdo')
+    _criar(entrada, 'copia_de_a.pdf', 'mesmo conteúdo')
+
+    resumo = processar_lote(str(entrada), str(saida), max_workers=2)
+
+    assert _chamadas(entrada) == ['a.pdf']
+    assert _situacoes(resumo) == {'a.pdf': 'done', 'copia_de_a.pdf': 'duplicate'}
+    assert (saida / 'ocr_copia_de_a.pdf').read_bytes() == (saida / 'ocr_a.pdf').read_bytes()
+
+def test_processo_morto_interrompe_o_lote_sem_marcar_os_restantes(lote):
+    entrada, saida = lote
+    _criar(entrada, 'a.pdf', 'matrícula 1')
+    _criar(entrada, 'quebra.pdf', 'derruba o processo')
+    _criar(entrada, 'z.pdf', 'matrícula 3')
+
+    resumo = processar_lote(str(entrada), str(saida), max_workers=1)
+
+    assert resumo['interrupted']
+    assert _situacoes(resumo) == {'a.pdf': 'done', 'quebra.pdf': 'interrupted', 'z.pdf': 'interrupted'}
+    # Só o arquivo concluído entra no manifesto: os demais são refeitos no próximo lote
+    manifesto = carregar_manifesto(resumo['manifest'])
+    assert [entrada_manifesto['file'] for entrada_manifesto in manifesto.values()] == ['a.pdf']
+
+    os.remove(entrada / 'quebra.pdf')
+    resumo = processar_lote(str(entrada), str(saida), max_workers=1)
+    assert _situacoes(resumo) == {'a.pdf': 'already_done', 'z.pdf': 'done'}
@@ -0,0 +1,151 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+# Prazo do OCR, cancelamento de jobs e encerramento dos processos, com o ocrmypdf
+# substituído por funções que simulam o OCR página a página (sem Tesseract)
+
+import os
+import sys
+import time
+import shutil
+import threading
+import subprocess
+import pikepdf
+import pytest
+import ocrmypdf
+from config import Config
+from ai import ocr_capabilities
+from ai import ocr_service
+from ai.jobs import job_manager
+from ai.ocr_budget import PoolOCR, encerrar_processos
+from ai.ocrmypdf_plugin import ProgressoCancelavel
+from ai.page_cache import nome_arquivo_hocr
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+TOTAL_PAGINAS = 6
+
+HOCR = """<div class='ocr_page' id='page_1' title='bbox 0 0 2480 3508'>
+<p class='ocr_par'><span class='ocr_line' id='line_1' title="bbox 10 10 900 60"><span class='ocrx_word' id='word_1' title='bbox 10 10 300 60; x_wconf 90'>pagina</span> <span class='ocrx_word' id='word_2' title='bbox 320 10 400 60; x_wconf 90'>{numero}</span>
+</span></p></div>"""
+
+@pytest.fixture
+def pdf_escaneado(tmp_path, monkeypatch):
+    """PDF de páginas sem texto, com o OCR dado como disponível e sem cache"""
+    monkeypatch.setattr(ocr_capabilities, 'ocr_available', lambda: True)
+    monkeypatch.setattr(ocr_capabilities, 'tesseract_available', lambda: True)
+    monkeypatch.setattr(Config, 'OCR_PAGE_CACHE_ENABLED', False)
+    monkeypatch.setattr(Config, 'TEMP_DIRECTORY', str(tmp_path))
+
+    caminho = str(tmp_path / 'escaneado.pdf')
+    with pikepdf.new() as pdf:
+        for _ in range(TOTAL_PAGINAS):
+            pdf.add_blank_page(page_size=(595, 842))
+        pdf.save(caminho)
+    return caminho
+
+def _paginas(pages):
+    return [int(pagina) - 1 for pagina in pages.split(',')] if pages else list(range(TOTAL_PAGINAS))
+
+def _ocrmypdf_lento(entrada, saida, pages=None, sidecar=None, axion_hocr_dir=None, **opcoes):
+    """Reconhece uma página a cada 0,3s, gravando o hOCR como o plugin do ocrmypdf"""
+    for indice in _paginas(pages):
+        time.sleep(0.3)
+        with open(os.path.join(axion_hocr_dir, nome_arquivo_hocr(indice)), 'w', encoding='utf-8') as f:
+            f.write(HOCR.format(numero=indice + 1))
+    shutil.copyfile(entrada, saida)
+
+def test_prazo_esgotado_devolve_o_texto_das_paginas_concluidas(pdf_escaneado, tmp_path, monkeypatch):
+    monkeypatch.setattr(ocrmypdf, 'ocr', _ocrmypdf_lento)
+
+    resultado = ocr_service.process_pdf_with_ocr(pdf_escaneado, str(tmp_path / 'saida.pdf'), {
+        'use_cache': False, 'parallel': False, 'force_ocr': True, 'engine': 'ocrmypdf', 'timeout': 1.0
+    })
+
+    assert not resultado['success'] and resultado['timed_out']
+    concluidas = resultado['timed_out_after_page']
+    assert 1 <= concluidas < TOTAL_PAGINAS
+    assert resultado['pages_text'][:concluidas] == [f'pagina {numero}' for numero in range(1, concluidas + 1)]
+    assert resultado['pages_text'][concluidas:] == [''] * (TOTAL_PAGINAS - concluidas)
+    assert resultado['pages_pending'] == list(range(concluidas + 1, TOTAL_PAGINAS + 1))
+
+def test_cancelamento_do_job_nao_inicia_as_paginas_na_fila(pdf_escaneado, tmp_path, monkeypatch):
+    processadas = []
+    duas_paginas = threading.Event()
+
+    def ocrmypdf_com_progresso(entrada, saida, pages=None, **opcoes):
+        # Sem prazo o ocrmypdf roda neste processo e atualiza o progresso a cada página
+        with ProgressoCancelavel(total=TOTAL_PAGINAS) as progresso:
+            for indice in _paginas(pages):
+                time.sleep(0.1)
+                processadas.append(indice)
+                if len(processadas) == 2:
+                    duas_paginas.set()
+                    time.sleep(0.3)
+                progresso.update()
+        shutil.copyfile(entrada, saida)
+
+    monkeypatch.setattr(ocrmypdf, 'ocr', ocrmypdf_com_progresso)
+
+    def job(progress):
+        return ocr_service.process_pdf_with_ocr(pdf_escaneado, str(tmp_path / 'saida.pdf'), {
+            'use_cache': False, 'parallel': False, 'force_ocr': True, 'engine': 'ocrmypdf', 'timeout': 0
+        }), 200
+
+    job_id = job_manager.submit('ocr', job)
+    assert duas_paginas.wait(10)
+    assert job_manager.cancel(job_id)
+
+    limite = time.time() + 10
+    while job_manager.get(job_id)['status'] in ('queued', 'running') and time.time() < limite:
+        time.sleep(0.05)
+    assert job_manager.get(job_id)['status'] == 'cancelled'
+    assert processadas == [0, 1]
+
+def _tarefa_com_filho(segundos):
+    """Tarefa do pool que inicia um processo filho (como o Tesseract) e demora"""
+    subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    time.sleep(segundos)
+
+def _ativo(pid):
+    try:
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+def _aguardar(condicao, segundos=10):
+    limite = time.time() + segundos
+    while not condicao() and time.time() < limite:
+        time.sleep(0.05)
+    return condicao()
+
+@pytest.mark.skipif(psutil is None, reason='psutil não instalado')
+def test_encerrar_processos_encerra_o_pool_e_os_filhos():
+    executor = PoolOCR(max_workers=2)
+    futuros = [executor.submit(_tarefa_com_filho, 30) for _ in range(3)]
+
+    assert _aguardar(lambda: len(executor.processos()) == 2)
+    pids = executor.processos()
+    assert _aguardar(lambda: all(psutil.Process(pid).children() for pid in pids))
+    filhos = [filho.pid for pid in pids for filho in psutil.Process(pid).children()]
+
+    encerrar_processos(executor)
+
+    assert _aguardar(lambda: not any(_ativo(pid) for pid in list(pids) + filhos))
+    # Nenhuma tarefa termina: as em andamento falham e a que estava na fila não chega a rodar
+    assert _aguardar(lambda: all(futuro.done() for futuro in futuros))
+    assert all(futuro.cancelled() or futuro.exception() is not None for futuro in futuros)
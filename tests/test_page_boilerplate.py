@@ -0,0 +1,66 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+from ai.page_boilerplate import remover_linhas_repetidas, texto_para_llm
+
+CABECALHO = 'REGISTRO DE IMÓVEIS - CERTIDÃO DE INTEIRO TEOR - Página {pagina} de {total}'
+CORPO_REPETIDO = 'R-3: Hipoteca em favor do Banco do Brasil S.A., em garantia de dívida no valor'
+
+def _matricula(total=6):
+    paginas = []
+    for pagina in range(1, total + 1):
+        corpo = [f'AV-{pagina}.{linha}: Averbação {linha} da matrícula 12.345, protocolo {pagina * 111 + linha}'
+                 for linha in range(4)]
+        # A mesma linha do corpo em todas as páginas, cada vez em uma posição
+        corpo.insert(pagina % 3, CORPO_REPETIDO)
+        corpo.append(f'Proprietário: Fulano {pagina}, brasileiro, casado, CPF 123.456.789-0{pagina}')
+        paginas.append('\n'.join(
+            [CABECALHO.format(pagina=pagina, total=total)]
+            + corpo
+            + [f'Selo de fiscalização nº ABCD{pagina:08d}X9', f'{pagina}/{total}']
+        ))
+    return paginas
+
+def test_cabecalho_com_contador_de_pagina_em_linha_longa_e_removido():
+    limpas, removidas = remover_linhas_repetidas(_matricula(), linhas_borda=2)
+    assert CABECALHO.format(pagina=1, total=6) in limpas[0]
+    assert all('INTEIRO TEOR' not in pagina for pagina in limpas[1:])
+    assert all('Selo de fiscalização' not in pagina and '/6' not in pagina for pagina in limpas[1:])
+    assert len(removidas) == 3 * 5
+
+def test_linha_do_corpo_repetida_em_todas_as_paginas_e_mantida():
+    limpas, _ = remover_linhas_repetidas(_matricula(), linhas_borda=4)
+    for numero, pagina in enumerate(limpas, 1):
+        assert CORPO_REPETIDO in pagina
+        assert f'AV-{numero}.0:' in pagina
+        assert f'CPF 123.456.789-0{numero}' in pagina
+
+def test_linhas_fora_das_bordas_nunca_sao_removidas():
+    paginas = ['\n'.join(['Cabeçalho do cartório', 'linha do meio igual', 'outra linha igual', 'Rodapé'])
+               for _ in range(5)]
+    limpas, removidas = remover_linhas_repetidas(paginas, linhas_borda=1)
+    assert removidas == ['Cabeçalho do cartório', 'Rodapé'] * 4
+    assert all(pagina == 'linha do meio igual\noutra linha igual' for pagina in limpas[1:])
+
+def test_poucas_paginas_nao_sao_alteradas():
+    paginas = _matricula(total=2)
+    assert remover_linhas_repetidas(paginas) == (paginas, [])
+
+def test_texto_para_llm_informa_tokens_economizados():
+    resultado = {'pages_text': _matricula()}
+    texto = texto_para_llm(resultado)
+    assert texto.count('INTEIRO TEOR') == 1
+    assert texto.count(CORPO_REPETIDO) == 6
+    assert resultado['llm_boilerplate']['lines_removed'] > 0
+    assert resultado['llm_boilerplate']['tokens_saved'] > 0
@@ -0,0 +1,48 @@
+"""
+AxionDocs - Sistema OCR integrado com API OpenAI
+Desenvolvido por João Gabriel Santos Barros (2025)
+
+Licenciado sob MIT License - consulte LICENSE.txt
+
+Este software é fornecido "no estado em que se encontra", sem garantias.
+
+O uso da API OpenAI requer chave configurada via variável de ambiente: OPENAI_API_KEY.
+Os custos gerados são responsabilidade do usuário da chave.
+
+Projeto iniciado como parte do TCC no Cartório de Registro de Imóveis de São Luís.
+"""
+
+import re
+import unicodedata
+from ai.text_normalization import normalizar_texto, juntar_paginas, normalizar_paginas, texto_normalizado
+
+def test_cpf_quebrado_na_linha_mantem_o_hifen():
+    assert normalizar_texto('CPF 123.456.789-\n00, casado') == 'CPF 123.456.789-00, casado'
+
+def test_numero_de_matricula_quebrado_na_linha_mantem_o_hifen():
+    assert normalizar_texto('Matrícula nº 12.345-\n  6 do Livro 2') == 'Matrícula nº 12.345-6 do Livro 2'
+
+def test_nome_composto_quebrado_na_linha_mantem_o_hifen():
+    assert normalizar_texto('São-\nLuís') == 'São-Luís'
+
+def test_palavra_hifenizada_e_juntada():
+    assert normalizar_texto('a matrí-\ncula do imóvel') == 'a matrícula do imóvel'
+    assert normalizar_texto('matrí\u00ad\ncula') == 'matrícula'
+
+def test_hifen_entre_espacos_continua_separado():
+    assert normalizar_texto('São Luís -\nMA') == 'São Luís - MA'
+
+def test_ligaduras_nfc_e_espacos():
+    texto = unicodedata.normalize('NFD', '  ﬁrma   oﬃcial\n\n\tem São Luís ')
+    assert normalizar_texto(texto) == 'firma official em São Luís'
+
+def test_espacos_equivalem_a_colapsar_com_regex():
+    texto = 'Certidão  de\tinteiro\r\n teor\n\n da matrícula '
+    assert normalizar_texto(texto) == re.sub(r'\s+', ' ', texto).strip()
+
+def test_normalizacao_por_pagina_e_juntada():
+    paginas = ['Página  1\n', '', ' Página 2 ']
+    assert juntar_paginas(normalizar_paginas(paginas)) == 'Página 1 Página 2'
+    resultado = {'pages_text': paginas}
+    assert texto_normalizado(resultado) == 'Página 1 Página 2'
+    assert resultado['normalized_text'] == 'Página 1 Página 2'